@@ -2,150 +2,595 @@
 """
 Build IMDb DuckDB database from TSV files.
 
-Loads title.basics.tsv, title.ratings.tsv, and title.episode.tsv
-into a DuckDB database with optimized indexes and views.
+Loads title.basics, title.ratings, and title.episode (either the
+official .tsv.gz dumps or decompressed .tsv files) into a DuckDB
+database with optimized indexes and views.
+
+Usage:
+    python 01_build_imdb_duckdb.py
+    python 01_build_imdb_duckdb.py --episode-panel view
+    python 01_build_imdb_duckdb.py --incremental
+    python 01_build_imdb_duckdb.py --parquet-dir imdb_parquet
 """
 
 import os
 import sys
+import time
+import argparse
 import duckdb
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from pathlib import Path
+from parquet_store import export_parquet
+from duckdb_settings import DuckDBSettings
+
+
+EPISODE_PANEL_SELECT = """
+    SELECT
+        e.tconst as episode_tconst,
+        e.parentTconst as series_tconst,
+        e.seasonNumber,
+        e.episodeNumber,
+        eb.primaryTitle as episode_title,
+        sb.primaryTitle as series_title,
+        r.averageRating,
+        r.numVotes
+    FROM title_episode e
+    LEFT JOIN title_basics eb ON e.tconst = eb.tconst
+    LEFT JOIN title_basics sb ON e.parentTconst = sb.tconst
+    LEFT JOIN title_ratings r ON e.tconst = r.tconst
+    WHERE e.seasonNumber IS NOT NULL
+        AND e.episodeNumber IS NOT NULL
+        AND r.averageRating IS NOT NULL
+        AND r.numVotes IS NOT NULL
+"""
+
+
+# Memory one concurrent source load needs (CSV read buffers and table writes);
+# full builds only load as many tables at once as fit in the memory limit
+LOAD_WORKER_MEMORY = 256 * 1024 * 1024
+
+# Source tables: TSV file, typed column expressions, and the columns compared
+# when diffing a refresh against existing rows (all keyed by tconst)
+SOURCE_TABLES = {
+    "title_basics": {
+        "file": "title.basics.tsv",
+        "label": "titles",
+        "select": """
+            tconst,
+            titleType,
+            primaryTitle,
+            originalTitle,
+            TRY_CAST(isAdult AS INTEGER) as isAdult,
+            TRY_CAST(startYear AS INTEGER) as startYear,
+            TRY_CAST(endYear AS INTEGER) as endYear,
+            TRY_CAST(runtimeMinutes AS INTEGER) as runtimeMinutes,
+            genres
+        """,
+        "columns": ["titleType", "primaryTitle", "originalTitle", "isAdult",
+                    "startYear", "endYear", "runtimeMinutes", "genres"]
+    },
+    "title_ratings": {
+        "file": "title.ratings.tsv",
+        "label": "ratings",
+        "select": """
+            tconst,
+            CAST(averageRating AS DOUBLE) as averageRating,
+            CAST(numVotes AS INTEGER) as numVotes
+        """,
+        "columns": ["averageRating", "numVotes"]
+    },
+    "title_episode": {
+        "file": "title.episode.tsv",
+        "label": "episodes",
+        "select": """
+            tconst,
+            parentTconst,
+            TRY_CAST(seasonNumber AS INTEGER) as seasonNumber,
+            TRY_CAST(episodeNumber AS INTEGER) as episodeNumber
+        """,
+        "columns": ["parentTconst", "seasonNumber", "episodeNumber"]
+    }
+}
+
+
+def find_source_file(imdb_path, table):
+    """
+    Path of a source table's dump: the decompressed .tsv if present,
+    otherwise the official .tsv.gz (read by DuckDB without unpacking).
+    """
+    filepath = imdb_path / SOURCE_TABLES[table]["file"]
+    if filepath.exists():
+        return filepath
+    gz_path = filepath.with_name(filepath.name + ".gz")
+    if gz_path.exists():
+        return gz_path
+    return None
+
+
+def source_query(table, filepath):
+    """SELECT reading a source TSV (plain or gzipped) with typed columns."""
+    spec = SOURCE_TABLES[table]
+    return f"""
+        SELECT {spec["select"]}
+        FROM read_csv_auto(
+            '{filepath}',
+            delim='\t',
+            header=true,
+            nullstr='\\N',
+            quote='',
+            escape=''
+        )
+    """
+
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Build IMDb DuckDB database from TSV files.")
+    parser.add_argument(
+        "--episode-panel",
+        choices=["table", "view"],
+        default=os.getenv("EPISODE_PANEL_MODE", "table"),
+        help="Materialize episode_panel as a table clustered by series (default) "
+             "or keep it as a view over the base tables"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Refresh an existing database in place: diff the TSVs against stored rows "
+             "by tconst, apply only inserts/updates/deletes and rebuild only the derived "
+             "tables whose inputs changed"
+    )
+    parser.add_argument(
+        "--load-workers",
+        type=int,
+        default=int(os.getenv("BUILD_LOAD_WORKERS", "0")) or None,
+        help="Source tables loaded concurrently during a full build (default: as many of the three "
+             "as fit in the memory limit; 1 loads them in sequence)"
+    )
+    parser.add_argument(
+        "--parquet-dir",
+        default=os.getenv("PARQUET_DIR"),
+        help="Also export the served tables as zstd Parquet (partitioned by titleType) "
+             "to this directory; point DB_PATH at it to serve from the files"
+    )
+    parser.add_argument(
+        "--memory-limit",
+        default=None,
+        help="DuckDB memory_limit, as a size (\"2GB\") or a share of available memory (\"60%%\"); "
+             "default: DUCKDB_MEMORY_LIMIT, else 75%% of the cgroup limit or physical RAM"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="DuckDB threads (default: DUCKDB_THREADS, else the cgroup CPU quota or usable CPUs)"
+    )
+    parser.add_argument(
+        "--temp-dir",
+        default=None,
+        help="Directory DuckDB spills to when a step exceeds the memory limit "
+             "(default: DUCKDB_TEMP_DIR, else imdb.duckdb.tmp)"
+    )
+    return parser.parse_args(argv)
+
+
+def format_timing(seconds, rows=None):
+    """Elapsed time, plus throughput when a row count is known."""
+    if rows is None:
+        return f"{seconds:.2f}s"
+    rate = rows / seconds if seconds > 0 else 0
+    return f"{seconds:.2f}s, {rate:,.0f} rows/sec"
+
+
+def drop_relation(con, name):
+    """Drop a table or view, whichever currently exists under this name."""
+    row = con.execute("""
+        SELECT table_type
+        FROM information_schema.tables
+        WHERE table_schema = 'main' AND table_name = ?
+    """, [name]).fetchone()
+    if row:
+        kind = "VIEW" if row[0] == "VIEW" else "TABLE"
+        con.execute(f"DROP {kind} {name}")
+
+
+def create_genre_index(con):
+    """
+    Normalize genres into a dimension, an exploded mapping and a bitmask.
+    
+    - genre_dim: one row per distinct genre with its bit position
+    - title_genre: one (tconst, titleType, genre) row per title genre
+    - title_basics.genre_mask: BIGINT with the bit of each genre set, so
+      genre filters are bitwise predicates instead of LIKE '%genre%' scans
+    """
+    con.execute("""
+        CREATE OR REPLACE TABLE title_genre AS
+        SELECT tconst, titleType, genre
+        FROM (
+            SELECT tconst, titleType, TRIM(UNNEST(string_split(genres, ','))) as genre
+            FROM title_basics
+            WHERE genres IS NOT NULL AND genres != ''
+        )
+        WHERE genre != ''
+        ORDER BY genre, titleType, tconst
+    """)
+    con.execute("""
+        CREATE OR REPLACE TABLE genre_dim AS
+        SELECT genre, CAST(ROW_NUMBER() OVER (ORDER BY genre) - 1 AS INTEGER) as bit
+        FROM (SELECT DISTINCT genre FROM title_genre)
+    """)
+    
+    genre_count = con.execute("SELECT COUNT(*) FROM genre_dim").fetchone()[0]
+    if genre_count > 63:
+        raise RuntimeError(f"Too many distinct genres for a BIGINT mask: {genre_count}")
+    
+    con.execute("""
+        CREATE OR REPLACE TABLE title_basics AS
+        WITH masks AS (
+            SELECT tg.tconst, BIT_OR(CAST(1 AS BIGINT) << gd.bit) as genre_mask
+            FROM title_genre tg
+            JOIN genre_dim gd ON tg.genre = gd.genre
+            GROUP BY tg.tconst
+        )
+        SELECT tb.*, COALESCE(m.genre_mask, 0) as genre_mask
+        FROM title_basics tb
+        LEFT JOIN masks m ON tb.tconst = m.tconst
+        ORDER BY tb.tconst
+    """)
+    return genre_count
+
+
+def refresh_genre_index(con, changes_table):
+    """
+    Update the genre index for titles listed in a title_basics change set.
+    
+    Existing bit positions are kept and new genres get the next free bit,
+    so masks of unchanged titles stay valid.
+    """
+    con.execute(f"""
+        DELETE FROM title_genre
+        WHERE tconst IN (SELECT tconst FROM {changes_table})
+    """)
+    con.execute(f"""
+        INSERT INTO title_genre
+        SELECT tconst, titleType, genre
+        FROM (
+            SELECT tconst, titleType, TRIM(UNNEST(string_split(genres, ','))) as genre
+            FROM title_basics
+            WHERE tconst IN (SELECT tconst FROM {changes_table} WHERE change != 'delete')
+                AND genres IS NOT NULL AND genres != ''
+        )
+        WHERE genre != ''
+    """)
+    con.execute("""
+        INSERT INTO genre_dim
+        SELECT
+            genre,
+            CAST((SELECT COALESCE(MAX(bit), -1) FROM genre_dim) + ROW_NUMBER() OVER (ORDER BY genre) AS INTEGER)
+        FROM (
+            SELECT DISTINCT genre FROM title_genre
+            WHERE genre NOT IN (SELECT genre FROM genre_dim)
+        )
+    """)
+    
+    genre_count = con.execute("SELECT COUNT(*) FROM genre_dim").fetchone()[0]
+    if genre_count > 63:
+        raise RuntimeError(f"Too many distinct genres for a BIGINT mask: {genre_count}")
+    
+    con.execute(f"""
+        UPDATE title_basics
+        SET genre_mask = COALESCE((
+            SELECT BIT_OR(CAST(1 AS BIGINT) << gd.bit)
+            FROM title_genre tg
+            JOIN genre_dim gd ON tg.genre = gd.genre
+            WHERE tg.tconst = title_basics.tconst
+        ), 0)
+        WHERE tconst IN (SELECT tconst FROM {changes_table} WHERE change != 'delete')
+    """)
+
+
+def stage_changes(con, table, filepath):
+    """
+    Load a source TSV into a temp table and diff it against the stored rows.
+    
+    Creates temp tables stage_<table> (new rows) and changes_<table> with one
+    (tconst, change) row per insert, update or delete. Returns the counts.
+    """
+    columns = SOURCE_TABLES[table]["columns"]
+    con.execute(f"CREATE OR REPLACE TEMP TABLE stage_{table} AS {source_query(table, filepath)}")
+    
+    differs = " OR ".join(f"t.{col} IS DISTINCT FROM s.{col}" for col in columns)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE changes_{table} AS
+        SELECT s.tconst, CASE WHEN t.tconst IS NULL THEN 'insert' ELSE 'update' END as change
+        FROM stage_{table} s
+        LEFT JOIN {table} t ON s.tconst = t.tconst
+        WHERE t.tconst IS NULL OR ({differs})
+        UNION ALL
+        SELECT t.tconst, 'delete' as change
+        FROM {table} t
+        ANTI JOIN stage_{table} s ON s.tconst = t.tconst
+    """)
+    
+    counts = dict(con.execute(f"SELECT change, COUNT(*) FROM changes_{table} GROUP BY change").fetchall())
+    return {change: counts.get(change, 0) for change in ("insert", "update", "delete")}
+
+
+def apply_changes(con, table):
+    """Apply a staged change set (see stage_changes) to the stored table."""
+    columns = SOURCE_TABLES[table]["columns"]
+    con.execute(f"""
+        DELETE FROM {table}
+        WHERE tconst IN (SELECT tconst FROM changes_{table} WHERE change = 'delete')
+    """)
+    assignments = ", ".join(f"{col} = s.{col}" for col in columns)
+    con.execute(f"""
+        UPDATE {table}
+        SET {assignments}
+        FROM stage_{table} s
+        WHERE {table}.tconst = s.tconst
+            AND s.tconst IN (SELECT tconst FROM changes_{table} WHERE change = 'update')
+    """)
+    column_list = ", ".join(["tconst"] + columns)
+    con.execute(f"""
+        INSERT INTO {table} ({column_list})
+        SELECT {column_list}
+        FROM stage_{table}
+        WHERE tconst IN (SELECT tconst FROM changes_{table} WHERE change = 'insert')
+    """)
+    con.execute(f"DROP TABLE stage_{table}")
+
+
+def create_episode_panel(con, mode="table"):
+    """
+    Create episode_panel joining episodes with ratings and series info.
+    
+    In table mode the join is materialized once and rows are written in
+    (series_tconst, seasonNumber, episodeNumber) order, so each series lives
+    in a contiguous run of row groups and per-series lookups are pruned by
+    DuckDB's min/max zone maps instead of re-joining the base tables.
+    """
+    drop_relation(con, "episode_panel")
+    if mode == "view":
+        con.execute(f"CREATE VIEW episode_panel AS {EPISODE_PANEL_SELECT}")
+        return
+    
+    con.execute(f"""
+        CREATE TABLE episode_panel AS
+        {EPISODE_PANEL_SELECT}
+        ORDER BY series_tconst, seasonNumber, episodeNumber
+    """)
+
+
+def create_series_stats(con):
+    """
+    Create series_stats with one precomputed row per TV series.
+    
+    Panel columns (total_episodes .. rank_score) cover rated episodes with
+    season/episode numbers and drive /browse_tv and /ranked_tv; listed_*
+    columns cover every episode in title_episode and drive /search_series.
+    rank_score is ln(1 + avg_votes_per_episode) * avg_rating.
+    """
+    con.execute("""
+        CREATE OR REPLACE TABLE series_stats AS
+        WITH listed AS (
+            SELECT
+                te.parentTconst as tconst,
+                COUNT(DISTINCT te.tconst) as listed_episodes,
+                AVG(tr.averageRating) as listed_avg_rating
+            FROM title_episode te
+            LEFT JOIN title_ratings tr ON te.tconst = tr.tconst
+            GROUP BY te.parentTconst
+        ),
+        panel AS (
+            SELECT
+                series_tconst as tconst,
+                COUNT(DISTINCT episode_tconst) as total_episodes,
+                MAX(seasonNumber) as total_seasons,
+                AVG(averageRating) as avg_rating,
+                AVG(numVotes) as avg_votes_per_episode
+            FROM episode_panel
+            GROUP BY series_tconst
+        )
+        SELECT
+            tb.tconst,
+            tb.primaryTitle,
+            tb.startYear,
+            tb.endYear,
+            tb.genres,
+            tb.genre_mask,
+            COALESCE(p.total_episodes, 0) as total_episodes,
+            p.total_seasons,
+            p.avg_rating,
+            p.avg_votes_per_episode,
+            LN(1 + p.avg_votes_per_episode) * p.avg_rating as rank_score,
+            l.listed_episodes,
+            l.listed_avg_rating
+        FROM title_basics tb
+        JOIN listed l ON tb.tconst = l.tconst
+        LEFT JOIN panel p ON tb.tconst = p.tconst
+        WHERE tb.titleType = 'tvSeries'
+        ORDER BY rank_score DESC NULLS LAST, tb.tconst
+    """)
+
+
+def record_dataset_version(con, **details):
+    """
+    Stamp the database with a new dataset version.
+    
+    The API keys its response cache on this value, so every rebuild
+    invalidates cached responses automatically.
+    """
+    built_at = datetime.now(timezone.utc)
+    version = built_at.strftime("%Y%m%dT%H%M%S%fZ")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS dataset_info (
+            key VARCHAR PRIMARY KEY,
+            value VARCHAR
+        )
+    """)
+    entries = {"dataset_version": version, "built_at": built_at.isoformat(), **details}
+    for key, value in entries.items():
+        con.execute("INSERT OR REPLACE INTO dataset_info VALUES (?, ?)", [key, str(value)])
+    return version
+
+
+def load_source_table(con, table, filepath):
+    """
+    Load one source table on its own cursor so tables can load concurrently.
+    
+    Returns (row count, seconds).
+    """
+    cursor = con.cursor()
+    try:
+        start = time.perf_counter()
+        cursor.execute(f"CREATE OR REPLACE TABLE {table} AS {source_query(table, filepath)}")
+        count = cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return count, time.perf_counter() - start
+    finally:
+        cursor.close()
+
+
+def load_tables(con, sources, workers=None):
+    """
+    Load every source table from scratch.
+    
+    A gzipped file is decompressed by a single thread, so the tables are loaded
+    side by side (one cursor each) to keep every core busy.
+    """
+    workers = max(1, min(workers or len(sources), len(sources)))
+    print(f"\n📥 Loading {len(sources)} tables ({workers} at a time)...")
+    for table, filepath in sources.items():
+        print(f"   • {table} <- {filepath.name}")
+    
+    start = time.perf_counter()
+    total_rows = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="imdb-load") as executor:
+        futures = {
+            executor.submit(load_source_table, con, table, filepath): table
+            for table, filepath in sources.items()
+        }
+        for future in as_completed(futures):
+            table = futures[future]
+            count, seconds = future.result()
+            total_rows += count
+            print(f"   ✅ Loaded {count:,} {SOURCE_TABLES[table]['label']} ({format_timing(seconds, count)})")
+    print(f"   ⏱️  Load stage: {format_timing(time.perf_counter() - start, total_rows)}")
+    
+    # Normalize genres for bitmask filtering and per-genre analysis
+    print("\n🏷️  Creating genre index...")
+    start = time.perf_counter()
+    genre_count = create_genre_index(con)
+    print(f"   ✅ Indexed {genre_count} genres ({format_timing(time.perf_counter() - start)})")
+    
+    # Create indexes for performance
+    print("\n🔍 Creating indexes...")
+    start = time.perf_counter()
+    con.execute("CREATE INDEX IF NOT EXISTS idx_basics_tconst ON title_basics(tconst)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_basics_type ON title_basics(titleType)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_ratings_tconst ON title_ratings(tconst)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_episode_tconst ON title_episode(tconst)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_episode_parent ON title_episode(parentTconst)")
+    print(f"   ✅ Indexes created ({format_timing(time.perf_counter() - start)})")
+
+
+def refresh_tables(con, sources):
+    """
+    Apply only the row-level differences between the TSVs and stored tables.
+    
+    Returns the names of the source tables that changed.
+    """
+    changed = []
+    for table, filepath in sources.items():
+        print(f"\n🔄 Diffing {filepath.name}...")
+        start = time.perf_counter()
+        counts = stage_changes(con, table, filepath)
+        print(f"   • {counts['insert']:,} inserts, {counts['update']:,} updates, {counts['delete']:,} deletes "
+              f"({format_timing(time.perf_counter() - start)})")
+        if any(counts.values()):
+            apply_changes(con, table)
+            changed.append(table)
+        else:
+            con.execute(f"DROP TABLE stage_{table}")
+    
+    if "title_basics" in changed:
+        print("\n🏷️  Refreshing genre index...")
+        refresh_genre_index(con, "changes_title_basics")
+        print("   ✅ Genre index refreshed")
+    
+    for table in SOURCE_TABLES:
+        con.execute(f"DROP TABLE IF EXISTS changes_{table}")
+    return changed
+
+
+def has_table(con, name):
+    """Whether a table or view exists in the main schema."""
+    return con.execute("""
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = 'main' AND table_name = ?
+    """, [name]).fetchone()[0] > 0
 
 
-def main():
+def main(argv=None):
+    args = parse_args(argv)
+    
     # Get the directory containing TSV files (current directory by default)
     imdb_dir = os.getenv("IMDB_DIR", ".")
     imdb_path = Path(imdb_dir).expanduser().resolve()
     
     print(f"📂 Loading IMDb data from: {imdb_path}")
     
-    # Check for required TSV files
-    required_files = [
-        "title.basics.tsv",
-        "title.ratings.tsv",
-        "title.episode.tsv"
-    ]
-    
-    for filename in required_files:
-        filepath = imdb_path / filename
-        if not filepath.exists():
-            print(f"❌ Missing required file: {filepath}")
+    # Check for required TSV files (plain or gzipped)
+    sources = {}
+    for table, spec in SOURCE_TABLES.items():
+        filepath = find_source_file(imdb_path, table)
+        if filepath is None:
+            print(f"❌ Missing required file: {imdb_path / spec['file']} (or {spec['file']}.gz)")
             print(f"   Please ensure all TSV files are in {imdb_path}")
             sys.exit(1)
+        sources[table] = filepath
     
     # Connect to DuckDB (creates file if it doesn't exist)
     db_path = "imdb.duckdb"
-    print(f"\n🦆 Creating DuckDB database: {db_path}")
-    con = duckdb.connect(db_path)
+    incremental = args.incremental and Path(db_path).exists()
+    if args.incremental and not incremental:
+        print(f"⚠️  {db_path} not found; running a full build instead of --incremental")
+    print(f"\n🦆 {'Refreshing' if incremental else 'Creating'} DuckDB database: {db_path}")
+    settings = DuckDBSettings(
+        "builder", db_path, memory_limit=args.memory_limit, threads=args.threads, temp_directory=args.temp_dir
+    )
+    print(f"   🧠 {settings.describe()}")
+    con = duckdb.connect(db_path, config=settings.config())
+    build_start = time.perf_counter()
     
     try:
-        # Load title.basics
-        print("\n📥 Loading title.basics.tsv...")
-        basics_path = imdb_path / "title.basics.tsv"
-        con.execute(f"""
-            CREATE OR REPLACE TABLE title_basics AS
-            SELECT
-                tconst,
-                titleType,
-                primaryTitle,
-                originalTitle,
-                TRY_CAST(isAdult AS INTEGER) as isAdult,
-                TRY_CAST(startYear AS INTEGER) as startYear,
-                TRY_CAST(endYear AS INTEGER) as endYear,
-                TRY_CAST(runtimeMinutes AS INTEGER) as runtimeMinutes,
-                genres
-            FROM read_csv_auto(
-                '{basics_path}',
-                delim='\t',
-                header=true,
-                nullstr='\\N',
-                quote='',
-                escape=''
-            )
-        """)
-        
-        count = con.execute("SELECT COUNT(*) FROM title_basics").fetchone()[0]
-        print(f"   ✅ Loaded {count:,} titles")
-        
-        # Load title.ratings
-        print("\n📥 Loading title.ratings.tsv...")
-        ratings_path = imdb_path / "title.ratings.tsv"
-        con.execute(f"""
-            CREATE OR REPLACE TABLE title_ratings AS
-            SELECT
-                tconst,
-                CAST(averageRating AS DOUBLE) as averageRating,
-                CAST(numVotes AS INTEGER) as numVotes
-            FROM read_csv_auto(
-                '{ratings_path}',
-                delim='\t',
-                header=true,
-                nullstr='\\N',
-                quote='',
-                escape=''
-            )
-        """)
+        if incremental:
+            missing = [name for name in list(SOURCE_TABLES) + ["title_genre", "genre_dim"] if not has_table(con, name)]
+            if missing:
+                raise RuntimeError(f"Cannot refresh incrementally, missing tables: {', '.join(missing)}")
+            changed = refresh_tables(con, sources)
+            if not changed:
+                print("\n✅ No changes in the source files; database left as is")
+                return
+        else:
+            load_workers = args.load_workers or max(1, min(len(SOURCE_TABLES), settings.memory_limit // LOAD_WORKER_MEMORY))
+            load_tables(con, sources, load_workers)
         
-        count = con.execute("SELECT COUNT(*) FROM title_ratings").fetchone()[0]
-        print(f"   ✅ Loaded {count:,} ratings")
-        
-        # Load title.episode
-        print("\n📥 Loading title.episode.tsv...")
-        episode_path = imdb_path / "title.episode.tsv"
-        con.execute(f"""
-            CREATE OR REPLACE TABLE title_episode AS
-            SELECT
-                tconst,
-                parentTconst,
-                TRY_CAST(seasonNumber AS INTEGER) as seasonNumber,
-                TRY_CAST(episodeNumber AS INTEGER) as episodeNumber
-            FROM read_csv_auto(
-                '{episode_path}',
-                delim='\t',
-                header=true,
-                nullstr='\\N',
-                quote='',
-                escape=''
-            )
-        """)
-        
-        count = con.execute("SELECT COUNT(*) FROM title_episode").fetchone()[0]
-        print(f"   ✅ Loaded {count:,} episodes")
-        
-        # Create indexes for performance
-        print("\n🔍 Creating indexes...")
-        con.execute("CREATE INDEX IF NOT EXISTS idx_basics_tconst ON title_basics(tconst)")
-        con.execute("CREATE INDEX IF NOT EXISTS idx_basics_type ON title_basics(titleType)")
-        con.execute("CREATE INDEX IF NOT EXISTS idx_ratings_tconst ON title_ratings(tconst)")
-        con.execute("CREATE INDEX IF NOT EXISTS idx_episode_tconst ON title_episode(tconst)")
-        con.execute("CREATE INDEX IF NOT EXISTS idx_episode_parent ON title_episode(parentTconst)")
-        print("   ✅ Indexes created")
-        
-        # Create episode_panel view for easy querying
-        print("\n🔗 Creating episode_panel view...")
-        con.execute("""
-            CREATE OR REPLACE VIEW episode_panel AS
-            SELECT
-                e.tconst as episode_tconst,
-                e.parentTconst as series_tconst,
-                e.seasonNumber,
-                e.episodeNumber,
-                eb.primaryTitle as episode_title,
-                sb.primaryTitle as series_title,
-                r.averageRating,
-                r.numVotes
-            FROM title_episode e
-            LEFT JOIN title_basics eb ON e.tconst = eb.tconst
-            LEFT JOIN title_basics sb ON e.parentTconst = sb.tconst
-            LEFT JOIN title_ratings r ON e.tconst = r.tconst
-            WHERE e.seasonNumber IS NOT NULL
-                AND e.episodeNumber IS NOT NULL
-                AND r.averageRating IS NOT NULL
-                AND r.numVotes IS NOT NULL
-        """)
+        # Derived tables depend on all three source tables
+        print(f"\n🔗 Creating episode_panel {args.episode_panel}...")
+        start = time.perf_counter()
+        create_episode_panel(con, args.episode_panel)
         
         count = con.execute("SELECT COUNT(*) FROM episode_panel").fetchone()[0]
-        print(f"   ✅ Episode panel created with {count:,} episodes")
+        print(f"   ✅ Episode panel created with {count:,} episodes ({format_timing(time.perf_counter() - start, count)})")
+        
+        # Precompute per-series rollup for browse/search endpoints
+        print("\n📈 Creating series_stats table...")
+        start = time.perf_counter()
+        create_series_stats(con)
+        count = con.execute("SELECT COUNT(*) FROM series_stats").fetchone()[0]
+        print(f"   ✅ Series stats created for {count:,} series ({format_timing(time.perf_counter() - start, count)})")
         
         # Show some stats
         print("\n📊 Database Statistics:")
@@ -169,7 +614,25 @@ def main():
         for title, count in top_series:
             print(f"      - {title}: {count} episodes")
         
-        print(f"\n✅ Database successfully created: {db_path}")
+        details = {"episode_panel": args.episode_panel}
+        if incremental:
+            details["refreshed_tables"] = ",".join(changed)
+        version = record_dataset_version(con, **details)
+        if incremental:
+            con.execute("CHECKPOINT")
+        print(f"\n🏷️  Dataset version: {version}")
+        
+        if args.parquet_dir:
+            print(f"\n📦 Exporting Parquet dataset to {args.parquet_dir}...")
+            start = time.perf_counter()
+            manifest = export_parquet(con, args.parquet_dir)
+            total_bytes = sum(info["bytes"] for info in manifest["tables"].values())
+            total_files = sum(info["files"] for info in manifest["tables"].values())
+            print(f"   ✅ Wrote {len(manifest['tables'])} tables, {total_files} files, "
+                  f"{total_bytes / (1024 * 1024):,.1f} MB ({format_timing(time.perf_counter() - start)})")
+        print(f"⏱️  Total build time: {format_timing(time.perf_counter() - build_start)}")
+        
+        print(f"\n✅ Database successfully {'refreshed' if incremental else 'created'}: {db_path}")
         print(f"   Ready to query! Try: python 02_chart_series.py \"<series name>\"")
         
     except Exception as e:
@@ -181,4 +644,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
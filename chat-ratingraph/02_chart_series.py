@@ -5,13 +5,23 @@ Generate Ratingraph-style episode rating charts for TV series.
 Usage:
     python 02_chart_series.py "Game of Thrones"
     python 02_chart_series.py "Breaking Bad"
+
+Batch mode (one query for all episodes, rendered on a process pool):
+    python 02_chart_series.py --batch-file series.txt   # names or tconsts, one per line
+    cat series.txt | python 02_chart_series.py --batch-file -
+    python 02_chart_series.py --top 2000 --workers 8
 """
 
+import os
 import sys
-import duckdb
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from series_graph import compute_series_graph, compute_series_graphs
+from series_chart import chart_filename, save_series_chart, init_render_worker, render_job
+from chart_cache import ChartCache, chart_key, publish_chart
+from parquet_store import open_database
 
 
 def resolve_series(con, series_name):
@@ -34,98 +44,43 @@ def resolve_series(con, series_name):
     return None
 
 
-def get_episodes(con, series_tconst):
-    """Get all episodes with ratings for a series."""
-    episodes = con.execute("""
-        SELECT
-            seasonNumber,
-            episodeNumber,
-            episode_title,
-            averageRating,
-            numVotes
-        FROM episode_panel
-        WHERE series_tconst = ?
-        ORDER BY seasonNumber, episodeNumber
-    """, [series_tconst]).fetchall()
-    
-    return [
-        {
-            'season': row[0],
-            'episode': row[1],
-            'title': row[2],
-            'rating': row[3],
-            'votes': row[4]
-        }
-        for row in episodes
-    ]
+def get_series_graph(con, series_tconst):
+    """Get episodes, season ranges and trendlines for a series (None if unrated)."""
+    return compute_series_graph(con, series_tconst)
 
 
-def plot_series_ratings(series_info, episodes, output_path):
-    """Create a Ratingraph-style chart."""
-    if not episodes:
+def plot_series_ratings(series_info, graph, output_path, cache=None):
+    """
+    Create a Ratingraph-style chart from compute_series_graph() output.
+    
+    With a ChartCache, an identical earlier render is reused instead of
+    drawing the chart again.
+    """
+    if not graph:
         print("❌ No episodes found with ratings")
         return
     
-    # Organize by season
-    seasons = {}
-    for ep in episodes:
-        season = ep['season']
-        if season not in seasons:
-            seasons[season] = []
-        seasons[season].append(ep)
-    
-    # Create figure
-    fig, ax = plt.subplots(figsize=(14, 7))
-    
-    # Color palette for seasons
-    colors = plt.cm.tab20.colors
-    
-    # Plot each season
-    x_offset = 0
-    legend_handles = []
-    
-    for season_num in sorted(seasons.keys()):
-        season_episodes = seasons[season_num]
-        color = colors[season_num % len(colors)]
-        
-        # Plot points
-        x_positions = [x_offset + i for i in range(len(season_episodes))]
-        ratings = [ep['rating'] for ep in season_episodes]
-        
-        ax.plot(x_positions, ratings, 'o-', color=color, 
-                linewidth=2, markersize=8, alpha=0.8)
-        
-        # Add season to legend
-        patch = mpatches.Patch(color=color, label=f'Season {season_num}')
-        legend_handles.append(patch)
-        
-        x_offset += len(season_episodes)
-    
-    # Styling
-    title = series_info['title']
-    year_range = f"{series_info['startYear']}"
-    if series_info['endYear']:
-        year_range += f"-{series_info['endYear']}"
-    
-    ax.set_title(f"{title} ({year_range}) - Episode Ratings", 
-                 fontsize=16, fontweight='bold', pad=20)
-    ax.set_xlabel('Episode (Sequential)', fontsize=12)
-    ax.set_ylabel('IMDb Rating', fontsize=12)
-    ax.set_ylim(0, 10)
-    ax.grid(True, alpha=0.3, linestyle='--')
-    ax.legend(handles=legend_handles, loc='best', ncol=3, fontsize=9)
-    
-    # Add average line
-    avg_rating = sum(ep['rating'] for ep in episodes) / len(episodes)
-    ax.axhline(y=avg_rating, color='red', linestyle='--', 
-               alpha=0.5, linewidth=1.5, label=f'Average: {avg_rating:.2f}')
-    
-    plt.tight_layout()
+    episodes = graph['episodes']
+    seasons = graph['seasons']
+    avg_rating = graph['average_rating']
     
     # Save chart
     output_path.parent.mkdir(exist_ok=True)
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
-    print(f"✅ Chart saved: {output_path}")
+    if cache is None:
+        save_series_chart(series_info, graph, output_path)
+        print(f"✅ Chart saved: {output_path}")
+    else:
+        key = chart_key(series_info, graph)
+        stored = cache.lookup(key)
+        if stored is None:
+            stored = cache.path_for(key)
+            save_series_chart(series_info, graph, stored)
+            cache.record(key, series_info)
+            cache.save()
+            print(f"✅ Chart saved: {output_path}")
+        else:
+            print(f"♻️  Chart unchanged, reusing cached render: {output_path}")
+        publish_chart(stored, output_path)
     
     # Show stats
     print(f"\n📊 Statistics:")
@@ -142,27 +97,226 @@ def plot_series_ratings(series_info, episodes, output_path):
           f"\"{worst_ep['title']}\" ({worst_ep['rating']}/10)")
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python 02_chart_series.py \"<series name>\"")
+def read_batch_entries(path):
+    """Series names or tconsts from a file ('-' for stdin), one per line; '#' starts a comment."""
+    f = sys.stdin if path == "-" else open(path)
+    try:
+        entries = [line.strip() for line in f]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return [entry for entry in entries if entry and not entry.startswith("#")]
+
+
+def resolve_batch(con, entries):
+    """
+    Resolve names and tconsts to series with one query.
+    
+    A name shared by several series resolves to the most-voted one.
+    Returns (series_info list in input order without duplicates, unresolved entries).
+    """
+    tconsts = [entry for entry in entries if entry.startswith("tt") and entry[2:].isdigit()]
+    names = [entry.lower() for entry in entries if entry not in tconsts]
+    rows = con.execute("""
+        SELECT tb.tconst, tb.primaryTitle, tb.startYear, tb.endYear
+        FROM title_basics tb
+        LEFT JOIN title_ratings r ON tb.tconst = r.tconst
+        WHERE tb.titleType = 'tvSeries'
+            AND (tb.tconst IN (SELECT UNNEST(?::VARCHAR[]))
+                 OR LOWER(tb.primaryTitle) IN (SELECT UNNEST(?::VARCHAR[])))
+        ORDER BY r.numVotes DESC NULLS LAST, tb.tconst
+    """, [tconsts, names]).fetchall()
+    
+    by_key = {}
+    for tconst, title, start_year, end_year in rows:
+        info = {'tconst': tconst, 'title': title, 'startYear': start_year, 'endYear': end_year}
+        by_key[tconst] = info
+        by_key.setdefault(title.lower(), info)
+    
+    resolved, unresolved, seen = [], [], set()
+    for entry in entries:
+        info = by_key.get(entry) or by_key.get(entry.lower())
+        if info is None:
+            unresolved.append(entry)
+        elif info['tconst'] not in seen:
+            seen.add(info['tconst'])
+            resolved.append(info)
+    return resolved, unresolved
+
+
+def top_series(con, limit):
+    """The most-voted series that have rated episodes."""
+    rows = con.execute("""
+        SELECT s.tconst, s.primaryTitle, s.startYear, s.endYear
+        FROM series_stats s
+        JOIN title_ratings r ON s.tconst = r.tconst
+        WHERE s.total_episodes > 0
+        ORDER BY r.numVotes DESC, s.tconst
+        LIMIT ?
+    """, [limit]).fetchall()
+    return [
+        {'tconst': row[0], 'title': row[1], 'startYear': row[2], 'endYear': row[3]}
+        for row in rows
+    ]
+
+
+def render_batch(con, series_list, output_dir, workers, cache=None):
+    """
+    Fetch every series' graph in one query and render the charts on a process pool.
+    
+    With a ChartCache only charts whose content hash is not stored yet are
+    rendered; the rest are linked from the cache.
+    """
+    start = time.perf_counter()
+    graphs = compute_series_graphs(con, [info['tconst'] for info in series_list])
+    fetch_seconds = time.perf_counter() - start
+    episode_count = sum(len(graph['episodes']) for graph in graphs.values())
+    print(f"📺 Loaded {episode_count:,} episodes for {len(graphs):,} series in {fetch_seconds:.2f}s")
+    
+    skipped = [info['title'] for info in series_list if info['tconst'] not in graphs]
+    if skipped:
+        print(f"⚠️  Skipping {len(skipped)} series without rated episodes")
+    
+    # Series sharing a title would overwrite each other's chart
+    output_dir.mkdir(exist_ok=True)
+    jobs, published, used_names = [], [], set()
+    rendering = {}
+    for info in series_list:
+        graph = graphs.get(info['tconst'])
+        if graph is None:
+            continue
+        filename = chart_filename(info)
+        if filename in used_names:
+            filename = filename.replace(".png", f"_{info['tconst']}.png")
+        used_names.add(filename)
+        output_path = output_dir / filename
+        if cache is None:
+            jobs.append((info, graph, output_path))
+            continue
+        key = chart_key(info, graph)
+        stored = cache.lookup(key)
+        if stored is None and key not in rendering:
+            rendering[key] = info
+            jobs.append((info, graph, cache.path_for(key)))
+        published.append((cache.path_for(key), output_path))
+    if cache is not None:
+        print(f"♻️  {cache.hits:,} charts unchanged since their last render")
+    
+    workers = max(1, min(workers, len(jobs)))
+    print(f"🎨 Rendering {len(jobs):,} charts with {workers} worker{'s' if workers > 1 else ''}...")
+    start = time.perf_counter()
+    if workers == 1:
+        init_render_worker()
+        results = list(map(render_job, jobs))
+    else:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker) as executor:
+            results = list(executor.map(render_job, jobs, chunksize=chunksize))
+    render_seconds = time.perf_counter() - start
+    
+    failures = [(path, error) for path, error in results if error]
+    for path, error in failures:
+        print(f"❌ {path.name}: {error}")
+    rendered = len(results) - len(failures)
+    
+    if cache is not None:
+        for key, info in rendering.items():
+            if cache.path_for(key).exists():
+                cache.record(key, info)
+        cache.save()
+        for stored, output_path in published:
+            if stored.exists():
+                publish_chart(stored, output_path)
+    
+    total_seconds = fetch_seconds + render_seconds
+    print(f"\n📊 Batch summary:")
+    print(f"   • Charts rendered: {rendered:,} ({len(failures)} failed, {len(skipped)} skipped)")
+    if cache is not None:
+        print(f"   • Reused from cache: {cache.hits:,}")
+    print(f"   • Query: {fetch_seconds:.2f}s, render: {render_seconds:.2f}s")
+    if total_seconds > 0:
+        print(f"   • Throughput: {rendered / total_seconds:,.1f} charts/sec")
+    return rendered + (cache.hits if cache is not None else 0)
+
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Generate episode rating charts for TV series.")
+    parser.add_argument("series", nargs="?", help="Series name (single chart mode)")
+    parser.add_argument("--batch-file", help="File with series names or tconsts, one per line ('-' for stdin)")
+    parser.add_argument("--top", type=int, help="Render the N most-voted series")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Render processes in batch mode (default: CPU count)"
+    )
+    parser.add_argument("--output-dir", default="charts", help="Chart directory (default: charts)")
+    parser.add_argument(
+        "--cache-dir",
+        help="Content-addressed chart store (default: <output-dir>/.cache)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-render, bypassing the chart cache"
+    )
+    args = parser.parse_args(argv)
+    if not args.series and not args.batch_file and not args.top:
+        parser.print_usage()
         print("\nExamples:")
         print("  python 02_chart_series.py \"Game of Thrones\"")
         print("  python 02_chart_series.py \"Breaking Bad\"")
+        print("  python 02_chart_series.py --top 500")
         sys.exit(1)
+    return args
+
+
+def open_chart_cache(args):
+    if args.no_cache:
+        return None
+    return ChartCache(args.cache_dir or Path(args.output_dir) / ".cache")
+
+
+def main_batch(con, args):
+    entries = []
+    if args.series:
+        entries.append(args.series)
+    if args.batch_file:
+        entries.extend(read_batch_entries(args.batch_file))
     
-    series_name = sys.argv[1]
-    db_path = "imdb.duckdb"
+    series_list, unresolved = resolve_batch(con, entries) if entries else ([], [])
+    for entry in unresolved:
+        print(f"⚠️  Series not found: {entry}")
+    if args.top:
+        seen = {info['tconst'] for info in series_list}
+        series_list.extend(info for info in top_series(con, args.top) if info['tconst'] not in seen)
+    
+    print(f"🔍 Resolved {len(series_list):,} series")
+    rendered = render_batch(con, series_list, Path(args.output_dir), args.workers, open_chart_cache(args))
+    if not rendered:
+        sys.exit(1)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    db_path = os.getenv("DB_PATH", "imdb.duckdb")
     
     if not Path(db_path).exists():
         print(f"❌ Database not found: {db_path}")
         print("   Run: python 01_build_imdb_duckdb.py")
         sys.exit(1)
     
-    print(f"🔍 Searching for: {series_name}")
-    
-    con = duckdb.connect(db_path, read_only=True)
+    con = open_database(db_path)
     
     try:
+        if args.batch_file or args.top:
+            main_batch(con, args)
+            return
+        
+        series_name = args.series
+        print(f"🔍 Searching for: {series_name}")
+        
         # Resolve series
         series_info = resolve_series(con, series_name)
         if not series_info:
@@ -177,16 +331,15 @@ def main():
         
         # Get episodes
         print(f"📺 Loading episodes...")
-        episodes = get_episodes(con, series_info['tconst'])
+        graph = get_series_graph(con, series_info['tconst'])
         
-        if not episodes:
+        if not graph:
             print(f"❌ No rated episodes found for {series_info['title']}")
             sys.exit(1)
         
         # Generate chart
-        safe_name = series_info['title'].replace('/', '_').replace(' ', '_')
-        output_path = Path('charts') / f"series_ratings_{safe_name}.png"
-        plot_series_ratings(series_info, episodes, output_path)
+        output_path = Path(args.output_dir) / chart_filename(series_info)
+        plot_series_ratings(series_info, graph, output_path, open_chart_cache(args))
         
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -197,4 +350,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
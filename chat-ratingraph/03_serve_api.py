@@ -7,16 +7,51 @@ Endpoints:
     - GET /resolve_series?name={name} - Find series by name
     - GET /episodes?series={name} - Get all episodes for a series
     - GET /top_episodes?series={name}&min_votes={n}&limit={k} - Ranked episodes
+
+/episodes and /series_episode_graph can stream NDJSON instead (see streamable).
 """
 
+import io
 import os
+import json
+import base64
+import asyncio
+import contextvars
 import math
+import time
+import hashlib
+import inspect
+import functools
+import collections
+from concurrent.futures import ThreadPoolExecutor
 import duckdb
 from pathlib import Path
-from typing import Optional
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import JSONResponse
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, ConfigDict, ValidationError, create_model
+from title_resolver import TitleResolver, TitleMatch
+from query_pool import QueryPool, QueryPoolFull
+from response_cache import ResponseCache
+from series_graph import compute_series_graph, fetch_graph_columns, graph_episode, graph_rows, graph_stats
+from series_chart import save_series_chart
+from parquet_store import open_database
+from db_manifest import prepare_database
+from duckdb_settings import (
+    DEFAULT_ENDPOINT_MEMORY, DuckDBSettings, MemoryBudget, parse_endpoint_memory, read_effective_settings
+)
+from warmup import (
+    DEFAULT_WARMUP_QUERIES, DEFAULT_WARMUP_TABLES, Warmup,
+    parse_warmup_queries, parse_warmup_steps, touch_tables
+)
+from table_formats import ARROW_AVAILABLE, ARROW_MEDIA_TYPE, FORMAT_HELP, FORMATS, fetch_columns
+from metrics import (
+    MetricsRegistry, MetricsMiddleware, TimedConnection,
+    active_db_timer, add_query_listener, add_time, current_timing, process_uptime, timed_call
+)
+from slow_query_log import SlowQueryLog
 
 
 app = FastAPI(
@@ -39,36 +74,595 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Database connection (persistent)
+# Per-route request counts, latency histograms and DB/handler/serialization split
+metrics_registry = MetricsRegistry()
+
+
+@functools.cache
+def route_paths():
+    return frozenset(route.path for route in app.routes)
+
+
+app.add_middleware(MetricsMiddleware, registry=metrics_registry, route_paths=route_paths)
+
+# Statements over SLOW_QUERY_MS, with sampled EXPLAIN ANALYZE profiles
+slow_query_log = SlowQueryLog()
+add_query_listener(slow_query_log.observe)
+
+# Database connection (persistent): a .duckdb file, or a Parquet export
+# directory written by `01_build_imdb_duckdb.py --parquet-dir`
 DB_PATH = os.getenv("DB_PATH", "imdb.duckdb")
 con = None
 
+# Database bundled in the image. When set, DB_PATH is its copy on the volume,
+# opened only once a verified copy is there (see db_manifest.prepare_database)
+DB_IMAGE_PATH = os.getenv("DB_IMAGE_PATH", "")
+volume_copy = None
+
+# Worker threads executing handler queries (created on startup)
+query_pool = None
+
+# matplotlib keeps global state (font cache, text layout), so charts render one at a
+# time, on this thread rather than a query worker (created on startup)
+chart_executor = None
+
+# DuckDB memory_limit, threads and spill directory from the machine's limits,
+# and per-endpoint memory caps reserved against memory_limit (see duckdb_settings)
+db_settings = DuckDBSettings("server")
+memory_budget = MemoryBudget(
+    db_settings.memory_limit,
+    parse_endpoint_memory(os.getenv("DUCKDB_ENDPOINT_MEMORY", DEFAULT_ENDPOINT_MEMORY), db_settings.memory_limit)
+)
+MEMORY_WAIT_TIMEOUT = float(os.getenv("DUCKDB_MEMORY_WAIT", "30"))
+
 
 def get_connection():
-    """Get or create database connection."""
+    """
+    Get the database connection for the calling thread.
+    
+    Query pool workers get their own cursor on the shared read-only
+    connection; any other caller gets the shared connection itself.
+    Inside an offloaded handler the connection is wrapped so DuckDB time
+    is reported to /metrics.
+    """
     global con
     if con is None:
         if not Path(DB_PATH).exists():
             raise RuntimeError(f"Database not found: {DB_PATH}. Run: python 01_build_imdb_duckdb.py")
-        con = duckdb.connect(DB_PATH, read_only=True)
-    return con
+        con = open_database(DB_PATH, db_settings.config())
+    connection = con
+    if query_pool is not None and query_pool.is_worker_thread():
+        connection = query_pool.cursor()
+    timer = active_db_timer()
+    if timer is not None:
+        return TimedConnection(connection, timer)
+    return connection
+
+
+def offload(handler):
+    """
+    Run a blocking handler on the query pool instead of the event loop.
+    
+    The wrapper keeps the handler's signature, so FastAPI still sees its
+    Query parameters. Queueing, DB and handler time are recorded for /metrics.
+    """
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        timing = current_timing()
+        submitted = time.perf_counter()
+        try:
+            async with memory_budget.reserve(handler_endpoints().get(handler.__name__), MEMORY_WAIT_TIMEOUT):
+                if query_pool is None:
+                    return timed_call(handler, timing, submitted, args, kwargs)
+                return await query_pool.run(timed_call, handler, timing, submitted, args, kwargs)
+        except QueryPoolFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except TimeoutError:
+            raise HTTPException(
+                status_code=503,
+                detail=f"No memory available for {handler.__name__} within {MEMORY_WAIT_TIMEOUT:g}s"
+            )
+    return wrapper
+
+
+def offload_unpooled(handler):
+    """
+    Run a blocking handler on its own thread outside the query pool.
+    
+    For probes that must answer while slow queries hold every pool
+    worker; the handler has to use its own cursor rather than the shared
+    connection. Handler and DB time are still recorded for /metrics.
+    """
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(timed_call, handler, current_timing(), time.perf_counter(), args, kwargs)
+    return wrapper
+
+
+@functools.cache
+def handler_endpoints():
+    """Handler function name -> endpoint name (route path without the leading slash)."""
+    return {
+        inspect.unwrap(route.endpoint).__name__: route.path.lstrip("/")
+        for route in app.routes if hasattr(route, "endpoint")
+    }
+
+
+def read_dataset_version(con):
+    """
+    Get the dataset version stamped into the database at build time.
+    
+    Databases built before versioning fall back to the file's size and mtime.
+    """
+    try:
+        row = con.execute("SELECT value FROM dataset_info WHERE key = 'dataset_version'").fetchone()
+        if row:
+            return row[0]
+    except duckdb.CatalogException:
+        pass
+    stat = Path(DB_PATH).stat()
+    return f"file-{stat.st_size}-{stat.st_mtime_ns}"
+
+
+# Encoded responses of read endpoints, keyed by dataset version + parameters
+response_cache = ResponseCache()
+
+# Rendered chart images, keyed the same way but sized separately
+chart_cache = ResponseCache(max_bytes=int(float(os.getenv("CHART_CACHE_MB", "64")) * 1024 * 1024))
+CHART_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+CHART_MAX_AGE = int(os.getenv("CHART_MAX_AGE", "3600"))
+
+
+# Same settings as JSONResponse; one shared instance saves json.dumps() building one per call
+json_encoder = json.JSONEncoder(
+    ensure_ascii=False,
+    allow_nan=False,
+    indent=None,
+    separators=(",", ":"),
+    default=jsonable_encoder
+)
+
+
+def encode_json(content):
+    """Encode a response body the same way JSONResponse does."""
+    return json_encoder.encode(content).encode("utf-8")
+
+
+def cached(endpoint, resolves_titles=False):
+    """
+    Serve an endpoint from the response cache.
+    
+    Hits return the stored JSON bytes directly; errors are never cached.
+    Endpoints that resolve titles by name bypass the cache until
+    titles_settled(), so answers from the SQL fallback used during
+    warm-up are never served once the resolver is in place.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            use_cache = response_cache.enabled and (not resolves_titles or titles_settled())
+            key = response_cache.key(endpoint, kwargs) if use_cache else None
+            body = response_cache.get(key) if key is not None else None
+            if body is None:
+                result = await handler(*args, **kwargs)
+                if isinstance(result, Response):
+                    return result
+                start = time.perf_counter()
+                body = encode_json(result)
+                add_time("serialize", time.perf_counter() - start)
+                if key is not None:
+                    response_cache.put(key, body)
+            return Response(content=body, media_type="application/json")
+        return wrapper
+    return decorator
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "1000"))
+
+# Options added to streamable endpoints; they are not part of the cached/batched parameters
+STREAM_PARAMS = ("request", "stream")
+
+
+def streamable(stream_handler):
+    """
+    Let clients opt into an NDJSON stream instead of one JSON body.
+    
+    `Accept: application/x-ndjson` or `stream=true` calls the async
+    stream_handler with the endpoint's parameters; it returns a
+    StreamingResponse and bypasses the response cache. Anything else,
+    including POST /batch operations, gets the regular endpoint.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request: Request = None, stream: bool = False, **kwargs):
+            if request is not None and (stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")):
+                return await stream_handler(**kwargs)
+            return await handler(**kwargs)
+        parameters = inspect.signature(handler).parameters.values()
+        wrapper.__signature__ = inspect.Signature([
+            inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            *(parameter.replace(kind=inspect.Parameter.KEYWORD_ONLY) for parameter in parameters),
+            inspect.Parameter(
+                "stream", inspect.Parameter.KEYWORD_ONLY, annotation=bool,
+                default=Query(False, description=f"Stream {NDJSON_MEDIA_TYPE} (same as the Accept header)")
+            )
+        ])
+        return wrapper
+    return decorator
+
+
+def open_stream(sql, params):
+    """
+    Execute a streamed query on its own cursor and fetch the first chunk.
+    
+    The result outlives this call, so it cannot stay on the worker's
+    cursor; fetch_stream_chunk() reads the rest from any worker.
+    """
+    cursor = get_connection().cursor()
+    timer = active_db_timer()
+    timed = TimedConnection(cursor, timer) if timer is not None else cursor
+    rows = timed.execute(sql, params).fetchmany(STREAM_CHUNK_ROWS)
+    if len(rows) < STREAM_CHUNK_ROWS:
+        cursor.close()
+    return cursor, rows
+
+
+@offload
+def fetch_stream_chunk(cursor):
+    """Next chunk of an open_stream() result; closes the cursor once exhausted."""
+    timer = active_db_timer()
+    timed = TimedConnection(cursor, timer) if timer is not None else cursor
+    rows = timed.fetchmany(STREAM_CHUNK_ROWS)
+    if len(rows) < STREAM_CHUNK_ROWS:
+        cursor.close()
+    return rows
+
+
+def ndjson_response(header, cursor, rows, shape_rows, trailer):
+    """
+    Stream an open_stream() result as NDJSON.
+    
+    Lines are the header, the objects shape_rows(rows) returns for each
+    chunk, then {"type": "end", **trailer()}. Only one chunk of rows is in
+    memory at a time. The status is sent before the first chunk, so a
+    later failure ends the stream with {"type": "error", "detail": ...}.
+    An abandoned stream's cursor is closed when it is garbage collected.
+    With cursor=None, rows is the whole, already fetched result and is
+    encoded in chunks of STREAM_CHUNK_ROWS.
+    """
+    async def lines():
+        nonlocal rows
+        yield encode_json(header) + b"\n"
+        try:
+            offset = 0
+            while rows:
+                chunk_rows = rows if cursor is not None else rows[offset:offset + STREAM_CHUNK_ROWS]
+                if not chunk_rows:
+                    break
+                start = time.perf_counter()
+                chunk = "".join(json_encoder.encode(item) + "\n" for item in shape_rows(chunk_rows)).encode("utf-8")
+                add_time("serialize", time.perf_counter() - start)
+                yield chunk
+                if cursor is None:
+                    offset += STREAM_CHUNK_ROWS
+                    continue
+                if len(rows) < STREAM_CHUNK_ROWS:
+                    break
+                rows = await fetch_stream_chunk(cursor)
+            end = {"type": "end", **trailer()}
+        except HTTPException as e:
+            end = {"type": "error", "detail": e.detail}
+        except Exception as e:
+            end = {"type": "error", "detail": str(e)}
+        yield encode_json(end) + b"\n"
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def check_table_format(format):
+    """Validate the format parameter of a list endpoint (see table_formats)."""
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'json', 'columns' or 'arrow'")
+    if format == "arrow" and not ARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="format=arrow requires pyarrow on the server")
+
+
+def table_response(table, envelope, key):
+    """
+    Columnar response: the envelope with the table's columns under key.
+    
+    For arrow the envelope goes into the stream's schema metadata instead.
+    """
+    if table.format == "arrow":
+        return Response(content=table.to_arrow_ipc(encode_json(envelope)), media_type=ARROW_MEDIA_TYPE)
+    return {**envelope, key: table.data}
+
+
+# Genre name (lowercase) -> bit position in genre_mask (loaded at startup)
+genre_bits = {}
+
+GENRE_FILTER_HELP = "Filter by genre; 'Crime,Drama' requires all listed genres, 'Comedy|Drama' any of them"
+
+
+def load_genre_bits(con):
+    """Load the genre -> bit mapping written by the database builder."""
+    rows = con.execute("SELECT genre, bit FROM genre_dim").fetchall()
+    genre_bits.clear()
+    genre_bits.update({genre.lower(): bit for genre, bit in rows})
+    return genre_bits
+
+
+def genre_condition(column, genre):
+    """
+    Build a bitmask predicate and its params for a genre filter.
+    
+    Commas require every listed genre, pipes accept any alternative, e.g.
+    'Crime,Drama|Comedy' matches (Crime AND Drama) OR Comedy. Genre names
+    match exactly (case-insensitive); unknown genres match nothing.
+    """
+    masks = []
+    for group in genre.split("|"):
+        names = {name.strip().lower() for name in group.split(",") if name.strip()}
+        if not names or not names <= genre_bits.keys():
+            continue
+        masks.append(sum(1 << genre_bits[name] for name in names))
+    
+    if not masks:
+        return "FALSE", []
+    
+    clause = " OR ".join(f"({column} & ?) = ?" for _ in masks)
+    return f"({clause})", [value for mask in masks for value in (mask, mask)]
+
+
+# Shared name -> tconst resolver (loaded at startup)
+resolver = TitleResolver()
+
+# Titles resolved up front for the current POST /batch: {(title_type, name): match}
+batch_resolutions = contextvars.ContextVar("batch_resolutions", default=None)
+
+
+def resolve_titles(con, title_type, names):
+    """
+    Resolve several titles of the given type by name.
+    
+    Uses the in-memory resolver (normalized names, most-voted title wins).
+    Names it does not index, or all names while it is still loading, fall
+    back to one exact case-insensitive match query for all of them, which
+    also prefers the most-voted title. Returns one TitleMatch or None per input name.
+    Inside a batch, names the batch already resolved are answered from its
+    shared results.
+    """
+    shared = batch_resolutions.get()
+    if shared is not None and all((title_type, name) in shared for name in names):
+        return [shared[(title_type, name)] for name in names]
+    
+    matches = [resolver.resolve(title_type, name) for name in names]
+    missing = sorted({name.lower() for name, match in zip(names, matches) if match is None and name})
+    if not missing:
+        return matches
+    
+    placeholders = ", ".join("?" for _ in missing)
+    rows = con.execute(f"""
+        SELECT LOWER(tb.primaryTitle) as name_key, tb.tconst, tb.primaryTitle, tb.startYear, tb.endYear, tb.genres,
+            tr.numVotes
+        FROM title_basics tb
+        LEFT JOIN title_ratings tr ON tb.tconst = tr.tconst
+        WHERE tb.titleType = ?
+            AND LOWER(tb.primaryTitle) IN ({placeholders})
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY LOWER(tb.primaryTitle) ORDER BY tr.numVotes DESC NULLS LAST, tb.tconst
+        ) = 1
+    """, [title_type] + missing).fetchall()
+    found = {row[0]: TitleMatch(*row[1:]) for row in rows}
+    
+    return [
+        match if match is not None else found.get(name.lower())
+        for name, match in zip(names, matches)
+    ]
+
+
+def resolve_title(con, title_type, name):
+    """Resolve a single title of the given type by name (see resolve_titles)."""
+    return resolve_titles(con, title_type, [name])[0]
+
+
+def fetch_series_summaries(con, tconsts):
+    """
+    Episode statistics plus best and worst episode for several series.
+    
+    One windowed pass over episode_panel replaces the per-series stats,
+    best-episode and worst-episode queries. Returns {tconst: row} with
+    columns: total_episodes, avg_rating, max_rating, min_rating,
+    total_seasons, total_votes, then title/season/episode/rating/votes of
+    the best and of the worst episode. Series without rated episodes are
+    absent from the result.
+    """
+    if not tconsts:
+        return {}
+    placeholders = ", ".join("?" for _ in tconsts)
+    rows = con.execute(f"""
+        WITH ranked AS (
+            SELECT
+                series_tconst,
+                episode_title,
+                seasonNumber,
+                episodeNumber,
+                averageRating,
+                numVotes,
+                ROW_NUMBER() OVER (
+                    PARTITION BY series_tconst
+                    ORDER BY averageRating DESC, numVotes DESC, seasonNumber, episodeNumber
+                ) as best_rank,
+                ROW_NUMBER() OVER (
+                    PARTITION BY series_tconst
+                    ORDER BY averageRating ASC, numVotes DESC, seasonNumber, episodeNumber
+                ) as worst_rank
+            FROM episode_panel
+            WHERE series_tconst IN ({placeholders})
+        )
+        SELECT
+            series_tconst,
+            COUNT(*) as total_episodes,
+            AVG(averageRating) as avg_rating,
+            MAX(averageRating) as max_rating,
+            MIN(averageRating) as min_rating,
+            MAX(seasonNumber) as total_seasons,
+            SUM(numVotes) as total_votes,
+            ANY_VALUE(episode_title) FILTER (WHERE best_rank = 1),
+            ANY_VALUE(seasonNumber) FILTER (WHERE best_rank = 1),
+            ANY_VALUE(episodeNumber) FILTER (WHERE best_rank = 1),
+            ANY_VALUE(averageRating) FILTER (WHERE best_rank = 1),
+            ANY_VALUE(numVotes) FILTER (WHERE best_rank = 1),
+            ANY_VALUE(episode_title) FILTER (WHERE worst_rank = 1),
+            ANY_VALUE(seasonNumber) FILTER (WHERE worst_rank = 1),
+            ANY_VALUE(episodeNumber) FILTER (WHERE worst_rank = 1),
+            ANY_VALUE(averageRating) FILTER (WHERE worst_rank = 1),
+            ANY_VALUE(numVotes) FILTER (WHERE worst_rank = 1)
+        FROM ranked
+        GROUP BY series_tconst
+    """, list(tconsts)).fetchall()
+    return {row[0]: row[1:] for row in rows}
+
+
+def fetch_title_ratings(con, tconsts):
+    """Rating and vote count for several titles: {tconst: (averageRating, numVotes)}."""
+    if not tconsts:
+        return {}
+    placeholders = ", ".join("?" for _ in tconsts)
+    rows = con.execute(f"""
+        SELECT tconst, averageRating, numVotes
+        FROM title_ratings
+        WHERE tconst IN ({placeholders})
+    """, list(tconsts)).fetchall()
+    return {row[0]: row[1:] for row in rows}
+
+
+def log_volume_copy(copy):
+    if copy.error:
+        print(f"⚠️  Copying {copy.source} to {copy.target} failed after {copy.seconds:.1f}s: {copy.error}")
+    else:
+        print(f"✅ Copied {copy.copied_bytes / (1024 * 1024):,.0f} MB to {copy.target} in {copy.seconds:.1f}s "
+              "(opened directly from the next start)")
+
+
+def log_first_request(route, seconds):
+    print(f"⏱️  First request ({route}) answered {seconds:.2f}s after process start")
+
+
+metrics_registry.add_first_request_listener(log_first_request)
+
+
+# Background warm-up after startup; /readyz reports ready once it finishes
+warmup = Warmup(parse_warmup_steps(os.getenv("WARMUP", "tables,queries")))
+WARMUP_TABLES = [table.strip() for table in os.getenv("WARMUP_TABLES", DEFAULT_WARMUP_TABLES).split(",") if table.strip()]
+WARMUP_QUERIES = parse_warmup_queries(os.getenv("WARMUP_QUERIES", DEFAULT_WARMUP_QUERIES))
+WARMUP_SERIES = int(os.getenv("WARMUP_SERIES", "5"))
+warmup_task = None
+
+
+async def warm_resolver():
+    # Handlers still work through the SQL fallback in resolve_title() until (or unless) this succeeds
+    await asyncio.to_thread(resolver.load, get_connection())
+    print(f"✅ Resolver loaded {len(resolver):,} titles in {resolver.load_seconds:.1f}s")
+    return {"titles": len(resolver)}
+
+
+def titles_settled():
+    """
+    Whether title lookups give their final answers: the resolver has
+    loaded, or its warm-up step failed and the SQL fallback is all there is.
+    """
+    return resolver.loaded or "resolver" in warmup.results
+
+
+async def warm_tables():
+    rows = await asyncio.to_thread(touch_tables, get_connection(), WARMUP_TABLES)
+    return {"tables": len(WARMUP_TABLES), "rows": rows}
+
+
+@offload
+def top_series_names(limit):
+    con = get_connection()
+    rows = con.execute("""
+        SELECT primaryTitle
+        FROM series_stats
+        ORDER BY rank_score DESC NULLS LAST, tconst
+        LIMIT ?
+    """, [limit]).fetchall()
+    return [row[0] for row in rows]
+
+
+async def warm_queries():
+    """Run the warm-up requests one at a time, leaving workers free for real traffic."""
+    operations = list(WARMUP_QUERIES)
+    if WARMUP_SERIES > 0:
+        for name in await top_series_names(WARMUP_SERIES):
+            operations += [("episodes", {"series": name}), ("series_episode_graph", {"series": name})]
+    failed = 0
+    for endpoint, params in operations:
+        try:
+            if endpoint not in BATCH_ENDPOINTS:
+                raise HTTPException(status_code=404, detail=f"Unknown endpoint {endpoint}")
+            await BATCH_ENDPOINTS[endpoint](**batch_params_model(endpoint)(**params).model_dump())
+        except (HTTPException, ValidationError) as e:
+            failed += 1
+            print(f"⚠️  Warm-up request /{endpoint} failed: {getattr(e, 'detail', e)}")
+    return {"requests": len(operations), "failed": failed}
+
+
+async def run_warmup():
+    await warmup.run({"resolver": warm_resolver, "tables": warm_tables, "queries": warm_queries})
+    for step, error in warmup.errors().items():
+        print(f"⚠️  Warm-up step {step} failed: {error}")
+    summary = ", ".join(f"{step} {result['seconds']:.1f}s" for step, result in warmup.results.items())
+    print(f"🔥 Warm-up finished in {warmup.seconds:.1f}s ({summary}); "
+          f"ready {process_uptime():.2f}s after process start")
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database connection on startup."""
+    """Open the database and query pool, then start the warm-up in the background."""
+    global query_pool, chart_executor, DB_PATH, volume_copy, warmup_task
     try:
-        get_connection()
-        print(f"✅ Connected to {DB_PATH}")
+        if DB_IMAGE_PATH and not Path(DB_PATH).is_dir():
+            DB_PATH, reason, volume_copy = prepare_database(DB_IMAGE_PATH, DB_PATH, on_copied=log_volume_copy)
+            print(f"📦 Opening {DB_PATH}: {reason}")
+        query_pool = QueryPool(get_connection())
+        chart_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-render")
+        if slow_query_log.enabled:
+            slow_query_log.start_profiler(get_connection())
+        print(f"✅ Connected to {DB_PATH} ({query_pool.size} query workers, queue depth {query_pool.queue_depth})")
+        response_cache.set_dataset_version(read_dataset_version(get_connection()))
+        chart_cache.set_dataset_version(response_cache.dataset_version)
+        load_genre_bits(get_connection())
+        print(f"✅ Dataset version {response_cache.dataset_version} "
+              f"(response cache {response_cache.max_bytes // (1024 * 1024)} MB)")
     except Exception as e:
         print(f"❌ Failed to connect to database: {e}")
         raise
+    print(f"🧠 DuckDB {db_settings.describe()}")
+    unknown = set(memory_budget.caps) - set(handler_endpoints().values())
+    if unknown:
+        print(f"⚠️  DUCKDB_ENDPOINT_MEMORY names unknown endpoints: {', '.join(sorted(unknown))}")
+    
+    warmup_task = asyncio.create_task(run_warmup())
+    print(f"🚀 Startup complete {process_uptime():.2f}s after process start "
+          f"(warming up: {', '.join(warmup.steps)})")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Close database connection on shutdown."""
-    global con
+    """Close query pool and database connection on shutdown."""
+    global con, query_pool, chart_executor
+    if warmup_task:
+        warmup_task.cancel()
+    slow_query_log.stop_profiler()
+    if chart_executor:
+        chart_executor.shutdown(wait=True, cancel_futures=True)
+        chart_executor = None
+    if query_pool:
+        query_pool.close()
+        query_pool = None
     if con:
         con.close()
         print("🔌 Database connection closed")
@@ -105,35 +699,148 @@ async def root():
             "browse_movies": "/browse_movies?genre={g}&start_year={y}&min_rating={r}&limit=20",
             "ranked_tv": "/ranked_tv?limit=20",
             "ranked_movies": "/ranked_movies?limit=20",
-            "series_episode_graph": "/series_episode_graph?series={series_name}&scale=auto"
+            "series_episode_graph": "/series_episode_graph?series={series_name}&scale=auto",
+            "series_chart": "/series_chart?series={series_name}&format=png"
+        },
+        "batch_endpoints": {
+            "batch": "POST /batch {\"operations\": [{\"endpoint\": \"episodes\", \"params\": {\"series\": \"...\"}}]}"
         },
         "system_endpoints": {
-            "health": "/health"
+            "health": "/health",
+            "livez": "/livez",
+            "readyz": "/readyz",
+            "cache_stats": "/cache_stats",
+            "metrics": "/metrics",
+            "slow_queries": "/admin/slow_queries?limit=20&order_by=total_ms",
+            "db_settings": "/admin/db_settings"
         },
-        "total_endpoints": 19
+        "total_endpoints": 27
     }
 
 
 @app.get("/health")
-async def health():
-    """Health check endpoint."""
+@offload_unpooled
+def health():
+    """Health check endpoint; a busy query pool does not delay it."""
+    cursor = None
     try:
         con = get_connection()
-        count = con.execute("SELECT COUNT(*) FROM title_basics").fetchone()[0]
-        return {
+        cursor = con.cursor()
+        timer = active_db_timer()
+        timed = TimedConnection(cursor, timer) if timer is not None else cursor
+        count = timed.execute("SELECT COUNT(*) FROM title_basics").fetchone()[0]
+        health = {
             "status": "healthy",
             "database": DB_PATH,
             "titles_count": count
         }
+        if volume_copy is not None:
+            health["volume_copy"] = volume_copy.status()
+        return health
     except Exception as e:
         return JSONResponse(
             status_code=503,
             content={"status": "unhealthy", "error": str(e)}
         )
+    finally:
+        if cursor is not None:
+            cursor.close()
+
+
+@app.get("/livez")
+async def livez():
+    """Liveness probe: the process is serving requests. Never touches the database."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: ready once the startup warm-up has finished. Never touches the database."""
+    content = {"status": "ready" if warmup.ready else "warming_up", "warmup": warmup.status()}
+    return JSONResponse(status_code=200 if warmup.ready else 503, content=content)
+
+
+def sample_runtime_metrics():
+    """Cache and query pool gauges for /metrics."""
+    samples = [("response", response_cache.stats()), ("chart", chart_cache.stats())]
+    return [
+        ("api_cache_entries", "Entries held by each in-process cache", "gauge",
+         [([("cache", name)], stats["entries"]) for name, stats in samples]),
+        ("api_cache_bytes", "Bytes held by each in-process cache", "gauge",
+         [([("cache", name)], stats["bytes"]) for name, stats in samples]),
+        ("api_cache_hits_total", "Cache lookups that returned a stored body", "counter",
+         [([("cache", name)], stats["hits"]) for name, stats in samples]),
+        ("api_cache_misses_total", "Cache lookups that found nothing", "counter",
+         [([("cache", name)], stats["misses"]) for name, stats in samples]),
+        ("api_query_pool_pending", "Offloaded calls running or waiting for a worker", "gauge",
+         [([], query_pool.pending if query_pool else 0)]),
+        ("api_query_pool_workers", "Query pool worker threads", "gauge",
+         [([], query_pool.size if query_pool else 0)]),
+        ("api_ready", "1 once the startup warm-up has finished (see /readyz)", "gauge",
+         [([], int(warmup.ready))]),
+        ("api_duckdb_memory_limit_bytes", "DuckDB memory_limit; larger operators spill to temp_directory", "gauge",
+         [([], db_settings.memory_limit)]),
+        ("api_duckdb_threads", "DuckDB worker threads", "gauge", [([], db_settings.threads)]),
+        ("api_memory_reserved_bytes", "Endpoint memory caps currently reserved", "gauge",
+         [([], memory_budget.reserved)]),
+        ("api_memory_waiting", "Capped endpoint calls waiting for their memory reservation", "gauge",
+         [([], memory_budget.waiting)])
+    ]
+
+
+metrics_registry.add_sampler(sample_runtime_metrics)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-route counts, errors, latency and time split."""
+    return Response(
+        content=metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/admin/slow_queries")
+async def slow_queries(
+    limit: int = Query(20, ge=1, le=200, description="Number of fingerprints to return"),
+    order_by: str = Query("total_ms", description="Sort by total_ms, max_ms, avg_ms or count"),
+    recent: int = Query(0, ge=0, le=200, description="Also return this many most recent slow statements")
+):
+    """Slowest query shapes (grouped by SQL fingerprint) with their worst call and profile."""
+    if order_by not in ("total_ms", "max_ms", "avg_ms", "count"):
+        raise HTTPException(status_code=400, detail="order_by must be total_ms, max_ms, avg_ms or count")
+    result = {
+        **slow_query_log.stats(),
+        "worst": slow_query_log.worst(limit, order_by)
+    }
+    if recent:
+        result["recent"] = slow_query_log.recent(recent)
+    return result
+
+
+@app.get("/admin/db_settings")
+@offload
+def db_settings_report():
+    """DuckDB's effective memory, thread and spill settings, its current usage and the endpoint memory caps."""
+    return {
+        **read_effective_settings(get_connection()),
+        "derived_from": db_settings.sources,
+        "available_memory_bytes": db_settings.available_memory,
+        "memory_limit_bytes": db_settings.memory_limit,
+        "endpoint_memory": memory_budget.stats()
+    }
+
+
+@app.get("/cache_stats")
+async def cache_stats():
+    """Response cache hit, miss and eviction counters, plus the title resolver's index size."""
+    return {**response_cache.stats(), "resolver": resolver.stats()}
 
 
 @app.get("/resolve_series")
-async def resolve_series(name: str = Query(..., description="Series name to search for")):
+@cached("resolve_series", resolves_titles=True)
+@offload
+def resolve_series(name: str = Query(..., description="Series name to search for")):
     """
     Find series by name and return metadata.
     
@@ -141,16 +848,14 @@ async def resolve_series(name: str = Query(..., description="Series name to sear
     """
     try:
         con = get_connection()
-        result = con.execute("""
-            SELECT tconst, primaryTitle, startYear, endYear, genres
-            FROM title_basics
-            WHERE titleType = 'tvSeries'
-                AND LOWER(primaryTitle) = LOWER(?)
-            LIMIT 1
-        """, [name]).fetchone()
+        result = resolve_title(con, "tvSeries", name)
         
         if not result:
-            # Try partial match
+            # Try partial match, most-voted first
+            result = resolver.search("tvSeries", name)
+        
+        if not result:
+            # Unrated series are not indexed by the resolver
             result = con.execute("""
                 SELECT tconst, primaryTitle, startYear, endYear, genres
                 FROM title_basics
@@ -177,43 +882,108 @@ async def resolve_series(name: str = Query(..., description="Series name to sear
         raise HTTPException(status_code=500, detail=str(e))
 
 
+EPISODES_QUERY = """
+    SELECT
+        seasonNumber,
+        episodeNumber,
+        episode_title,
+        averageRating,
+        numVotes,
+        episode_tconst
+    FROM episode_panel
+    WHERE series_tconst = ?
+    ORDER BY seasonNumber, episodeNumber
+"""
+
+# Same rows as EPISODES_QUERY, named like the episode_entry() fields
+EPISODE_COLUMNS_QUERY = """
+    SELECT
+        seasonNumber AS season,
+        episodeNumber AS episode,
+        episode_title AS title,
+        averageRating AS rating,
+        numVotes AS votes,
+        episode_tconst AS tconst
+    FROM episode_panel
+    WHERE series_tconst = ?
+    ORDER BY seasonNumber, episodeNumber
+"""
+
+
+def episode_entry(row):
+    return {
+        "season": row[0],
+        "episode": row[1],
+        "title": row[2],
+        "rating": row[3],
+        "votes": row[4],
+        "tconst": row[5]
+    }
+
+
+@offload
+def open_series_stream(series, sql):
+    """Resolve a series and start streaming sql (parameterized by its tconst)."""
+    con = get_connection()
+    series_result = resolve_title(con, "tvSeries", series)
+    if not series_result:
+        raise HTTPException(status_code=404, detail=f"Series not found: {series}")
+    cursor, rows = open_stream(sql, [series_result.tconst])
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"No episodes found for: {series_result.title}")
+    return series_result, cursor, rows
+
+
+async def stream_episodes(series, format):
+    """NDJSON /episodes: a header line, one line per episode, then the episode count."""
+    if format != "json":
+        raise HTTPException(status_code=400, detail="Streaming is only available with format=json")
+    series_result, cursor, rows = await open_series_stream(series, EPISODES_QUERY)
+    count = 0
+    
+    def shape_rows(rows):
+        nonlocal count
+        count += len(rows)
+        return ({"type": "episode", **episode_entry(row)} for row in rows)
+    
+    header = {"type": "header", "series": series_result.title, "tconst": series_result.tconst}
+    return ndjson_response(header, cursor, rows, shape_rows, lambda: {"episode_count": count})
+
+
 @app.get("/episodes")
-async def get_episodes(series: str = Query(..., description="Series name")):
+@streamable(stream_episodes)
+@cached("episodes", resolves_titles=True)
+@offload
+def get_episodes(
+    series: str = Query(..., description="Series name"),
+    format: str = Query("json", description=FORMAT_HELP)
+):
     """
     Get all episodes with ratings for a series.
     
     Returns episode metadata including season, episode number, title, and rating.
     """
+    check_table_format(format)
     try:
         con = get_connection()
         
         # First resolve the series
-        series_result = con.execute("""
-            SELECT tconst, primaryTitle
-            FROM title_basics
-            WHERE titleType = 'tvSeries'
-                AND LOWER(primaryTitle) = LOWER(?)
-            LIMIT 1
-        """, [series]).fetchone()
+        series_result = resolve_title(con, "tvSeries", series)
         
         if not series_result:
             raise HTTPException(status_code=404, detail=f"Series not found: {series}")
         
-        series_tconst, series_title = series_result
+        series_tconst, series_title = series_result.tconst, series_result.title
+        
+        if format != "json":
+            table = fetch_columns(con.execute(EPISODE_COLUMNS_QUERY, [series_tconst]), format)
+            if not table.num_rows:
+                raise HTTPException(status_code=404, detail=f"No episodes found for: {series_title}")
+            envelope = {"series": series_title, "tconst": series_tconst, "episode_count": table.num_rows}
+            return table_response(table, envelope, "episodes")
         
         # Get episodes
-        episodes = con.execute("""
-            SELECT
-                seasonNumber,
-                episodeNumber,
-                episode_title,
-                averageRating,
-                numVotes,
-                episode_tconst
-            FROM episode_panel
-            WHERE series_tconst = ?
-            ORDER BY seasonNumber, episodeNumber
-        """, [series_tconst]).fetchall()
+        episodes = con.execute(EPISODES_QUERY, [series_tconst]).fetchall()
         
         if not episodes:
             raise HTTPException(status_code=404, detail=f"No episodes found for: {series_title}")
@@ -222,17 +992,7 @@ async def get_episodes(series: str = Query(..., description="Series name")):
             "series": series_title,
             "tconst": series_tconst,
             "episode_count": len(episodes),
-            "episodes": [
-                {
-                    "season": row[0],
-                    "episode": row[1],
-                    "title": row[2],
-                    "rating": row[3],
-                    "votes": row[4],
-                    "tconst": row[5]
-                }
-                for row in episodes
-            ]
+            "episodes": [episode_entry(row) for row in episodes]
         }
     
     except HTTPException:
@@ -242,7 +1002,9 @@ async def get_episodes(series: str = Query(..., description="Series name")):
 
 
 @app.get("/top_episodes")
-async def get_top_episodes(
+@cached("top_episodes", resolves_titles=True)
+@offload
+def get_top_episodes(
     series: str = Query(..., description="Series name"),
     min_votes: int = Query(1000, description="Minimum votes threshold"),
     limit: int = Query(10, description="Number of results to return"),
@@ -264,18 +1026,12 @@ async def get_top_episodes(
         con = get_connection()
         
         # First resolve the series
-        series_result = con.execute("""
-            SELECT tconst, primaryTitle
-            FROM title_basics
-            WHERE titleType = 'tvSeries'
-                AND LOWER(primaryTitle) = LOWER(?)
-            LIMIT 1
-        """, [series]).fetchone()
+        series_result = resolve_title(con, "tvSeries", series)
         
         if not series_result:
             raise HTTPException(status_code=404, detail=f"Series not found: {series}")
         
-        series_tconst, series_title = series_result
+        series_tconst, series_title = series_result.tconst, series_result.title
         
         # Get mean rating for the series
         mean_rating = con.execute("""
@@ -343,21 +1099,26 @@ async def get_top_episodes(
 
 
 @app.get("/search_series")
-async def search_series(
+@cached("search_series")
+@offload
+def search_series(
     query: Optional[str] = Query(None, description="Search query for series name"),
-    genre: Optional[str] = Query(None, description="Filter by genre (e.g., 'Drama', 'Comedy')"),
+    genre: Optional[str] = Query(None, description=GENRE_FILTER_HELP),
     start_year: Optional[int] = Query(None, description="Minimum start year"),
     end_year: Optional[int] = Query(None, description="Maximum start year"),
     min_rating: Optional[float] = Query(None, description="Minimum average rating"),
-    limit: int = Query(20, description="Number of results to return")
+    limit: int = Query(20, description="Number of results to return"),
+    format: str = Query("json", description=FORMAT_HELP)
 ):
     """
     Advanced search for TV series with multiple filters.
     """
+    check_table_format(format)
     try:
         con = get_connection()
         
-        conditions = ["titleType = 'tvSeries'"]
+        # series_stats holds one precomputed row per series with episodes
+        conditions = ["listed_episodes > 0"]
         params = []
         
         if query:
@@ -365,8 +1126,9 @@ async def search_series(
             params.append(f"%{query}%")
         
         if genre:
-            conditions.append("LOWER(genres) LIKE LOWER(?)")
-            params.append(f"%{genre}%")
+            genre_sql, genre_params = genre_condition("genre_mask", genre)
+            conditions.append(genre_sql)
+            params.extend(genre_params)
         
         if start_year:
             conditions.append("startYear >= ?")
@@ -376,35 +1138,51 @@ async def search_series(
             conditions.append("startYear <= ?")
             params.append(end_year)
         
-        where_clause = " AND ".join(conditions)
-        
-        results = con.execute(f"""
-            SELECT 
-                tb.tconst, 
-                tb.primaryTitle, 
-                tb.startYear, 
-                tb.endYear, 
-                tb.genres,
-                AVG(tr.averageRating) as avg_rating,
-                COUNT(DISTINCT te.tconst) as episode_count
-            FROM title_basics tb
-            LEFT JOIN title_episode te ON tb.tconst = te.parentTconst
-            LEFT JOIN title_ratings tr ON te.tconst = tr.tconst
-            WHERE {where_clause}
-            GROUP BY tb.tconst, tb.primaryTitle, tb.startYear, tb.endYear, tb.genres
-            HAVING episode_count > 0 {' AND avg_rating >= ?' if min_rating else ''}
-            ORDER BY avg_rating DESC NULLS LAST
-            LIMIT ?
-        """, params + ([min_rating] if min_rating else []) + [limit]).fetchall()
+        if min_rating:
+            conditions.append("listed_avg_rating >= ?")
+            params.append(min_rating)
         
-        return {
+        where_clause = " AND ".join(conditions)
+        envelope = {
             "query": query,
             "filters": {
                 "genre": genre,
                 "start_year": start_year,
                 "end_year": end_year,
                 "min_rating": min_rating
-            },
+            }
+        }
+        
+        # Columnar formats compute the row format's fields in SQL
+        if format == "json":
+            columns = "tconst, primaryTitle, startYear, endYear, genres, listed_avg_rating, listed_episodes"
+        else:
+            columns = """
+                tconst,
+                primaryTitle AS title,
+                startYear,
+                endYear,
+                genres,
+                ROUND(NULLIF(listed_avg_rating, 0), 2) AS avgRating,
+                listed_episodes AS episodeCount
+            """
+        
+        result = con.execute(f"""
+            SELECT {columns}
+            FROM series_stats
+            WHERE {where_clause}
+            ORDER BY listed_avg_rating DESC NULLS LAST, tconst
+            LIMIT ?
+        """, params + [limit])
+        
+        if format != "json":
+            table = fetch_columns(result, format)
+            return table_response(table, {**envelope, "result_count": table.num_rows}, "series")
+        
+        results = result.fetchall()
+        
+        return {
+            **envelope,
             "result_count": len(results),
             "series": [
                 {
@@ -425,7 +1203,9 @@ async def search_series(
 
 
 @app.get("/compare_series")
-async def compare_series(
+@cached("compare_series", resolves_titles=True)
+@offload
+def compare_series(
     series_names: str = Query(..., description="Comma-separated list of series names (e.g., 'Breaking Bad,The Wire,The Sopranos')")
 ):
     """
@@ -438,18 +1218,16 @@ async def compare_series(
         if len(series_list) > 10:
             raise HTTPException(status_code=400, detail="Maximum 10 series can be compared at once")
         
+        # Resolve all names, then summarize every found series in one query
+        matches = resolve_titles(con, "tvSeries", series_list)
+        summaries = fetch_series_summaries(
+            con, sorted({match.tconst for match in matches if match is not None})
+        )
+        no_episodes = (0, None, None, None, None, None) + (None,) * 10
+        
         comparisons = []
         
-        for series_name in series_list:
-            # Resolve series
-            series_result = con.execute("""
-                SELECT tconst, primaryTitle, startYear, endYear, genres
-                FROM title_basics
-                WHERE titleType = 'tvSeries'
-                    AND LOWER(primaryTitle) = LOWER(?)
-                LIMIT 1
-            """, [series_name]).fetchone()
-            
+        for series_name, series_result in zip(series_list, matches):
             if not series_result:
                 comparisons.append({
                     "name": series_name,
@@ -458,38 +1236,12 @@ async def compare_series(
                 })
                 continue
             
-            tconst, title, start_year, end_year, genres = series_result
-            
-            # Get episode statistics
-            stats = con.execute("""
-                SELECT
-                    COUNT(*) as total_episodes,
-                    AVG(averageRating) as avg_rating,
-                    MAX(averageRating) as max_rating,
-                    MIN(averageRating) as min_rating,
-                    MAX(seasonNumber) as total_seasons,
-                    SUM(numVotes) as total_votes
-                FROM episode_panel
-                WHERE series_tconst = ?
-            """, [tconst]).fetchone()
-            
-            # Get best episode
-            best_episode = con.execute("""
-                SELECT episode_title, seasonNumber, episodeNumber, averageRating, numVotes
-                FROM episode_panel
-                WHERE series_tconst = ?
-                ORDER BY averageRating DESC, numVotes DESC
-                LIMIT 1
-            """, [tconst]).fetchone()
-            
-            # Get worst episode
-            worst_episode = con.execute("""
-                SELECT episode_title, seasonNumber, episodeNumber, averageRating, numVotes
-                FROM episode_panel
-                WHERE series_tconst = ?
-                ORDER BY averageRating ASC, numVotes DESC
-                LIMIT 1
-            """, [tconst]).fetchone()
+            tconst, title, start_year, end_year, genres = (
+                series_result.tconst, series_result.title, series_result.start_year,
+                series_result.end_year, series_result.genres
+            )
+            summary = summaries.get(tconst, no_episodes)
+            stats, best_episode, worst_episode = summary[:6], summary[6:11], summary[11:16]
             
             comparisons.append({
                 "name": title,
@@ -512,14 +1264,14 @@ async def compare_series(
                     "episode": best_episode[2],
                     "rating": best_episode[3],
                     "votes": best_episode[4]
-                } if best_episode else None,
+                } if stats[0] else None,
                 "worst_episode": {
                     "title": worst_episode[0],
                     "season": worst_episode[1],
                     "episode": worst_episode[2],
                     "rating": worst_episode[3],
                     "votes": worst_episode[4]
-                } if worst_episode else None
+                } if stats[0] else None
             })
         
         return {
@@ -534,7 +1286,9 @@ async def compare_series(
 
 
 @app.get("/series_analytics")
-async def series_analytics(
+@cached("series_analytics", resolves_titles=True)
+@offload
+def series_analytics(
     series: str = Query(..., description="Series name")
 ):
     """
@@ -544,18 +1298,12 @@ async def series_analytics(
         con = get_connection()
         
         # Resolve series
-        series_result = con.execute("""
-            SELECT tconst, primaryTitle
-            FROM title_basics
-            WHERE titleType = 'tvSeries'
-                AND LOWER(primaryTitle) = LOWER(?)
-            LIMIT 1
-        """, [series]).fetchone()
+        series_result = resolve_title(con, "tvSeries", series)
         
         if not series_result:
             raise HTTPException(status_code=404, detail=f"Series not found: {series}")
         
-        tconst, title = series_result
+        tconst, title = series_result.tconst, series_result.title
         
         # Overall statistics
         overall_stats = con.execute("""
@@ -664,7 +1412,9 @@ async def series_analytics(
 
 
 @app.get("/worst_episodes")
-async def get_worst_episodes(
+@cached("worst_episodes", resolves_titles=True)
+@offload
+def get_worst_episodes(
     series: str = Query(..., description="Series name"),
     min_votes: int = Query(1000, description="Minimum votes threshold"),
     limit: int = Query(10, description="Number of results to return")
@@ -676,18 +1426,12 @@ async def get_worst_episodes(
         con = get_connection()
         
         # Resolve series
-        series_result = con.execute("""
-            SELECT tconst, primaryTitle
-            FROM title_basics
-            WHERE titleType = 'tvSeries'
-                AND LOWER(primaryTitle) = LOWER(?)
-            LIMIT 1
-        """, [series]).fetchone()
+        series_result = resolve_title(con, "tvSeries", series)
         
         if not series_result:
             raise HTTPException(status_code=404, detail=f"Series not found: {series}")
         
-        tconst, title = series_result
+        tconst, title = series_result.tconst, series_result.title
         
         episodes = con.execute("""
             SELECT
@@ -735,16 +1479,20 @@ async def get_worst_episodes(
 
 
 @app.get("/search_movies")
-async def search_movies(
+@cached("search_movies")
+@offload
+def search_movies(
     query: Optional[str] = Query(None, description="Search query for movie title"),
-    genre: Optional[str] = Query(None, description="Filter by genre"),
+    genre: Optional[str] = Query(None, description=GENRE_FILTER_HELP),
     start_year: Optional[int] = Query(None, description="Minimum release year"),
     end_year: Optional[int] = Query(None, description="Maximum release year"),
     min_rating: Optional[float] = Query(None, description="Minimum average rating"),
     min_votes: Optional[int] = Query(None, description="Minimum number of votes"),
-    limit: int = Query(20, description="Number of results")
+    limit: int = Query(20, description="Number of results"),
+    format: str = Query("json", description=FORMAT_HELP)
 ):
     """Search for movies with multiple filters."""
+    check_table_format(format)
     try:
         con = get_connection()
         
@@ -756,8 +1504,9 @@ async def search_movies(
             params.append(f"%{query}%")
         
         if genre:
-            conditions.append("LOWER(genres) LIKE LOWER(?)")
-            params.append(f"%{genre}%")
+            genre_sql, genre_params = genre_condition("genre_mask", genre)
+            conditions.append(genre_sql)
+            params.extend(genre_params)
         
         if start_year:
             conditions.append("startYear >= ?")
@@ -769,15 +1518,22 @@ async def search_movies(
         
         where_clause = " AND ".join(conditions)
         
-        # Get movies with ratings
-        results = con.execute(f"""
-            SELECT 
+        # Columnar formats compute the row format's fields in SQL
+        if format == "json":
+            columns = "tb.tconst, tb.primaryTitle, tb.startYear, tb.genres, tr.averageRating, tr.numVotes"
+        else:
+            columns = """
                 tb.tconst,
-                tb.primaryTitle,
-                tb.startYear,
+                tb.primaryTitle AS title,
+                tb.startYear AS year,
                 tb.genres,
-                tr.averageRating,
-                tr.numVotes
+                ROUND(NULLIF(tr.averageRating, 0), 1) AS rating,
+                tr.numVotes AS votes
+            """
+        
+        # Get movies with ratings
+        result = con.execute(f"""
+            SELECT {columns}
             FROM title_basics tb
             LEFT JOIN title_ratings tr ON tb.tconst = tr.tconst
             WHERE {where_clause}
@@ -785,9 +1541,9 @@ async def search_movies(
                 {"AND tr.numVotes >= ?" if min_votes else ""}
             ORDER BY tr.averageRating DESC NULLS LAST, tr.numVotes DESC
             LIMIT ?
-        """, params + ([min_rating] if min_rating else []) + ([min_votes] if min_votes else []) + [limit]).fetchall()
+        """, params + ([min_rating] if min_rating else []) + ([min_votes] if min_votes else []) + [limit])
         
-        return {
+        envelope = {
             "query": query,
             "filters": {
                 "genre": genre,
@@ -795,7 +1551,15 @@ async def search_movies(
                 "end_year": end_year,
                 "min_rating": min_rating,
                 "min_votes": min_votes
-            },
+            }
+        }
+        if format != "json":
+            table = fetch_columns(result, format)
+            return table_response(table, {**envelope, "result_count": table.num_rows}, "movies")
+        
+        results = result.fetchall()
+        return {
+            **envelope,
             "result_count": len(results),
             "movies": [
                 {
@@ -815,7 +1579,9 @@ async def search_movies(
 
 
 @app.get("/movie_details")
-async def movie_details(
+@cached("movie_details", resolves_titles=True)
+@offload
+def movie_details(
     title: Optional[str] = Query(None, description="Movie title"),
     tconst: Optional[str] = Query(None, description="IMDb ID (tconst)")
 ):
@@ -831,8 +1597,8 @@ async def movie_details(
             movie_query = "SELECT tconst, primaryTitle, startYear, genres FROM title_basics WHERE tconst = ? AND titleType = 'movie'"
             movie_result = con.execute(movie_query, [tconst]).fetchone()
         else:
-            movie_query = "SELECT tconst, primaryTitle, startYear, genres FROM title_basics WHERE LOWER(primaryTitle) = LOWER(?) AND titleType = 'movie' LIMIT 1"
-            movie_result = con.execute(movie_query, [title]).fetchone()
+            match = resolve_title(con, "movie", title)
+            movie_result = (match.tconst, match.title, match.start_year, match.genres) if match else None
         
         if not movie_result:
             raise HTTPException(status_code=404, detail=f"Movie not found: {title or tconst}")
@@ -862,7 +1628,9 @@ async def movie_details(
 
 
 @app.get("/compare_movies")
-async def compare_movies(
+@cached("compare_movies", resolves_titles=True)
+@offload
+def compare_movies(
     movie_titles: str = Query(..., description="Comma-separated list of movie titles")
 ):
     """Compare multiple movies side by side."""
@@ -873,17 +1641,15 @@ async def compare_movies(
         if len(movies_list) > 10:
             raise HTTPException(status_code=400, detail="Maximum 10 movies can be compared")
         
+        # Resolve all titles, then fetch every rating in one query
+        matches = resolve_titles(con, "movie", movies_list)
+        ratings = fetch_title_ratings(
+            con, sorted({match.tconst for match in matches if match is not None})
+        )
+        
         comparisons = []
         
-        for movie_title in movies_list:
-            # Find movie
-            movie_result = con.execute("""
-                SELECT tconst, primaryTitle, startYear, genres
-                FROM title_basics
-                WHERE titleType = 'movie' AND LOWER(primaryTitle) = LOWER(?)
-                LIMIT 1
-            """, [movie_title]).fetchone()
-            
+        for movie_title, movie_result in zip(movies_list, matches):
             if not movie_result:
                 comparisons.append({
                     "title": movie_title,
@@ -892,14 +1658,10 @@ async def compare_movies(
                 })
                 continue
             
-            tconst, title, year, genres = movie_result
-            
-            # Get rating
-            rating_result = con.execute("""
-                SELECT averageRating, numVotes
-                FROM title_ratings
-                WHERE tconst = ?
-            """, [tconst]).fetchone()
+            tconst, title, year, genres = (
+                movie_result.tconst, movie_result.title, movie_result.start_year, movie_result.genres
+            )
+            rating_result = ratings.get(tconst)
             
             comparisons.append({
                 "title": title,
@@ -923,14 +1685,18 @@ async def compare_movies(
 
 
 @app.get("/top_movies")
-async def top_movies(
-    genre: Optional[str] = Query(None, description="Filter by genre"),
+@cached("top_movies")
+@offload
+def top_movies(
+    genre: Optional[str] = Query(None, description=GENRE_FILTER_HELP),
     start_year: Optional[int] = Query(None, description="Start year"),
     end_year: Optional[int] = Query(None, description="End year"),
     min_votes: int = Query(10000, description="Minimum votes threshold"),
-    limit: int = Query(20, description="Number of results")
+    limit: int = Query(20, description="Number of results"),
+    format: str = Query("json", description=FORMAT_HELP)
 ):
     """Get top-rated movies with optional filters."""
+    check_table_format(format)
     try:
         con = get_connection()
         
@@ -938,8 +1704,9 @@ async def top_movies(
         params = [min_votes]
         
         if genre:
-            conditions.append("LOWER(tb.genres) LIKE LOWER(?)")
-            params.append(f"%{genre}%")
+            genre_sql, genre_params = genre_condition("tb.genre_mask", genre)
+            conditions.append(genre_sql)
+            params.extend(genre_params)
         
         if start_year:
             conditions.append("tb.startYear >= ?")
@@ -951,28 +1718,43 @@ async def top_movies(
         
         where_clause = " AND ".join(conditions)
         
-        results = con.execute(f"""
-            SELECT 
+        # Columnar formats compute the row format's fields in SQL
+        if format == "json":
+            columns = "tb.tconst, tb.primaryTitle, tb.startYear, tb.genres, tr.averageRating, tr.numVotes"
+        else:
+            columns = """
                 tb.tconst,
-                tb.primaryTitle,
-                tb.startYear,
+                tb.primaryTitle AS title,
+                tb.startYear AS year,
                 tb.genres,
-                tr.averageRating,
-                tr.numVotes
+                ROUND(tr.averageRating, 2) AS rating,
+                tr.numVotes AS votes
+            """
+        
+        result = con.execute(f"""
+            SELECT {columns}
             FROM title_basics tb
             JOIN title_ratings tr ON tb.tconst = tr.tconst
             WHERE {where_clause}
             ORDER BY tr.averageRating DESC, tr.numVotes DESC
             LIMIT ?
-        """, params + [limit]).fetchall()
+        """, params + [limit])
         
-        return {
+        envelope = {
             "filters": {
                 "genre": genre,
                 "start_year": start_year,
                 "end_year": end_year,
                 "min_votes": min_votes
-            },
+            }
+        }
+        if format != "json":
+            table = fetch_columns(result, format, rank_start=1)
+            return table_response(table, {**envelope, "result_count": table.num_rows}, "movies")
+        
+        results = result.fetchall()
+        return {
+            **envelope,
             "result_count": len(results),
             "movies": [
                 {
@@ -993,37 +1775,63 @@ async def top_movies(
 
 
 @app.get("/genre_analysis")
-async def genre_analysis(
+@cached("genre_analysis")
+@offload
+def genre_analysis(
     title_type: str = Query("movie", description="'movie' or 'tvSeries'"),
-    min_votes: int = Query(1000, description="Minimum votes threshold")
+    min_votes: int = Query(1000, description="Minimum votes threshold"),
+    group_by: str = Query("combination", description="'combination' (genre strings as listed) or 'genre' (individual genres)")
 ):
     """Analyze ratings by genre."""
     try:
         con = get_connection()
         
-        # Get average ratings by genre
-        results = con.execute("""
-            SELECT 
-                tb.genres,
-                COUNT(*) as title_count,
-                AVG(tr.averageRating) as avg_rating,
-                MAX(tr.averageRating) as max_rating,
-                MIN(tr.averageRating) as min_rating,
-                SUM(tr.numVotes) as total_votes
-            FROM title_basics tb
-            JOIN title_ratings tr ON tb.tconst = tr.tconst
-            WHERE tb.titleType = ?
-                AND tr.numVotes >= ?
-                AND tb.genres IS NOT NULL
-                AND tb.genres != ''
-            GROUP BY tb.genres
-            ORDER BY avg_rating DESC
-            LIMIT 50
-        """, [title_type, min_votes]).fetchall()
+        if group_by not in ("combination", "genre"):
+            raise HTTPException(status_code=400, detail="group_by must be 'combination' or 'genre'")
+        
+        if group_by == "genre":
+            # One row per individual genre from the exploded genre index
+            results = con.execute("""
+                SELECT 
+                    tg.genre,
+                    COUNT(*) as title_count,
+                    AVG(tr.averageRating) as avg_rating,
+                    MAX(tr.averageRating) as max_rating,
+                    MIN(tr.averageRating) as min_rating,
+                    SUM(tr.numVotes) as total_votes
+                FROM title_genre tg
+                JOIN title_ratings tr ON tg.tconst = tr.tconst
+                WHERE tg.titleType = ?
+                    AND tr.numVotes >= ?
+                GROUP BY tg.genre
+                ORDER BY avg_rating DESC
+                LIMIT 50
+            """, [title_type, min_votes]).fetchall()
+        else:
+            # Get average ratings by genre combination
+            results = con.execute("""
+                SELECT 
+                    tb.genres,
+                    COUNT(*) as title_count,
+                    AVG(tr.averageRating) as avg_rating,
+                    MAX(tr.averageRating) as max_rating,
+                    MIN(tr.averageRating) as min_rating,
+                    SUM(tr.numVotes) as total_votes
+                FROM title_basics tb
+                JOIN title_ratings tr ON tb.tconst = tr.tconst
+                WHERE tb.titleType = ?
+                    AND tr.numVotes >= ?
+                    AND tb.genres IS NOT NULL
+                    AND tb.genres != ''
+                GROUP BY tb.genres
+                ORDER BY avg_rating DESC
+                LIMIT 50
+            """, [title_type, min_votes]).fetchall()
         
         return {
             "title_type": title_type,
             "min_votes": min_votes,
+            "group_by": group_by,
             "genre_count": len(results),
             "genres": [
                 {
@@ -1038,12 +1846,16 @@ async def genre_analysis(
             ]
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/decade_analysis")
-async def decade_analysis(
+@cached("decade_analysis")
+@offload
+def decade_analysis(
     title_type: str = Query("movie", description="'movie' or 'tvSeries'"),
     min_votes: int = Query(1000, description="Minimum votes threshold")
 ):
@@ -1088,9 +1900,49 @@ async def decade_analysis(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Keyset pagination of the browse endpoints: the last row's position in the ranking
+PageCursor = collections.namedtuple("PageCursor", "score tconst position total_count")
+
+PAGE_CURSOR_HELP = "next_cursor of the previous page: continue after its last row (replaces offset)"
+
+
+def encode_page_cursor(filters, score, tconst, position, total_count):
+    """
+    Opaque cursor for the page after a row (its rank score, tconst and position).
+    
+    It also carries the total count, so later pages need not recount, and a
+    hash of the filters, so it is only accepted with the same filters.
+    """
+    payload = [score, tconst, position, total_count, hashlib.sha1(encode_json(filters)).hexdigest()[:8]]
+    return base64.urlsafe_b64encode(encode_json(payload)).decode("ascii").rstrip("=")
+
+
+def decode_page_cursor(token, filters):
+    """Parse a cursor from encode_page_cursor(); HTTP 400 when it is malformed or for other filters."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        score, tconst, position, total_count, filters_hash = payload
+        cursor = PageCursor(float(score), str(tconst), int(position), int(total_count))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if filters_hash != hashlib.sha1(encode_json(filters)).hexdigest()[:8]:
+        raise HTTPException(status_code=400, detail="Cursor was issued for different filters")
+    return cursor
+
+
+def next_page_cursor(filters, offset, total_count, last_score, last_tconst, result_count):
+    """Cursor of the page after this one, or None on the last page."""
+    position = offset + result_count
+    if not result_count or position >= total_count:
+        return None
+    return encode_page_cursor(filters, last_score, last_tconst, position, total_count)
+
+
 @app.get("/browse_tv")
-async def browse_tv(
-    genre: Optional[str] = Query(None, description="Filter by genre"),
+@cached("browse_tv")
+@offload
+def browse_tv(
+    genre: Optional[str] = Query(None, description=GENRE_FILTER_HELP),
     start_year: Optional[int] = Query(None, description="Minimum start year"),
     end_year: Optional[int] = Query(None, description="Maximum start year"),
     min_rating: Optional[float] = Query(None, description="Minimum average rating"),
@@ -1099,73 +1951,79 @@ async def browse_tv(
     min_seasons: Optional[int] = Query(None, description="Minimum number of seasons"),
     max_seasons: Optional[int] = Query(None, description="Maximum number of seasons"),
     offset: int = Query(0, description="Pagination offset"),
-    limit: int = Query(20, description="Number of results", le=100)
+    limit: int = Query(20, description="Number of results", le=100),
+    format: str = Query("json", description=FORMAT_HELP),
+    cursor: Optional[str] = Query(None, description=PAGE_CURSOR_HELP)
 ):
-    """Browse TV series ranked by quality score: ln(1 + avg_votes_per_episode) * avg_rating"""
+    """
+    Browse TV series ranked by quality score: ln(1 + avg_votes_per_episode) * avg_rating
+    
+    Every page returns a next_cursor; passing it back seeks past the last
+    row instead of re-ranking and skipping `offset` rows.
+    """
+    check_table_format(format)
+    filters = {
+        "genre": genre,
+        "start_year": start_year,
+        "end_year": end_year,
+        "min_rating": min_rating,
+        "max_rating": max_rating,
+        "min_votes": min_votes,
+        "min_seasons": min_seasons,
+        "max_seasons": max_seasons
+    }
+    page = None
+    if cursor:
+        if offset:
+            raise HTTPException(status_code=400, detail="Pass either cursor or offset, not both")
+        page = decode_page_cursor(cursor, filters)
+        offset = page.position
     try:
         con = get_connection()
         
-        conditions = ["tb.titleType = 'tvSeries'"]
+        # series_stats holds one precomputed row per series, already ranked
+        conditions = ["total_episodes > 0"]
         params = []
         
         if genre:
-            conditions.append("LOWER(tb.genres) LIKE LOWER(?)")
-            params.append(f"%{genre}%")
+            genre_sql, genre_params = genre_condition("genre_mask", genre)
+            conditions.append(genre_sql)
+            params.extend(genre_params)
         
         if start_year:
-            conditions.append("tb.startYear >= ?")
+            conditions.append("startYear >= ?")
             params.append(start_year)
         
         if end_year:
-            conditions.append("tb.startYear <= ?")
+            conditions.append("startYear <= ?")
             params.append(end_year)
         
-        where_clause = " AND ".join(conditions)
-        
-        # Build the main query with ranking
-        query = f"""
-            WITH series_stats AS (
-                SELECT
-                    tb.tconst,
-                    tb.primaryTitle,
-                    tb.startYear,
-                    tb.endYear,
-                    tb.genres,
-                    COUNT(DISTINCT ep.episode_tconst) as total_episodes,
-                    MAX(ep.seasonNumber) as total_seasons,
-                    AVG(ep.averageRating) as avg_rating,
-                    AVG(ep.numVotes) as avg_votes_per_episode
-                FROM title_basics tb
-                LEFT JOIN episode_panel ep ON tb.tconst = ep.series_tconst
-                WHERE {where_clause}
-                    AND ep.episode_tconst IS NOT NULL
-                GROUP BY tb.tconst, tb.primaryTitle, tb.startYear, tb.endYear, tb.genres
-                HAVING total_episodes > 0
-        """
-        
-        having_conditions = []
         if min_rating:
-            having_conditions.append("avg_rating >= ?")
+            conditions.append("avg_rating >= ?")
             params.append(min_rating)
+        
         if max_rating:
-            having_conditions.append("avg_rating <= ?")
+            conditions.append("avg_rating <= ?")
             params.append(max_rating)
+        
         if min_votes:
-            having_conditions.append("avg_votes_per_episode >= ?")
+            conditions.append("avg_votes_per_episode >= ?")
             params.append(min_votes)
+        
         if min_seasons:
-            having_conditions.append("total_seasons >= ?")
+            conditions.append("total_seasons >= ?")
             params.append(min_seasons)
+        
         if max_seasons:
-            having_conditions.append("total_seasons <= ?")
+            conditions.append("total_seasons <= ?")
             params.append(max_seasons)
         
-        if having_conditions:
-            query += " AND " + " AND ".join(having_conditions)
+        where_clause = " AND ".join(conditions)
         
-        query += """
-            )
-            SELECT 
+        # Columnar formats compute the row format's fields in SQL (ordering
+        # and the cursor still use the unrounded score)
+        if format == "json":
+            columns = """
                 tconst,
                 primaryTitle,
                 startYear,
@@ -1175,81 +2033,81 @@ async def browse_tv(
                 total_seasons,
                 avg_rating,
                 avg_votes_per_episode,
-                LN(1 + avg_votes_per_episode) * avg_rating as rank_score
-            FROM series_stats
-            ORDER BY rank_score DESC
-            LIMIT ? OFFSET ?
-        """
-        
-        params.extend([limit, offset])
-        results = con.execute(query, params).fetchall()
-        
-        # Get total count
-        count_query = f"""
-            WITH series_stats AS (
-                SELECT
-                    tb.tconst,
-                    COUNT(DISTINCT ep.episode_tconst) as total_episodes,
-                    MAX(ep.seasonNumber) as total_seasons,
-                    AVG(ep.averageRating) as avg_rating,
-                    AVG(ep.numVotes) as avg_votes_per_episode
-                FROM title_basics tb
-                LEFT JOIN episode_panel ep ON tb.tconst = ep.series_tconst
+                rank_score"""
+        else:
+            columns = """
+                series_stats.rank_score AS seek_score,
+                ROUND(rank_score, 2) AS rank_score,
+                tconst,
+                primaryTitle AS title,
+                CONCAT(startYear, '-', COALESCE(CAST(NULLIF(endYear, 0) AS VARCHAR), 'Present')) AS years,
+                genres,
+                ROUND(avg_rating, 2) AS avg_rating,
+                total_episodes,
+                total_seasons,
+                CAST(TRUNC(avg_votes_per_episode) AS BIGINT) AS avg_votes_per_episode"""
+        
+        if page is None:
+            # The page and the total count come from the same scan
+            query = f"""
+                SELECT {columns},
+                    COUNT(*) OVER () as total_count
+                FROM series_stats
                 WHERE {where_clause}
-                    AND ep.episode_tconst IS NOT NULL
-                GROUP BY tb.tconst
-                HAVING total_episodes > 0
-        """
-        
-        # Build count params - only WHERE clause params, not HAVING clause
-        count_params = []
-        if genre:
-            count_params.append(f"%{genre}%")
-        if start_year:
-            count_params.append(start_year)
-        if end_year:
-            count_params.append(end_year)
-        
-        # Add having conditions
-        count_having = []
-        if min_rating:
-            count_having.append("avg_rating >= ?")
-            count_params.append(min_rating)
-        if max_rating:
-            count_having.append("avg_rating <= ?")
-            count_params.append(max_rating)
-        if min_votes:
-            count_having.append("avg_votes_per_episode >= ?")
-            count_params.append(min_votes)
-        if min_seasons:
-            count_having.append("total_seasons >= ?")
-            count_params.append(min_seasons)
-        if max_seasons:
-            count_having.append("total_seasons <= ?")
-            count_params.append(max_seasons)
-        
-        if count_having:
-            count_query += " AND " + " AND ".join(count_having)
-        
-        count_query += ") SELECT COUNT(*) FROM series_stats"
-        
-        total_count = con.execute(count_query, count_params).fetchone()[0]
-        
-        return {
-            "filters": {
-                "genre": genre,
-                "start_year": start_year,
-                "end_year": end_year,
-                "min_rating": min_rating,
-                "max_rating": max_rating,
-                "min_votes": min_votes,
-                "min_seasons": min_seasons,
-                "max_seasons": max_seasons
-            },
+                ORDER BY series_stats.rank_score DESC, tconst
+                LIMIT ? OFFSET ?
+            """
+            result = con.execute(query, params + [limit, offset])
+        else:
+            # Seek past the cursor's row; the table is stored in rank order, so
+            # the score bound also skips whole row groups. The count is the cursor's.
+            query = f"""
+                SELECT {columns}
+                FROM series_stats
+                WHERE {where_clause}
+                    AND series_stats.rank_score <= ?
+                    AND (series_stats.rank_score < ? OR tconst > ?)
+                ORDER BY series_stats.rank_score DESC, tconst
+                LIMIT ?
+            """
+            result = con.execute(query, params + [page.score, page.score, page.tconst, limit])
+        
+        if format != "json":
+            table = fetch_columns(result, format, rank_start=offset + 1)
+            total_count = table.pop("total_count") if page is None else None
+            last_score, last_tconst = table.pop("seek_score", -1), table.value("tconst", -1)
+            result_count = table.num_rows
+        else:
+            results = result.fetchall()
+            total_count = results[0][10] if results and page is None else None
+            last_score, last_tconst = (results[-1][9], results[-1][0]) if results else (None, None)
+            result_count = len(results)
+        
+        if page is not None:
+            total_count = page.total_count
+        elif not result_count and offset > 0:
+            # Page past the end: count separately
+            total_count = con.execute(
+                f"SELECT COUNT(*) FROM series_stats WHERE {where_clause}", params
+            ).fetchone()[0]
+        elif not result_count:
+            total_count = 0
+        
+        envelope = {
+            "filters": filters,
             "total_count": total_count,
-            "result_count": len(results),
+            "result_count": result_count,
             "offset": offset,
             "limit": limit,
+            "next_cursor": next_page_cursor(
+                filters, offset, total_count, last_score, last_tconst, result_count
+            )
+        }
+        if format != "json":
+            return table_response(table, envelope, "series")
+        
+        return {
+            **envelope,
             "series": [
                 {
                     "rank": offset + idx + 1,
@@ -1271,18 +2129,45 @@ async def browse_tv(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Movies have no precomputed ranking, so the score is computed per row
+MOVIE_RANK_SCORE = "LN(1 + CAST(tr.numVotes AS DOUBLE)) * tr.averageRating"
+
+
 @app.get("/browse_movies")
-async def browse_movies(
-    genre: Optional[str] = Query(None, description="Filter by genre"),
+@cached("browse_movies")
+@offload
+def browse_movies(
+    genre: Optional[str] = Query(None, description=GENRE_FILTER_HELP),
     start_year: Optional[int] = Query(None, description="Minimum release year"),
     end_year: Optional[int] = Query(None, description="Maximum release year"),
     min_rating: Optional[float] = Query(None, description="Minimum rating"),
     max_rating: Optional[float] = Query(None, description="Maximum rating"),
     min_votes: Optional[int] = Query(None, description="Minimum number of votes"),
     offset: int = Query(0, description="Pagination offset"),
-    limit: int = Query(20, description="Number of results", le=100)
+    limit: int = Query(20, description="Number of results", le=100),
+    format: str = Query("json", description=FORMAT_HELP),
+    cursor: Optional[str] = Query(None, description=PAGE_CURSOR_HELP)
 ):
-    """Browse movies ranked by quality score: ln(1 + total_votes) * rating"""
+    """
+    Browse movies ranked by quality score: ln(1 + total_votes) * rating
+    
+    Paginates like /browse_tv, with offset or next_cursor.
+    """
+    check_table_format(format)
+    filters = {
+        "genre": genre,
+        "start_year": start_year,
+        "end_year": end_year,
+        "min_rating": min_rating,
+        "max_rating": max_rating,
+        "min_votes": min_votes
+    }
+    page = None
+    if cursor:
+        if offset:
+            raise HTTPException(status_code=400, detail="Pass either cursor or offset, not both")
+        page = decode_page_cursor(cursor, filters)
+        offset = page.position
     try:
         con = get_connection()
         
@@ -1290,8 +2175,9 @@ async def browse_movies(
         params = []
         
         if genre:
-            conditions.append("LOWER(tb.genres) LIKE LOWER(?)")
-            params.append(f"%{genre}%")
+            genre_sql, genre_params = genre_condition("tb.genre_mask", genre)
+            conditions.append(genre_sql)
+            params.extend(genre_params)
         
         if start_year:
             conditions.append("tb.startYear >= ?")
@@ -1315,48 +2201,81 @@ async def browse_movies(
         
         where_clause = " AND ".join(conditions)
         
-        query = f"""
-            SELECT 
+        # Columnar formats compute the row format's fields in SQL (ordering
+        # and the cursor still use the unrounded score)
+        if format == "json":
+            columns = f"""
                 tb.tconst,
                 tb.primaryTitle,
                 tb.startYear,
                 tb.genres,
                 tr.averageRating,
                 tr.numVotes,
-                LN(1 + CAST(tr.numVotes AS DOUBLE)) * tr.averageRating as rank_score
-            FROM title_basics tb
-            JOIN title_ratings tr ON tb.tconst = tr.tconst
-            WHERE {where_clause}
-            ORDER BY rank_score DESC
-            LIMIT ? OFFSET ?
-        """
+                {MOVIE_RANK_SCORE} as rank_score"""
+        else:
+            columns = f"""
+                {MOVIE_RANK_SCORE} AS seek_score,
+                ROUND({MOVIE_RANK_SCORE}, 2) AS rank_score,
+                tb.tconst,
+                tb.primaryTitle AS title,
+                tb.startYear AS year,
+                tb.genres,
+                ROUND(tr.averageRating, 2) AS rating,
+                tr.numVotes AS votes"""
         
-        params.extend([limit, offset])
-        results = con.execute(query, params).fetchall()
+        if page is None:
+            seek_clause, page_params = "", [limit, offset]
+        else:
+            seek_clause = f"AND {MOVIE_RANK_SCORE} <= ? AND ({MOVIE_RANK_SCORE} < ? OR tb.tconst > ?)"
+            page_params = [page.score, page.score, page.tconst, limit, 0]
         
-        # Get total count
-        count_params = params[:-2]  # Remove limit and offset
-        count_query = f"""
-            SELECT COUNT(*)
+        query = f"""
+            SELECT {columns}
             FROM title_basics tb
             JOIN title_ratings tr ON tb.tconst = tr.tconst
             WHERE {where_clause}
+                {seek_clause}
+            ORDER BY {MOVIE_RANK_SCORE} DESC, tb.tconst
+            LIMIT ? OFFSET ?
         """
-        total_count = con.execute(count_query, count_params).fetchone()[0]
         
-        return {
-            "filters": {
-                "genre": genre,
-                "start_year": start_year,
-                "end_year": end_year,
-                "min_rating": min_rating,
-                "max_rating": max_rating,
-                "min_votes": min_votes
-            },
+        result = con.execute(query, params + page_params)
+        if format != "json":
+            table = fetch_columns(result, format, rank_start=offset + 1)
+            last_score, last_tconst = table.pop("seek_score", -1), table.value("tconst", -1)
+            result_count = table.num_rows
+        else:
+            results = result.fetchall()
+            last_score, last_tconst = (results[-1][6], results[-1][0]) if results else (None, None)
+            result_count = len(results)
+        
+        if page is None:
+            # Get total count
+            count_query = f"""
+                SELECT COUNT(*)
+                FROM title_basics tb
+                JOIN title_ratings tr ON tb.tconst = tr.tconst
+                WHERE {where_clause}
+            """
+            total_count = con.execute(count_query, params).fetchone()[0]
+        else:
+            total_count = page.total_count
+        
+        envelope = {
+            "filters": filters,
             "total_count": total_count,
-            "result_count": len(results),
+            "result_count": result_count,
             "offset": offset,
             "limit": limit,
+            "next_cursor": next_page_cursor(
+                filters, offset, total_count, last_score, last_tconst, result_count
+            )
+        }
+        if format != "json":
+            return table_response(table, envelope, "movies")
+        
+        return {
+            **envelope,
             "movies": [
                 {
                     "rank": offset + idx + 1,
@@ -1391,7 +2310,9 @@ async def ranked_tv(
         min_seasons=None,
         max_seasons=None,
         offset=0,
-        limit=limit
+        limit=limit,
+        format="json",
+        cursor=None
     )
 
 
@@ -1408,12 +2329,72 @@ async def ranked_movies(
         max_rating=None,
         min_votes=None,
         offset=0,
-        limit=limit
+        limit=limit,
+        format="json",
+        cursor=None
     )
 
 
+@offload
+def open_series_graph(series):
+    """
+    Resolve a series and fetch its graph with one query.
+    
+    Returns (series_result, rows, season entries, series-wide fields).
+    """
+    con = get_connection()
+    series_result = resolve_title(con, "tvSeries", series)
+    if not series_result:
+        raise HTTPException(status_code=404, detail=f"Series not found: {series}")
+    columns = fetch_graph_columns(con, series_result.tconst)
+    if not len(columns[0]):
+        raise HTTPException(status_code=404, detail=f"No episodes found for: {series_result.title}")
+    season_entries, overview = graph_stats(columns[0], columns[3])
+    return series_result, graph_rows(columns), season_entries, overview
+
+
+async def stream_series_episode_graph(series, scale):
+    """
+    NDJSON /series_episode_graph: a header line with the series-wide
+    fields, each season's line followed by its episodes' lines, then the counts.
+    
+    The header needs the whole series' statistics, so the episodes are
+    fetched in one go and only the encoding is streamed.
+    """
+    series_result, rows, season_entries, overview = await open_series_graph(series)
+    episode_count = 0
+    seasons = []
+    
+    # Rows are ordered by episode_index, so each season is a contiguous run
+    def shape_rows(rows):
+        nonlocal episode_count
+        episode_count += len(rows)
+        for row in rows:
+            if not seasons or seasons[-1] != row[0]:
+                seasons.append(row[0])
+                yield {"type": "season", **season_entries[len(seasons) - 1]}
+            yield {"type": "episode", **graph_episode(row)}
+    
+    header = {
+        "type": "header",
+        "series": series_result.title,
+        "tconst": series_result.tconst,
+        "scale": scale,
+        "overall_trendline": overview["overall_trendline"],
+        "rating_range": overview["rating_range"]
+    }
+    
+    def trailer():
+        return {"episode_count": episode_count, "season_count": len(seasons)}
+    
+    return ndjson_response(header, None, rows, shape_rows, trailer)
+
+
 @app.get("/series_episode_graph")
-async def series_episode_graph(
+@streamable(stream_series_episode_graph)
+@cached("series_episode_graph", resolves_titles=True)
+@offload
+def series_episode_graph(
     series: str = Query(..., description="Series name"),
     scale: str = Query("auto", description="Scale mode: auto, 0-10, or autoscale")
 ):
@@ -1422,143 +2403,27 @@ async def series_episode_graph(
         con = get_connection()
         
         # Resolve series
-        series_result = con.execute("""
-            SELECT tconst, primaryTitle
-            FROM title_basics
-            WHERE titleType = 'tvSeries'
-                AND LOWER(primaryTitle) = LOWER(?)
-            LIMIT 1
-        """, [series]).fetchone()
+        series_result = resolve_title(con, "tvSeries", series)
         
         if not series_result:
             raise HTTPException(status_code=404, detail=f"Series not found: {series}")
         
-        tconst, title = series_result
+        tconst, title = series_result.tconst, series_result.title
         
-        # Get all episodes
-        episodes_data = con.execute("""
-            SELECT
-                seasonNumber,
-                episodeNumber,
-                episode_title,
-                averageRating,
-                numVotes,
-                episode_tconst
-            FROM episode_panel
-            WHERE series_tconst = ?
-            ORDER BY seasonNumber, episodeNumber
-        """, [tconst]).fetchall()
+        # Episodes, season stats and trendlines in one pass
+        graph = compute_series_graph(con, tconst)
         
-        if not episodes_data:
+        if graph is None:
             raise HTTPException(status_code=404, detail=f"No episodes found for: {title}")
         
-        # Build episodes list with indices
-        episodes = []
-        episode_index = 0
-        for row in episodes_data:
-            episodes.append({
-                "season": row[0],
-                "episode": row[1],
-                "title": row[2],
-                "rating": row[3],
-                "votes": row[4],
-                "tconst": row[5],
-                "episode_index": episode_index
-            })
-            episode_index += 1
-        
-        # Calculate per-season statistics and trendlines
-        seasons_data = {}
-        for ep in episodes:
-            season_num = ep["season"]
-            if season_num not in seasons_data:
-                seasons_data[season_num] = []
-            seasons_data[season_num].append(ep)
-        
-        seasons = []
-        min_rating = float('inf')
-        max_rating = float('-inf')
-        
-        # Collect all ratings for overall trendline
-        all_indices = []
-        all_ratings = []
-        
-        for season_num in sorted(seasons_data.keys()):
-            season_eps = seasons_data[season_num]
-            ratings = [ep["rating"] for ep in season_eps]
-            indices = [ep["episode_index"] for ep in season_eps]
-            
-            all_indices.extend(indices)
-            all_ratings.extend(ratings)
-            
-            avg_rating = sum(ratings) / len(ratings)
-            min_rating = min(min_rating, min(ratings))
-            max_rating = max(max_rating, max(ratings))
-            
-            # Calculate linear trendline for season: y = mx + b
-            n = len(indices)
-            if n > 1:
-                mean_x = sum(indices) / n
-                mean_y = sum(ratings) / n
-                
-                numerator = sum((indices[i] - mean_x) * (ratings[i] - mean_y) for i in range(n))
-                denominator = sum((indices[i] - mean_x) ** 2 for i in range(n))
-                
-                if denominator != 0:
-                    slope = numerator / denominator
-                    intercept = mean_y - slope * mean_x
-                else:
-                    slope = 0
-                    intercept = mean_y
-            else:
-                slope = 0
-                intercept = ratings[0]
-            
-            seasons.append({
-                "season": season_num,
-                "episode_count": len(season_eps),
-                "avg_rating": round(avg_rating, 2),
-                "start_index": season_eps[0]["episode_index"],
-                "end_index": season_eps[-1]["episode_index"],
-                "trendline": {
-                    "slope": round(slope, 4),
-                    "intercept": round(intercept, 2)
-                }
-            })
-        
-        # Calculate overall trendline
-        n = len(all_indices)
-        if n > 1:
-            mean_x = sum(all_indices) / n
-            mean_y = sum(all_ratings) / n
-            
-            numerator = sum((all_indices[i] - mean_x) * (all_ratings[i] - mean_y) for i in range(n))
-            denominator = sum((all_indices[i] - mean_x) ** 2 for i in range(n))
-            
-            if denominator != 0:
-                overall_slope = numerator / denominator
-                overall_intercept = mean_y - overall_slope * mean_x
-            else:
-                overall_slope = 0
-                overall_intercept = mean_y
-        else:
-            overall_slope = 0
-            overall_intercept = all_ratings[0] if all_ratings else 0
-        
         return {
             "series": title,
             "tconst": tconst,
             "scale": scale,
-            "episodes": episodes,
-            "seasons": seasons,
-            "overall_trendline": {
-                "slope": round(overall_slope, 4),
-                "intercept": round(overall_intercept, 2)
-            },
-            "rating_range": {
-                "min": round(min_rating, 1),
-                "max": round(max_rating, 1)
-            }
+            "episodes": graph["episodes"],
+            "seasons": graph["seasons"],
+            "overall_trendline": graph["overall_trendline"],
+            "rating_range": graph["rating_range"]
         }
     
     except HTTPException:
@@ -1567,6 +2432,265 @@ async def series_episode_graph(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@offload
+def resolve_chart_series(series):
+    """Resolve the series of a /series_chart request."""
+    series_result = resolve_title(get_connection(), "tvSeries", series)
+    if not series_result:
+        raise HTTPException(status_code=404, detail=f"Series not found: {series}")
+    return series_result
+
+
+@offload
+def fetch_chart_graph(series_result):
+    """The episode graph a /series_chart render draws."""
+    graph = compute_series_graph(get_connection(), series_result.tconst)
+    if graph is None:
+        raise HTTPException(status_code=404, detail=f"No episodes found for: {series_result.title}")
+    return graph
+
+
+def render_chart_image(series_result, graph, fmt):
+    """Render an episode chart to image bytes; runs on chart_executor."""
+    series_info = {
+        "tconst": series_result.tconst,
+        "title": series_result.title,
+        "startYear": series_result.start_year,
+        "endYear": series_result.end_year
+    }
+    buffer = io.BytesIO()
+    save_series_chart(series_info, graph, buffer, fmt=fmt)
+    return buffer.getvalue()
+
+
+@app.get("/series_chart")
+async def series_chart(
+    request: Request,
+    series: str = Query(..., description="Series name"),
+    format: str = Query("png", description="Image format: png or svg")
+):
+    """
+    Episode rating chart for a series as a PNG or SVG image.
+    
+    Rendered images are cached per dataset version and resolved series,
+    and served with an ETag, so unchanged charts cost a 304 for clients
+    that revalidate. Only the graph query runs on the query pool; the
+    render runs on the single chart thread.
+    """
+    fmt = format.lower()
+    if fmt not in CHART_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'png' or 'svg'")
+    
+    try:
+        series_result = await resolve_chart_series(series)
+        # Keyed by tconst, so every spelling of a series shares one image
+        key = chart_cache.key("series_chart", {"tconst": series_result.tconst, "format": fmt})
+        body = chart_cache.get(key)
+        if body is None:
+            graph = await fetch_chart_graph(series_result)
+            start = time.perf_counter()
+            body = await asyncio.get_running_loop().run_in_executor(
+                chart_executor, render_chart_image, series_result, graph, fmt
+            )
+            add_time("handler", time.perf_counter() - start)
+            chart_cache.put(key, body)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CHART_MAX_AGE}"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=CHART_MEDIA_TYPES[fmt], headers=headers)
+
+
+# POST /batch: data endpoints (names as listed by GET /) callable as operations
+BATCH_ENDPOINTS = {
+    "resolve_series": resolve_series,
+    "episodes": get_episodes,
+    "top_episodes": get_top_episodes,
+    "worst_episodes": get_worst_episodes,
+    "search_series": search_series,
+    "compare_series": compare_series,
+    "series_analytics": series_analytics,
+    "series_episode_graph": series_episode_graph,
+    "search_movies": search_movies,
+    "movie_details": movie_details,
+    "compare_movies": compare_movies,
+    "top_movies": top_movies,
+    "genre_analysis": genre_analysis,
+    "decade_analysis": decade_analysis,
+    "browse_tv": browse_tv,
+    "browse_movies": browse_movies,
+    "ranked_tv": ranked_tv,
+    "ranked_movies": ranked_movies
+}
+
+# Parameters naming titles to resolve once per batch: name -> (title type, comma-separated)
+BATCH_TITLE_PARAMS = {
+    "series": ("tvSeries", False),
+    "name": ("tvSeries", False),
+    "series_names": ("tvSeries", True),
+    "title": ("movie", False),
+    "movie_titles": ("movie", True)
+}
+
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "20"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+BATCH_MAX_BYTES = int(float(os.getenv("BATCH_MAX_MB", "8")) * 1024 * 1024)
+BATCH_TIMEOUT = float(os.getenv("BATCH_TIMEOUT", "30"))
+
+
+class BatchOperation(BaseModel):
+    endpoint: str
+    params: Dict[str, Any] = {}
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+
+@functools.cache
+def batch_params_model(endpoint):
+    """
+    Pydantic model of an endpoint's query parameters.
+    
+    Built from the handler's signature, so operations get the same types,
+    defaults and limits (e.g. limit <= 100) as the GET endpoint.
+    """
+    fields = {
+        name: (parameter.annotation, parameter.default)
+        for name, parameter in inspect.signature(BATCH_ENDPOINTS[endpoint]).parameters.items()
+        if name not in STREAM_PARAMS
+    }
+    return create_model(f"{endpoint}_params", __config__=ConfigDict(extra="forbid"), **fields)
+
+
+def batch_title_names(operations):
+    """Distinct titles named by (endpoint, params) operations: {title_type: [names]}."""
+    names = {}
+    for _, params in operations:
+        for param, (title_type, is_list) in BATCH_TITLE_PARAMS.items():
+            value = params.get(param)
+            if not value:
+                continue
+            values = [name.strip() for name in value.split(",")] if is_list else [value]
+            names.setdefault(title_type, {}).update(dict.fromkeys(values))
+    return {title_type: list(values) for title_type, values in names.items()}
+
+
+@offload
+def resolve_batch_titles(names_by_type):
+    """Resolve every title a batch names, with one fallback query per title type."""
+    con = get_connection()
+    shared = {}
+    for title_type, names in names_by_type.items():
+        for name, match in zip(names, resolve_titles(con, title_type, names)):
+            shared[(title_type, name)] = match
+    return shared
+
+
+def batch_result(endpoint, status, body):
+    """One encoded entry of the batch results array (body is encoded JSON)."""
+    return b'{"endpoint":' + encode_json(endpoint) + b',"status":' + str(status).encode() + b',"body":' + body + b"}"
+
+
+def batch_error(endpoint, status, detail):
+    return batch_result(endpoint, status, encode_json({"detail": detail}))
+
+
+@app.post("/batch")
+async def batch(request: BatchRequest):
+    """
+    Run several read operations in one round-trip.
+    
+    Each operation names an endpoint from GET / and its query parameters.
+    Operations run concurrently on the query pool (at most
+    BATCH_MAX_CONCURRENCY at a time), share the response cache with the
+    GET endpoints, and titles named by several operations are resolved
+    once. Results come back in request order with their own status, so a
+    failing operation does not fail the batch.
+    """
+    operations = request.operations
+    if not operations:
+        raise HTTPException(status_code=400, detail="operations must not be empty")
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BATCH_MAX_OPERATIONS} operations per batch (got {len(operations)})"
+        )
+    
+    # Validate every operation before running any
+    results = [None] * len(operations)
+    prepared = {}
+    for index, operation in enumerate(operations):
+        endpoint = operation.endpoint.lstrip("/")
+        if endpoint not in BATCH_ENDPOINTS:
+            results[index] = batch_error(endpoint, 404, f"Unknown or non-batchable endpoint: {operation.endpoint}")
+            continue
+        try:
+            params = batch_params_model(endpoint)(**operation.params)
+        except ValidationError as e:
+            results[index] = batch_error(endpoint, 422, e.errors(include_url=False, include_context=False))
+            continue
+        prepared[index] = (endpoint, params.model_dump())
+    
+    names = batch_title_names(prepared.values())
+    shared = await resolve_batch_titles(names) if names else {}
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    
+    async def run_operation(endpoint, params):
+        async with semaphore:
+            return await BATCH_ENDPOINTS[endpoint](**params)
+    
+    # Tasks copy the context at creation, so they (and their query pool
+    # calls) see this batch's resolved titles
+    token = batch_resolutions.set(shared)
+    try:
+        tasks = {
+            index: asyncio.ensure_future(run_operation(endpoint, params))
+            for index, (endpoint, params) in prepared.items()
+        }
+    finally:
+        batch_resolutions.reset(token)
+    if tasks:
+        await asyncio.wait(tasks.values(), timeout=BATCH_TIMEOUT)
+    
+    total_bytes = 0
+    for index, task in tasks.items():
+        endpoint = prepared[index][0]
+        if not task.done():
+            task.cancel()
+            results[index] = batch_error(endpoint, 504, f"Operation did not finish within {BATCH_TIMEOUT:g}s")
+            continue
+        error = task.exception()
+        if isinstance(error, HTTPException):
+            results[index] = batch_error(endpoint, error.status_code, error.detail)
+            continue
+        if error is not None:
+            results[index] = batch_error(endpoint, 500, str(error))
+            continue
+        response = task.result()
+        if isinstance(response, Response) and response.media_type != "application/json":
+            results[index] = batch_error(endpoint, 400, f"{response.media_type} responses cannot be batched")
+            continue
+        if isinstance(response, Response):
+            status, body = response.status_code, response.body
+        else:
+            status, body = 200, encode_json(response)
+        total_bytes += len(body)
+        if total_bytes > BATCH_MAX_BYTES:
+            results[index] = batch_error(
+                endpoint, 413, f"Batch response exceeds {BATCH_MAX_BYTES // (1024 * 1024)} MB"
+            )
+            continue
+        results[index] = batch_result(endpoint, status, body)
+    
+    return Response(content=b'{"results":[' + b",".join(results) + b"]}", media_type="application/json")
+
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", "8000"))
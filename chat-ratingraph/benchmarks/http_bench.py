@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the IMDb API.
+
+run      Replays a weighted mix of the endpoints listed by GET / against a
+         running server (or one started with --serve) from N keep-alive
+         clients, and writes throughput and p50/p95/p99 latency per endpoint
+         as JSON. Request parameters are drawn from titles and genres the
+         server itself returns, with a seeded RNG per client, so the same
+         options replay the same request sequence.
+compare  Diffs two result files and flags endpoints whose latency grew or
+         whose throughput dropped by more than a threshold. Exits with
+         status 1 if anything regressed.
+
+Usage:
+    python benchmarks/http_bench.py run --serve bench_data/imdb.duckdb --output base.json
+    python benchmarks/http_bench.py run --url http://127.0.0.1:8000 --concurrency 16 --duration 60
+    python benchmarks/http_bench.py run --serve bench_data/imdb.duckdb --server-env RESPONSE_CACHE_MB=0
+    python benchmarks/http_bench.py compare base.json new.json --threshold 10
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import socket
+import random
+import platform
+import argparse
+import itertools
+import threading
+import subprocess
+import http.client
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+RESULTS_FORMAT = 1
+
+PERCENTILES = (50, 95, 99)
+
+# Latency metrics regress upwards, throughput downwards
+COMPARE_METRICS = {"p50_ms": 1, "p95_ms": 1, "p99_ms": 1, "throughput_rps": -1}
+
+
+def _q(path, **params):
+    params = {name: value for name, value in params.items() if value is not None}
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+def _maybe(rng, value, probability=0.5):
+    return value if rng.random() < probability else None
+
+
+def _chat_turn(rng, fx):
+    """POST /batch body with the lookups one assistant turn makes for a series."""
+    series = rng.choice(fx["series"])
+    operations = [
+        {"endpoint": "resolve_series", "params": {"name": series}},
+        {"endpoint": "top_episodes", "params": {"series": series, "min_votes": 0, "limit": 5}},
+        {"endpoint": "series_analytics", "params": {"series": series}},
+        {"endpoint": "series_episode_graph", "params": {"series": series}}
+    ]
+    return "/batch", {"operations": operations[:rng.randint(2, len(operations))]}
+
+
+# Endpoint name (as listed by GET /) -> (weight, request builder). Builders
+# return a GET path, or (path, JSON body) for a POST. Weights approximate
+# chat traffic: series lookups dominate, admin endpoints are rare.
+ENDPOINT_MIX = {
+    "root": (1, lambda rng, fx: "/"),
+    "health": (1, lambda rng, fx: "/health"),
+    "livez": (1, lambda rng, fx: "/livez"),
+    "readyz": (1, lambda rng, fx: "/readyz"),
+    "cache_stats": (1, lambda rng, fx: "/cache_stats"),
+    "metrics": (1, lambda rng, fx: "/metrics"),
+    "slow_queries": (1, lambda rng, fx: _q("/admin/slow_queries", limit=20)),
+    "db_settings": (1, lambda rng, fx: "/admin/db_settings"),
+    "resolve_series": (10, lambda rng, fx: _q("/resolve_series", name=rng.choice(fx["series"]))),
+    "episodes": (8, lambda rng, fx: _q("/episodes", series=rng.choice(fx["series"]))),
+    "top_episodes": (8, lambda rng, fx: _q(
+        "/top_episodes", series=rng.choice(fx["series"]), min_votes=rng.choice((0, 10, 100)),
+        limit=rng.choice((5, 10, 20)))),
+    "worst_episodes": (4, lambda rng, fx: _q(
+        "/worst_episodes", series=rng.choice(fx["series"]), min_votes=rng.choice((0, 10, 100)))),
+    "search_series": (6, lambda rng, fx: _q(
+        "/search_series", query=_maybe(rng, rng.choice(fx["series"])[:4]),
+        genre=_maybe(rng, rng.choice(fx["genres"])), start_year=_maybe(rng, rng.randint(1960, 2020), 0.3),
+        min_rating=_maybe(rng, rng.choice((6, 7, 8)), 0.3))),
+    "compare_series": (3, lambda rng, fx: _q(
+        "/compare_series", series_names=",".join(rng.sample(fx["series"], min(3, len(fx["series"])))))),
+    "series_analytics": (6, lambda rng, fx: _q("/series_analytics", series=rng.choice(fx["series"]))),
+    "search_movies": (6, lambda rng, fx: _q(
+        "/search_movies", query=_maybe(rng, rng.choice(fx["movies"])[:4]),
+        genre=_maybe(rng, rng.choice(fx["genres"])), start_year=_maybe(rng, rng.randint(1960, 2020), 0.3),
+        min_rating=_maybe(rng, rng.choice((6, 7, 8)), 0.3), min_votes=_maybe(rng, 1000, 0.3))),
+    "movie_details": (6, lambda rng, fx: _q("/movie_details", title=rng.choice(fx["movies"]))),
+    "compare_movies": (3, lambda rng, fx: _q(
+        "/compare_movies", movie_titles=",".join(rng.sample(fx["movies"], min(3, len(fx["movies"])))))),
+    "top_movies": (4, lambda rng, fx: _q(
+        "/top_movies", genre=_maybe(rng, rng.choice(fx["genres"])),
+        start_year=_maybe(rng, rng.randint(1970, 2015), 0.3), min_votes=rng.choice((100, 1000, 10000)))),
+    "genre_analysis": (2, lambda rng, fx: _q(
+        "/genre_analysis", title_type=rng.choice(("movie", "tvSeries")), min_votes=rng.choice((100, 1000)),
+        group_by=rng.choice(("combination", "genre")))),
+    "decade_analysis": (2, lambda rng, fx: _q(
+        "/decade_analysis", title_type=rng.choice(("movie", "tvSeries")), min_votes=rng.choice((100, 1000)))),
+    "browse_tv": (8, lambda rng, fx: _q(
+        "/browse_tv", genre=_maybe(rng, rng.choice(fx["genres"])),
+        start_year=_maybe(rng, rng.randint(1960, 2020), 0.3), min_rating=_maybe(rng, rng.choice((6, 7, 8)), 0.3),
+        min_seasons=_maybe(rng, rng.choice((2, 3, 5)), 0.2), offset=rng.choice((0, 0, 0, 20, 40)), limit=20)),
+    "browse_movies": (6, lambda rng, fx: _q(
+        "/browse_movies", genre=_maybe(rng, rng.choice(fx["genres"])),
+        start_year=_maybe(rng, rng.randint(1960, 2020), 0.3), min_rating=_maybe(rng, rng.choice((6, 7, 8)), 0.3),
+        min_votes=_maybe(rng, 1000, 0.3), offset=rng.choice((0, 0, 0, 20, 40)), limit=20)),
+    "ranked_tv": (3, lambda rng, fx: _q("/ranked_tv", limit=rng.choice((10, 20, 50)))),
+    "ranked_movies": (3, lambda rng, fx: _q("/ranked_movies", limit=rng.choice((10, 20, 50)))),
+    "series_episode_graph": (6, lambda rng, fx: _q(
+        "/series_episode_graph", series=rng.choice(fx["series"]), scale=rng.choice(("auto", "0-10")))),
+    "series_chart": (2, lambda rng, fx: _q(
+        "/series_chart", series=rng.choice(fx["series"]), format=rng.choice(("png", "svg")))),
+    "batch": (3, _chat_turn),
+}
+
+
+class Client:
+    """One keep-alive HTTP connection, reopened after errors."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.connection = None
+
+    def get(self, path, json_body=None):
+        """GET a path, or POST json_body to it; returns (status, body). Raises on connection errors."""
+        if self.connection is None:
+            self.connection = self.connection_class(self.host, self.port, timeout=self.timeout)
+        try:
+            if json_body is None:
+                self.connection.request("GET", self.prefix + path)
+            else:
+                self.connection.request("POST", self.prefix + path, body=json.dumps(json_body).encode("utf-8"),
+                                        headers={"Content-Type": "application/json"})
+            response = self.connection.getresponse()
+            return response.status, response.read()
+        except Exception:
+            self.close()
+            raise
+
+    def get_json(self, path):
+        status, body = self.get(path)
+        if status != 200:
+            raise RuntimeError(f"GET {path} returned {status}: {body[:200]!r}")
+        return json.loads(body)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def discover_fixture(client, size=100):
+    """Series titles, movie titles and genres to draw request parameters from."""
+    series = client.get_json(f"/ranked_tv?limit={size}")["series"]
+    movies = client.get_json(f"/ranked_movies?limit={size}")["movies"]
+    if not series or not movies:
+        raise RuntimeError("The server returned no ranked series or movies to benchmark with")
+    genres = sorted({
+        genre
+        for row in series + movies if row["genres"]
+        for genre in row["genres"].split(",")
+    })
+    return {
+        "series": [row["title"] for row in series],
+        "movies": [row["title"] for row in movies],
+        "genres": genres or ["Drama"]
+    }
+
+
+def listed_endpoints(client):
+    """Endpoint names advertised by GET /."""
+    root = client.get_json("/")
+    return {name for group in root.values() if isinstance(group, dict) for name in group}
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))]
+
+
+def summarize(samples, seconds):
+    """Aggregate (latency_seconds, status, bytes) samples into a result row."""
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    # 4xx are answers too (e.g. no episodes above min_votes); only 5xx and
+    # transport failures count as errors
+    errors = sum(1 for sample in samples if sample[1] is None or sample[1] >= 500)
+    statuses = {}
+    for sample in samples:
+        status = str(sample[1]) if sample[1] is not None else "failed"
+        statuses[status] = statuses.get(status, 0) + 1
+    row = {
+        "requests": len(samples),
+        "errors": errors,
+        "statuses": dict(sorted(statuses.items())),
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / seconds, 2) if seconds else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "max_ms": round(latencies[-1], 3) if latencies else None,
+        "mean_bytes": int(sum(sample[2] for sample in samples) / len(samples)) if samples else 0
+    }
+    for p in PERCENTILES:
+        value = percentile(latencies, p)
+        row[f"p{p}_ms"] = round(value, 3) if value is not None else None
+    return row
+
+
+def drive(base_url, mix, fixture, concurrency, seconds, max_requests, seed, timeout):
+    """
+    Run closed-loop clients for a duration (or request budget).
+
+    Returns ({endpoint: [(latency_seconds, status, bytes)]}, elapsed seconds).
+    Status is None for requests that failed without a response.
+    """
+    names = list(mix)
+    cum_weights = list(itertools.accumulate(mix[name][0] for name in names))
+    issued = itertools.count()
+    per_thread = []
+
+    def client_loop(index):
+        rng = random.Random(f"{seed}:{index}")
+        client = Client(base_url, timeout)
+        samples = {}
+        per_thread.append(samples)
+        try:
+            while time.perf_counter() < deadline:
+                if max_requests and next(issued) >= max_requests:
+                    break
+                name = rng.choices(names, cum_weights=cum_weights)[0]
+                request = mix[name][1](rng, fixture)
+                path, json_body = request if isinstance(request, tuple) else (request, None)
+                start = time.perf_counter()
+                try:
+                    status, body = client.get(path, json_body)
+                    size = len(body)
+                except Exception:
+                    status, size = None, 0
+                samples.setdefault(name, []).append((time.perf_counter() - start, status, size))
+        finally:
+            client.close()
+
+    started = time.perf_counter()
+    deadline = started + seconds
+    threads = [threading.Thread(target=client_loop, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    merged = {}
+    for samples in per_thread:
+        for name, values in samples.items():
+            merged.setdefault(name, []).extend(values)
+    return merged, elapsed
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path, server_env, startup_timeout=120):
+    """Start uvicorn on a free local port serving db_path; returns (process, base_url)."""
+    port = free_port()
+    env = dict(os.environ, DB_PATH=str(Path(db_path).resolve()))
+    env.update(server_env)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "03_serve_api:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=APP_DIR, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    client = Client(base_url, timeout=5)
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode} during startup")
+        try:
+            # Ready once the server's warm-up has finished (WARMUP=off skips it)
+            if client.get("/readyz")[0] == 200:
+                return process, base_url
+        except OSError:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError(f"Server did not become ready within {startup_timeout}s")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(overrides, only):
+    """ENDPOINT_MIX with --mix weight overrides and an optional --only filter applied."""
+    mix = dict(ENDPOINT_MIX)
+    for override in overrides:
+        name, _, weight = override.partition("=")
+        if name not in mix:
+            raise SystemExit(f"Unknown endpoint in --mix: {name} (known: {', '.join(sorted(mix))})")
+        mix[name] = (float(weight), mix[name][1])
+    if only:
+        wanted = [name.strip() for name in only.split(",")]
+        unknown = [name for name in wanted if name not in mix]
+        if unknown:
+            raise SystemExit(f"Unknown endpoint in --only: {', '.join(unknown)}")
+        mix = {name: mix[name] for name in wanted}
+    mix = {name: entry for name, entry in mix.items() if entry[0] > 0}
+    if not mix:
+        raise SystemExit("The endpoint mix is empty")
+    return mix
+
+
+def print_results(results):
+    header = f"{'endpoint':<22} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(results["endpoints"].items()) + [("TOTAL", results["summary"])]
+    for name, row in rows:
+        cells = [f"{row[f'p{p}_ms']:>9.2f}" if row[f"p{p}_ms"] is not None else f"{'-':>9}" for p in PERCENTILES]
+        print(f"{name:<22} {row['requests']:>7} {row['errors']:>5} {row['throughput_rps']:>8.1f} {' '.join(cells)}")
+
+
+def run(args):
+    mix = parse_mix(args.mix, args.only)
+    server_env = dict(item.split("=", 1) for item in args.server_env)
+    process = None
+    base_url = args.url.rstrip("/")
+    if args.serve:
+        print(f"🚀 Starting API server for {args.serve}...")
+        process, base_url = start_server(args.serve, server_env)
+    try:
+        client = Client(base_url, args.timeout)
+        fixture = discover_fixture(client)
+        advertised = listed_endpoints(client)
+        health = client.get_json("/health")
+        client.close()
+        missing = sorted(advertised - set(ENDPOINT_MIX))
+        if missing:
+            print(f"⚠️  Endpoints listed by GET / but not in the benchmark mix: {', '.join(missing)}")
+
+        if args.warmup > 0:
+            print(f"🔥 Warming up for {args.warmup:g}s...")
+            drive(base_url, mix, fixture, args.concurrency, args.warmup, 0, f"warmup:{args.seed}", args.timeout)
+
+        budget = f"{args.requests:,} requests" if args.requests else f"{args.duration:g}s"
+        print(f"⏱️  Running {len(mix)} endpoints with {args.concurrency} clients for {budget}...")
+        duration = args.duration if not args.requests else float("inf")
+        samples, elapsed = drive(base_url, mix, fixture, args.concurrency, duration,
+                                 args.requests, args.seed, args.timeout)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    all_samples = [sample for values in samples.values() for sample in values]
+    results = {
+        "format": RESULTS_FORMAT,
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "url": base_url if not args.serve else None,
+            "database": str(Path(args.serve).resolve()) if args.serve else health.get("database"),
+            "titles_count": health.get("titles_count"),
+            "server_env": server_env,
+            "git_commit": git_commit(),
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 3),
+            "warmup_s": args.warmup,
+            "seed": args.seed,
+            "mix": {name: weight for name, (weight, _) in mix.items()},
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "summary": summarize(all_samples, elapsed),
+        "endpoints": {name: summarize(samples[name], elapsed) for name in sorted(samples)}
+    }
+
+    print()
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+def compare_results(base, new, threshold, min_requests=20, min_delta_ms=1.0):
+    """
+    Per-endpoint metric changes between two result files.
+
+    A latency metric regresses when it grows by more than threshold percent
+    and by at least min_delta_ms; throughput regresses when it drops by more
+    than threshold percent. Endpoints with fewer than min_requests samples in
+    either run are reported but never flagged. The error rate regresses when
+    it grows by more than a percentage point.
+    """
+    rows = []
+    base_rows = dict(base["endpoints"], TOTAL=base["summary"])
+    new_rows = dict(new["endpoints"], TOTAL=new["summary"])
+    for name in sorted(set(base_rows) | set(new_rows), key=lambda name: (name == "TOTAL", name)):
+        before, after = base_rows.get(name), new_rows.get(name)
+        if before is None or after is None:
+            rows.append({"endpoint": name, "status": "only in base" if after is None else "only in new"})
+            continue
+        sparse = min(before["requests"], after["requests"]) < min_requests
+        changes = {}
+        regressed = []
+        for metric, direction in COMPARE_METRICS.items():
+            old_value, new_value = before.get(metric), after.get(metric)
+            if not old_value or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value * 100
+            changes[metric] = {"base": old_value, "new": new_value, "change_pct": round(change, 1)}
+            worse = change * direction > threshold
+            if metric.endswith("_ms") and new_value - old_value < min_delta_ms:
+                worse = False
+            if worse and not sparse:
+                regressed.append(metric)
+        if after["error_rate"] - before["error_rate"] > 0.01 and not sparse:
+            regressed.append("error_rate")
+        changes["error_rate"] = {"base": before["error_rate"], "new": after["error_rate"]}
+        rows.append({
+            "endpoint": name,
+            "status": "regressed" if regressed else ("too few samples" if sparse else "ok"),
+            "regressed": regressed,
+            "metrics": changes
+        })
+    return rows
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    for key in ("concurrency", "mix", "database", "titles_count", "server_env"):
+        if base["meta"].get(key) != new["meta"].get(key):
+            print(f"⚠️  Runs differ in {key}: {base['meta'].get(key)!r} vs {new['meta'].get(key)!r}")
+
+    rows = compare_results(base, new, args.threshold, args.min_requests, args.min_delta_ms)
+    metrics = list(COMPARE_METRICS)
+    header = f"{'endpoint':<22} " + " ".join(f"{metric:>22}" for metric in metrics) + "  status"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        cells = []
+        for metric in metrics:
+            change = row.get("metrics", {}).get(metric)
+            if change is None:
+                cells.append(f"{'-':>22}")
+            else:
+                flag = "!" if metric in row["regressed"] else " "
+                cell = f"{change['base']:.1f}→{change['new']:.1f} ({change['change_pct']:+.0f}%){flag}"
+                cells.append(f"{cell:>22}")
+        print(f"{row['endpoint']:<22} " + " ".join(cells) + f"  {row['status']}")
+
+    regressions = [row for row in rows if row["status"] == "regressed"]
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"threshold_pct": args.threshold, "endpoints": rows}, f, indent=2)
+    if regressions:
+        print(f"\n❌ {len(regressions)} endpoint(s) regressed by more than {args.threshold:g}%: "
+              f"{', '.join(row['endpoint'] for row in regressions)}")
+        return 1
+    print(f"\n✅ No regressions beyond {args.threshold:g}%")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP load test and regression check for the IMDb API.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Replay the endpoint mix and record latency and throughput")
+    target = run_parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of a running server")
+    target.add_argument("--serve", metavar="DB_PATH",
+                        help="Start a local server for this database (or Parquet directory) on a free port")
+    run_parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                            help="Environment for the --serve server, e.g. RESPONSE_CACHE_MB=0 (repeatable)")
+    run_parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (default: 8)")
+    run_parser.add_argument("--duration", type=float, default=30, help="Measured seconds (default: 30)")
+    run_parser.add_argument("--requests", type=int, default=0,
+                            help="Stop after this many requests instead of after --duration")
+    run_parser.add_argument("--warmup", type=float, default=5, help="Unmeasured warm-up seconds (default: 5)")
+    run_parser.add_argument("--seed", type=int, default=1, help="Seed of the request sequence (default: 1)")
+    run_parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    run_parser.add_argument("--mix", action="append", default=[], metavar="ENDPOINT=WEIGHT",
+                            help="Override an endpoint's weight; 0 removes it (repeatable)")
+    run_parser.add_argument("--only", help="Comma-separated endpoints to run, with their default weights")
+    run_parser.add_argument("--output", help="Write results JSON to this file")
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions between two result files")
+    compare_parser.add_argument("base", help="Results JSON of the baseline run")
+    compare_parser.add_argument("new", help="Results JSON of the run to check")
+    compare_parser.add_argument("--threshold", type=float, default=10,
+                                help="Percent change counted as a regression (default: 10)")
+    compare_parser.add_argument("--min-requests", type=int, default=20,
+                                help="Ignore endpoints with fewer samples than this (default: 20)")
+    compare_parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                                help="Ignore latency changes smaller than this many ms (default: 1)")
+    compare_parser.add_argument("--output", help="Write the comparison as JSON to this file")
+
+    commands.add_parser("list", help="Show the endpoint mix and weights")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "run":
+        return run(args)
+    if args.command == "compare":
+        return compare(args)
+    total = sum(weight for weight, _ in ENDPOINT_MIX.values())
+    for name, (weight, _) in ENDPOINT_MIX.items():
+        print(f"{name:<22} {weight:>4g}  ({weight / total:.1%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
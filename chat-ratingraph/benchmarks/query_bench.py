@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Per-statement and per-block microbenchmarks for 03_serve_api.py.
+
+run      Calls each endpoint's handler directly (no HTTP, no response cache)
+         against a fixture database and records every SQL statement it
+         executes. Each statement is then re-run on its own --repeat times
+         and its EXPLAIN plan is stored next to the timings. The handler's
+         Python time (handler time outside DuckDB) and JSON encoding time
+         are measured per endpoint. Standalone Python blocks are timed
+         separately: graph shaping and trendlines, name resolution, and
+         chart rendering.
+compare  Diffs two result files by statement/block id. Flags median time
+         regressions beyond a threshold and any change of plan shape (join
+         order, scan type, operators), so a lost index scan shows up next
+         to the timing it caused. Exits with status 1 if either happened.
+
+Usage:
+    python benchmarks/query_bench.py run --db bench_data/imdb.duckdb --output queries.json
+    python benchmarks/query_bench.py run --db bench_data/imdb.duckdb --only series_analytics,browse_tv --plans
+    python benchmarks/query_bench.py compare before.json after.json --threshold 20 --show-plans
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import difflib
+import hashlib
+import inspect
+import argparse
+import platform
+import importlib
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+import series_graph
+from metrics import add_query_listener, timed_call
+from series_chart import new_figure, save_series_chart
+from slow_query_log import fingerprint
+
+RESULTS_FORMAT = 1
+
+# The series_graph.*_long blocks' series: a long-running daily show
+LONG_SERIES_EPISODES = 20000
+LONG_SERIES_SEASON_EPISODES = 250
+
+# Endpoint cases: name -> (handler function in 03_serve_api, path, parameters).
+# String parameters are formatted with the fixture (--series, --movie, ...).
+ENDPOINT_CASES = {
+    "health": ("health", "/health", {}),
+    "resolve_series": ("resolve_series", "/resolve_series", {"name": "{series}"}),
+    "episodes": ("get_episodes", "/episodes", {"series": "{series}"}),
+    "top_episodes": ("get_top_episodes", "/top_episodes", {"series": "{series}", "min_votes": 0}),
+    "worst_episodes": ("get_worst_episodes", "/worst_episodes", {"series": "{series}", "min_votes": 0}),
+    "search_series": ("search_series", "/search_series", {"query": "the", "genre": "{genre}"}),
+    "compare_series": ("compare_series", "/compare_series", {"series_names": "{series_list}"}),
+    "series_analytics": ("series_analytics", "/series_analytics", {"series": "{series}"}),
+    "search_movies": ("search_movies", "/search_movies", {"query": "the", "genre": "{genre}"}),
+    "movie_details": ("movie_details", "/movie_details", {"title": "{movie}"}),
+    "compare_movies": ("compare_movies", "/compare_movies", {"movie_titles": "{movie_list}"}),
+    "top_movies": ("top_movies", "/top_movies", {"genre": "{genre}", "min_votes": 1000}),
+    "genre_analysis": ("genre_analysis", "/genre_analysis", {"title_type": "movie", "group_by": "genre"}),
+    "decade_analysis": ("decade_analysis", "/decade_analysis", {"title_type": "movie"}),
+    "browse_tv": ("browse_tv", "/browse_tv", {"genre": "{genre}", "min_rating": 7}),
+    "browse_movies": ("browse_movies", "/browse_movies", {"genre": "{genre}", "min_rating": 7}),
+    "series_episode_graph": ("series_episode_graph", "/series_episode_graph", {"series": "{series}"}),
+}
+
+# Timing compared between runs
+COMPARE_METRIC = "median_ms"
+
+
+def timing_stats(samples):
+    """Summary of a list of durations in seconds."""
+    values = sorted(sample * 1000 for sample in samples)
+    return {
+        "runs": len(values),
+        "min_ms": round(values[0], 4),
+        "median_ms": round(values[len(values) // 2], 4),
+        "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 4),
+        "max_ms": round(values[-1], 4)
+    }
+
+
+def measure(fn, repeat, warmup=1):
+    """Run fn warmup + repeat times; returns timing_stats of the measured runs."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return timing_stats(samples)
+
+
+def _plan_node(node):
+    """Plan tree node without estimates (they move with the data, not the plan)."""
+    extra = {key: value for key, value in node.get("extra_info", {}).items() if key != "Estimated Cardinality"}
+    return {"name": node["name"], "extra_info": extra, "children": [_plan_node(child) for child in node["children"]]}
+
+
+def _plan_outline(node, depth=0):
+    """One line per operator: name plus table, scan type and join details."""
+    extra = node["extra_info"]
+    details = [str(extra[key]) for key in ("Table", "Type", "Join Type", "Conditions") if key in extra]
+    line = "  " * depth + node["name"] + (f" ({'; '.join(details)})" if details else "")
+    return [line] + [line for child in node["children"] for line in _plan_outline(child, depth + 1)]
+
+
+def explain(con, sql, params, analyze=False):
+    """
+    EXPLAIN output of a statement: the rendered plan, an operator outline
+    and a signature that changes only when the plan's shape does.
+    """
+    def run(prefix):
+        if params is None:
+            return con.execute(f"{prefix} {sql}").fetchall()
+        return con.execute(f"{prefix} {sql}", params).fetchall()
+
+    result = {"plan": "\n".join(row[-1] for row in run("EXPLAIN"))}
+    try:
+        tree = [_plan_node(node) for node in json.loads(run("EXPLAIN (FORMAT JSON)")[0][-1])]
+        result["plan_outline"] = [line for node in tree for line in _plan_outline(node)]
+        shape = json.dumps(tree, sort_keys=True)
+    except Exception:
+        # DuckDB without JSON EXPLAIN: fall back to the rendered plan minus estimates
+        result["plan_outline"] = None
+        shape = "\n".join(line for line in result["plan"].splitlines() if " rows " not in f" {line.strip()} ")
+    result["plan_signature"] = hashlib.sha1(shape.encode("utf-8")).hexdigest()[:12]
+    if analyze:
+        result["profile"] = "\n".join(row[-1] for row in run("EXPLAIN ANALYZE"))
+    return result
+
+
+def load_app(db_path):
+    """Import 03_serve_api against db_path and run the startup steps handlers rely on."""
+    os.environ["DB_PATH"] = str(Path(db_path).resolve())
+    # Statements are captured below; the slow-query log would only add noise
+    os.environ["SLOW_QUERY_MS"] = "0"
+    api = importlib.import_module("03_serve_api")
+    con = api.get_connection()
+    api.load_genre_bits(con)
+    api.resolver.load(con)
+    return api, con
+
+
+def handler_kwargs(handler, params):
+    """Call arguments for a raw handler: its Query defaults overlaid with params."""
+    kwargs = {}
+    for name, parameter in inspect.signature(handler).parameters.items():
+        if name in params:
+            kwargs[name] = params[name]
+            continue
+        default = parameter.default
+        # Query(...) objects carry the real default; required ones have none
+        if hasattr(default, "is_required"):
+            if default.is_required():
+                continue
+            default = default.default
+        if default is not inspect.Parameter.empty and default is not ...:
+            kwargs[name] = default
+    return kwargs
+
+
+def format_params(params, fixture):
+    return {name: value.format(**fixture) if isinstance(value, str) else value for name, value in params.items()}
+
+
+def run_case(api, con, name, fixture, repeat, analyze):
+    """Benchmark one endpoint case: handler split, serialization and each statement."""
+    function_name, path, params = ENDPOINT_CASES[name]
+    params = format_params(params, fixture)
+    handler = inspect.unwrap(getattr(api, function_name))
+    kwargs = handler_kwargs(handler, params)
+
+    captured = []
+    capturing = [True]
+
+    def listener(sql, sql_params, rows, seconds, route):
+        if capturing[0] and route == name:
+            captured.append((sql, sql_params, rows))
+
+    add_query_listener(listener)
+
+    def call():
+        timing = {"route": name}
+        result = timed_call(handler, timing, time.perf_counter(), (), kwargs)
+        return result, timing
+
+    case = {"endpoint": path, "params": params, "status": "ok"}
+    try:
+        result, _ = call()
+    except Exception as e:
+        capturing[0] = False
+        case["status"] = f"error: {getattr(e, 'detail', e)}"
+        return case
+    capturing[0] = False
+
+    totals, db, python = [], [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, timing = call()
+        totals.append(time.perf_counter() - start)
+        db.append(timing["db"])
+        python.append(timing["handler"])
+    case["handler"] = timing_stats(totals)
+    case["db"] = timing_stats(db)
+    case["python"] = timing_stats(python)
+    case["serialize"] = measure(lambda: api.encode_json(result), repeat)
+    case["response_bytes"] = len(api.encode_json(result))
+
+    cursor = con.cursor()
+    statements = []
+    for index, (sql, sql_params, rows) in enumerate(captured):
+        def execute(sql=sql, sql_params=sql_params):
+            if sql_params is None:
+                cursor.execute(sql).fetchall()
+            else:
+                cursor.execute(sql, sql_params).fetchall()
+        statement = {
+            "id": f"{name}#{index}",
+            "fingerprint": fingerprint(sql),
+            "sql": " ".join(sql.split()),
+            "params": list(sql_params) if sql_params is not None else None,
+            "rows": rows,
+            "timing": measure(execute, repeat)
+        }
+        statement.update(explain(cursor, sql, sql_params, analyze))
+        statements.append(statement)
+    cursor.close()
+    case["statements"] = statements
+    return case
+
+
+def long_series_columns(columns, episodes=LONG_SERIES_EPISODES, per_season=LONG_SERIES_SEASON_EPISODES):
+    """
+    Graph columns of a long daily show: the fixture series' episodes
+    repeated to ``episodes`` rows, renumbered into seasons of ``per_season``.
+    """
+    index = np.arange(episodes)
+    copies = -(-episodes // len(columns[0]))
+    repeated = [(index // per_season + 1).astype(columns[0].dtype), (index % per_season + 1).astype(columns[1].dtype)]
+    repeated += [np.tile(column, copies)[:episodes] for column in columns[2:-1]]
+    repeated.append(index.astype(columns[-1].dtype))
+    return repeated
+
+
+def python_blocks(api, con, fixture):
+    """Standalone Python blocks: name -> (description, zero-argument callable)."""
+    series = api.resolver.resolve("tvSeries", fixture["series"])
+    blocks = {
+        "resolver.resolve": (
+            "In-memory series name resolution",
+            lambda: api.resolver.resolve("tvSeries", fixture["series"])
+        ),
+        "genre_condition": (
+            "Genre filter to bitmask predicate",
+            lambda: api.genre_condition("genre_mask", fixture["genre"])
+        )
+    }
+    if series is None:
+        return blocks
+
+    columns = series_graph.fetch_graph_columns(con, series.tconst)
+    if not len(columns[0]):
+        return blocks
+    long_columns = long_series_columns(columns)
+    graph = series_graph._shape_graph(columns)
+    info = {"tconst": series.tconst, "title": series.title,
+            "startYear": series.start_year, "endYear": series.end_year}
+    figure = new_figure()
+    blocks.update({
+        "series_graph.shape": (
+            f"Episode/season shaping and trendlines for {len(columns[0])} episodes (/series_episode_graph)",
+            lambda: series_graph._shape_graph(columns)
+        ),
+        "series_graph.shape_long": (
+            f"Episode/season shaping and trendlines for {LONG_SERIES_EPISODES} episodes "
+            f"in seasons of {LONG_SERIES_SEASON_EPISODES} (a long daily show)",
+            lambda: series_graph._shape_graph(long_columns)
+        ),
+        "series_graph.stats_long": (
+            f"Per-season stats and trendlines alone for {LONG_SERIES_EPISODES} episodes",
+            lambda: series_graph.graph_stats(long_columns[0], long_columns[3])
+        ),
+        "series_chart.render_png": (
+            "Chart render to PNG bytes on a reused figure (/series_chart cache miss)",
+            lambda: save_series_chart(info, graph, io.BytesIO(), fmt="png", fig=figure)
+        )
+    })
+    return blocks
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def selected(names, only):
+    if not only:
+        return list(names)
+    wanted = [name.strip() for name in only.split(",")]
+    unknown = [name for name in wanted if name not in names]
+    if unknown:
+        raise SystemExit(f"Unknown case(s): {', '.join(unknown)} (known: {', '.join(names)})")
+    return wanted
+
+
+def print_case(name, case, show_plans):
+    if case["status"] != "ok":
+        print(f"\n{name}: {case['status']}")
+        return
+    print(f"\n{name}  handler {case['handler']['median_ms']:.2f} ms = db {case['db']['median_ms']:.2f} + "
+          f"python {case['python']['median_ms']:.2f}; serialize {case['serialize']['median_ms']:.2f} ms")
+    for statement in case["statements"]:
+        top = (statement["plan_outline"] or ["?"])[0].strip()
+        print(f"   {statement['id']:<26} {statement['timing']['median_ms']:>9.2f} ms {statement['rows']!s:>7} rows  "
+              f"plan {statement['plan_signature']}  {top[:60]}")
+        if show_plans and statement["plan_outline"]:
+            for line in statement["plan_outline"]:
+                print(f"      {line}")
+
+
+def run(args):
+    fixture = {
+        "series": args.series,
+        "movie": args.movie,
+        "genre": args.genre,
+        "series_list": args.series_list,
+        "movie_list": args.movie_list
+    }
+    print(f"🦆 Loading {args.db}...")
+    api, con = load_app(args.db)
+    import duckdb
+
+    cases = {}
+    for name in selected(list(ENDPOINT_CASES), args.only):
+        cases[name] = run_case(api, con, name, fixture, args.repeat, args.analyze)
+        print_case(name, cases[name], args.plans)
+
+    blocks = {}
+    if not args.only:
+        print("\nPython blocks")
+        for name, (description, fn) in python_blocks(api, con, fixture).items():
+            blocks[name] = dict(description=description, **measure(fn, args.repeat))
+            print(f"   {name:<26} {blocks[name]['median_ms']:>9.3f} ms  {description}")
+
+    results = {
+        "format": RESULTS_FORMAT,
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "database": str(Path(args.db).resolve()),
+            "dataset_version": api.read_dataset_version(con),
+            "git_commit": git_commit(),
+            "duckdb": duckdb.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "fixture": fixture
+        },
+        "cases": cases,
+        "blocks": blocks
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+def flatten(results):
+    """id -> {timing, plan fields} for every statement, handler split and block."""
+    items = {}
+    for name, case in results["cases"].items():
+        if case["status"] != "ok":
+            continue
+        items[f"{name}:python"] = {"timing": case["python"]}
+        items[f"{name}:serialize"] = {"timing": case["serialize"]}
+        for statement in case["statements"]:
+            items[statement["id"]] = statement
+    for name, block in results["blocks"].items():
+        items[f"block:{name}"] = {"timing": block}
+    return items
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    for key in ("database", "duckdb", "repeat", "fixture"):
+        if base["meta"].get(key) != new["meta"].get(key):
+            print(f"⚠️  Runs differ in {key}: {base['meta'].get(key)!r} vs {new['meta'].get(key)!r}")
+
+    before, after = flatten(base), flatten(new)
+    rows = []
+    for item_id in list(before) + [item_id for item_id in after if item_id not in before]:
+        old, cur = before.get(item_id), after.get(item_id)
+        if old is None or cur is None:
+            rows.append({"id": item_id, "flags": ["only in base" if cur is None else "only in new"]})
+            continue
+        old_ms, new_ms = old["timing"][COMPARE_METRIC], cur["timing"][COMPARE_METRIC]
+        change = (new_ms - old_ms) / old_ms * 100 if old_ms else 0.0
+        flags = []
+        if change > args.threshold and new_ms - old_ms >= args.min_delta_ms:
+            flags.append("slower")
+        if "fingerprint" in old and old["fingerprint"] != cur["fingerprint"]:
+            flags.append("sql changed")
+        if "plan_signature" in old and old["plan_signature"] != cur["plan_signature"]:
+            flags.append("plan changed")
+        rows.append({"id": item_id, "base_ms": old_ms, "new_ms": new_ms, "change_pct": round(change, 1),
+                     "flags": flags, "base_item": old, "new_item": cur})
+
+    print(f"{'id':<30} {'base ms':>10} {'new ms':>10} {'change':>8}  flags")
+    print("-" * 76)
+    for row in rows:
+        if "base_ms" not in row:
+            print(f"{row['id']:<30} {'':>10} {'':>10} {'':>8}  {', '.join(row['flags'])}")
+            continue
+        print(f"{row['id']:<30} {row['base_ms']:>10.3f} {row['new_ms']:>10.3f} {row['change_pct']:>+7.1f}%  "
+              f"{', '.join(row['flags'])}")
+        if args.show_plans and "plan changed" in row["flags"]:
+            old_plan = row["base_item"]["plan_outline"] or row["base_item"]["plan"].splitlines()
+            new_plan = row["new_item"]["plan_outline"] or row["new_item"]["plan"].splitlines()
+            for line in difflib.unified_diff(old_plan, new_plan, "base", "new", lineterm=""):
+                print(f"      {line}")
+
+    flagged = [row for row in rows if {"slower", "plan changed"} & set(row["flags"])]
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "threshold_pct": args.threshold,
+                "items": [{key: value for key, value in row.items() if not key.endswith("_item")} for row in rows]
+            }, f, indent=2)
+    if flagged:
+        print(f"\n❌ {len(flagged)} item(s) slower than {args.threshold:g}% or with a changed plan: "
+              f"{', '.join(row['id'] for row in flagged)}")
+        return 1
+    print(f"\n✅ No statement or block regressed beyond {args.threshold:g}% and no plan changed")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-statement microbenchmarks with EXPLAIN plan snapshots.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Time every statement and Python block against a database")
+    run_parser.add_argument("--db", default=os.getenv("DB_PATH", "bench_data/imdb.duckdb"),
+                            help="Fixture database or Parquet directory (default: $DB_PATH or bench_data/imdb.duckdb)")
+    run_parser.add_argument("--repeat", type=int, default=10, help="Measured runs per item (default: 10)")
+    run_parser.add_argument("--only", help="Comma-separated endpoint cases to run (skips the Python blocks)")
+    run_parser.add_argument("--analyze", action="store_true",
+                            help="Also store an EXPLAIN ANALYZE profile per statement")
+    run_parser.add_argument("--plans", action="store_true", help="Print each statement's plan outline")
+    run_parser.add_argument("--series", default="Breaking Bad", help="Series used by the series cases")
+    run_parser.add_argument("--movie", default="The Godfather", help="Movie used by movie_details")
+    run_parser.add_argument("--genre", default="Drama", help="Genre filter used by search/browse cases")
+    run_parser.add_argument("--series-list", default="Breaking Bad,The Wire,The Sopranos",
+                            help="Series names for compare_series")
+    run_parser.add_argument("--movie-list", default="The Godfather,Inception,Parasite",
+                            help="Movie titles for compare_movies")
+    run_parser.add_argument("--output", help="Write results JSON to this file")
+
+    compare_parser = commands.add_parser("compare", help="Flag slower statements and changed plans")
+    compare_parser.add_argument("base", help="Results JSON of the baseline run")
+    compare_parser.add_argument("new", help="Results JSON of the run to check")
+    compare_parser.add_argument("--threshold", type=float, default=20,
+                                help="Percent slowdown of the median counted as a regression (default: 20)")
+    compare_parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                                help="Ignore slowdowns smaller than this many ms (default: 0.5)")
+    compare_parser.add_argument("--show-plans", action="store_true", help="Print a diff of each changed plan")
+    compare_parser.add_argument("--output", help="Write the comparison as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "run":
+        return run(args)
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
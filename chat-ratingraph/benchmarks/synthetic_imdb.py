@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic IMDb-shaped dataset and build a DuckDB database from it.
+
+Writes title.basics / title.ratings / title.episode .tsv.gz dumps with the
+same columns and \\N conventions as the official files, then runs
+01_build_imdb_duckdb.py on them, so the benchmark database has exactly the
+schema, derived tables and indexes the API serves from in production.
+
+Output is fully determined by the options and --seed. A handful of
+well-known titles (Breaking Bad, The Office, ...) are always present so the
+examples in the docs work against the synthetic data too.
+
+Usage:
+    python benchmarks/synthetic_imdb.py --out bench_data
+    python benchmarks/synthetic_imdb.py --out bench_data --scale 10 --seed 7
+    python benchmarks/synthetic_imdb.py --out bench_data --series 5000 --episodes-per-series 80 --parquet
+"""
+
+import io
+import os
+import sys
+import gzip
+import json
+import math
+import time
+import random
+import argparse
+import subprocess
+from pathlib import Path
+
+
+BUILDER = Path(__file__).resolve().parent.parent / "01_build_imdb_duckdb.py"
+
+GENRES = [
+    ("Drama", 30), ("Comedy", 20), ("Documentary", 10), ("Action", 8), ("Romance", 7),
+    ("Thriller", 7), ("Crime", 7), ("Horror", 5), ("Adventure", 5), ("Family", 4),
+    ("Animation", 4), ("Reality-TV", 4), ("Mystery", 3), ("Fantasy", 3), ("Sci-Fi", 3),
+    ("Biography", 2), ("History", 2), ("Music", 2), ("Talk-Show", 2), ("War", 1),
+    ("Sport", 1), ("Western", 1), ("Musical", 1), ("News", 1), ("Game-Show", 1)
+]
+
+# Always generated first, so doc examples resolve (The Office twice, like the real data)
+ANCHOR_SERIES = [
+    "Breaking Bad", "The Wire", "The Sopranos", "Game of Thrones", "The Office",
+    "The Office", "Friends", "Seinfeld", "Lost", "Dark", "Élite", "Better Call Saul"
+]
+ANCHOR_MOVIES = [
+    "The Shawshank Redemption", "The Godfather", "The Dark Knight", "Inception",
+    "Pulp Fiction", "Fight Club", "Forrest Gump", "The Matrix", "Interstellar", "Parasite"
+]
+
+# Other title types sharing title_basics with movies and series
+OTHER_TYPES = [("short", 40), ("tvMovie", 20), ("video", 15), ("tvMiniSeries", 10),
+               ("tvSpecial", 8), ("videoGame", 7)]
+
+MAX_VOTES = 3_000_000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic IMDb-shaped DuckDB database.")
+    parser.add_argument("--out", default="bench_data",
+                        help="Output directory for the TSV dumps and imdb.duckdb (default: bench_data)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiplier applied to --series, --movies and --other-titles (default: 1)")
+    parser.add_argument("--series", type=int, default=2000,
+                        help="TV series with episodes at scale 1 (default: 2000)")
+    parser.add_argument("--episodes-per-series", type=float, default=40,
+                        help="Median episodes per series; counts are log-normal around it (default: 40)")
+    parser.add_argument("--movies", type=int, default=20000,
+                        help="Movies at scale 1 (default: 20000)")
+    parser.add_argument("--other-titles", type=int, default=10000,
+                        help="Shorts, TV movies, video games etc. at scale 1 (default: 10000)")
+    parser.add_argument("--vote-alpha", type=float, default=1.1,
+                        help="Pareto shape of vote counts; lower means a heavier tail (default: 1.1)")
+    parser.add_argument("--min-votes", type=int, default=5,
+                        help="Smallest vote count of a rated title (default: 5)")
+    parser.add_argument("--unrated-fraction", type=float, default=0.15,
+                        help="Fraction of titles without a ratings row (default: 0.15)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--parquet", action="store_true",
+                        help="Also export a Parquet dataset to <out>/imdb_parquet")
+    parser.add_argument("--no-build", action="store_true",
+                        help="Only write the TSV dumps, do not build the database")
+    return parser.parse_args(argv)
+
+
+def open_dump(path):
+    """Text writer for a .tsv.gz dump; mtime=0 keeps the bytes reproducible."""
+    # compresslevel=1: these files are read once, right away
+    return io.TextIOWrapper(gzip.GzipFile(path, "wb", compresslevel=1, mtime=0), encoding="utf-8")
+
+
+class SyntheticWriter:
+    """Streams generated rows into the three gzipped TSV dumps."""
+
+    def __init__(self, tsv_dir, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.next_id = 1
+        self.counts = {"titles": 0, "ratings": 0, "episodes": 0, "series": 0, "movies": 0}
+        genre_names, genre_weights = zip(*GENRES)
+        self.genre_names = genre_names
+        self.genre_weights = genre_weights
+        self.basics = open_dump(tsv_dir / "title.basics.tsv.gz")
+        self.ratings = open_dump(tsv_dir / "title.ratings.tsv.gz")
+        self.episodes = open_dump(tsv_dir / "title.episode.tsv.gz")
+        self.basics.write("tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\t"
+                          "startYear\tendYear\truntimeMinutes\tgenres\n")
+        self.ratings.write("tconst\taverageRating\tnumVotes\n")
+        self.episodes.write("tconst\tparentTconst\tseasonNumber\tepisodeNumber\n")
+
+    def close(self):
+        for f in (self.basics, self.ratings, self.episodes):
+            f.close()
+
+    def tconst(self):
+        value = f"tt{self.next_id:07d}"
+        self.next_id += 1
+        return value
+
+    def genres(self):
+        if self.rng.random() < 0.03:
+            return "\\N"
+        picked = []
+        for _ in range(self.rng.choice((1, 1, 2, 2, 3, 3, 3))):
+            genre = self.rng.choices(self.genre_names, self.genre_weights)[0]
+            if genre not in picked:
+                picked.append(genre)
+        return ",".join(sorted(picked))
+
+    def votes(self, scale=1.0):
+        votes = self.args.min_votes * self.rng.paretovariate(self.args.vote_alpha) * scale
+        return max(self.args.min_votes, min(MAX_VOTES, int(votes)))
+
+    def rating(self, mean, spread):
+        return min(10.0, max(1.0, round(self.rng.gauss(mean, spread), 1)))
+
+    def title(self, tconst, title_type, name, start_year, end_year, runtime, genres):
+        end = end_year if end_year is not None else "\\N"
+        start = start_year if start_year is not None else "\\N"
+        runtime = runtime if runtime is not None else "\\N"
+        self.basics.write(f"{tconst}\t{title_type}\t{name}\t{name}\t0\t{start}\t{end}\t{runtime}\t{genres}\n")
+        self.counts["titles"] += 1
+
+    def rate(self, tconst, rating, votes):
+        self.ratings.write(f"{tconst}\t{rating}\t{votes}\n")
+        self.counts["ratings"] += 1
+
+    def series(self, index):
+        rng = self.rng
+        name = ANCHOR_SERIES[index] if index < len(ANCHOR_SERIES) else f"Series {index:06d}"
+        tconst = self.tconst()
+        start_year = rng.randint(1950, 2024)
+        episode_count = max(1, int(rng.lognormvariate(math.log(self.args.episodes_per_series), 0.9)))
+        per_season = rng.choice((6, 8, 10, 10, 13, 13, 22, 24))
+        seasons = math.ceil(episode_count / per_season)
+        ended = rng.random() < 0.6
+        end_year = min(2025, start_year + seasons) if ended else None
+        genres = self.genres()
+        self.title(tconst, "tvSeries", name, start_year, end_year, rng.choice((22, 30, 45, 60)), genres)
+        # Anchors are the popular shows
+        popularity = self.votes(scale=100 if index < len(ANCHOR_SERIES) else 1)
+        quality = rng.uniform(5.5, 9.0)
+        self.rate(tconst, self.rating(quality, 0.3), popularity)
+
+        number = 0
+        for season in range(1, seasons + 1):
+            drift = rng.gauss(0, 0.4)
+            for episode in range(1, per_season + 1):
+                number += 1
+                if number > episode_count:
+                    break
+                episode_tconst = self.tconst()
+                self.title(episode_tconst, "tvEpisode", f"Episode #{season}.{episode}",
+                           start_year + season - 1, None, None, genres)
+                # A few unnumbered episodes, like specials in the real dumps
+                if rng.random() < 0.01:
+                    self.episodes.write(f"{episode_tconst}\t{tconst}\t\\N\t\\N\n")
+                else:
+                    self.episodes.write(f"{episode_tconst}\t{tconst}\t{season}\t{episode}\n")
+                self.counts["episodes"] += 1
+                if rng.random() >= self.args.unrated_fraction:
+                    # Episode votes fall off with the season, like audience attrition
+                    votes = max(self.args.min_votes, int(popularity * rng.uniform(0.05, 0.3) / season))
+                    self.rate(episode_tconst, self.rating(quality + drift, 0.5), votes)
+        self.counts["series"] += 1
+
+    def movie(self, index):
+        rng = self.rng
+        name = ANCHOR_MOVIES[index] if index < len(ANCHOR_MOVIES) else f"Movie {index:07d}"
+        tconst = self.tconst()
+        # Skewed towards recent years, like the real catalogue
+        year = 2025 - int(min(100, rng.expovariate(1 / 20)))
+        self.title(tconst, "movie", name, year, None, rng.randint(60, 200), self.genres())
+        if index < len(ANCHOR_MOVIES):
+            self.rate(tconst, self.rating(8.5, 0.2), self.votes(scale=10000))
+        elif rng.random() >= self.args.unrated_fraction:
+            self.rate(tconst, self.rating(6.2, 1.2), self.votes())
+        self.counts["movies"] += 1
+
+    def other(self, index):
+        rng = self.rng
+        type_names, type_weights = zip(*OTHER_TYPES)
+        title_type = rng.choices(type_names, type_weights)[0]
+        tconst = self.tconst()
+        year = rng.randint(1930, 2025) if rng.random() > 0.05 else None
+        self.title(tconst, title_type, f"{title_type.capitalize()} {index:07d}", year, None,
+                   rng.randint(1, 120), self.genres())
+        if rng.random() >= self.args.unrated_fraction * 2:
+            self.rate(tconst, self.rating(6.5, 1.3), self.votes())
+
+
+def generate(tsv_dir, args):
+    """Write the three dumps; returns row counts."""
+    series_count = int(args.series * args.scale)
+    movie_count = int(args.movies * args.scale)
+    other_count = int(args.other_titles * args.scale)
+    writer = SyntheticWriter(tsv_dir, args)
+    try:
+        for index in range(max(series_count, len(ANCHOR_SERIES))):
+            writer.series(index)
+        for index in range(max(movie_count, len(ANCHOR_MOVIES))):
+            writer.movie(index)
+        for index in range(other_count):
+            writer.other(index)
+    finally:
+        writer.close()
+    return writer.counts
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    out_dir = Path(args.out).expanduser().resolve()
+    tsv_dir = out_dir / "tsv"
+    tsv_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"🧪 Generating synthetic IMDb dumps in {tsv_dir} (scale {args.scale:g}, seed {args.seed})...")
+    start = time.perf_counter()
+    counts = generate(tsv_dir, args)
+    print(f"   ✅ {counts['titles']:,} titles, {counts['series']:,} series, {counts['episodes']:,} episodes, "
+          f"{counts['movies']:,} movies, {counts['ratings']:,} ratings ({time.perf_counter() - start:.1f}s)")
+
+    with open(out_dir / "synthetic.json", "w") as f:
+        json.dump({"options": vars(args), "counts": counts}, f, indent=2)
+
+    if args.no_build:
+        return
+
+    # The builder writes imdb.duckdb to its working directory; start from scratch
+    db_path = out_dir / "imdb.duckdb"
+    for stale in (db_path, db_path.with_name(db_path.name + ".wal")):
+        if stale.exists():
+            stale.unlink()
+    command = [sys.executable, str(BUILDER)]
+    if args.parquet:
+        command += ["--parquet-dir", str(out_dir / "imdb_parquet")]
+    env = dict(os.environ, IMDB_DIR=str(tsv_dir))
+    print(f"\n🦆 Building {db_path} with {BUILDER.name}...")
+    result = subprocess.run(command, cwd=out_dir, env=env)
+    if result.returncode != 0:
+        print("❌ Database build failed")
+        sys.exit(result.returncode)
+    print(f"\n✅ Synthetic database ready: {db_path}")
+    print(f"   Benchmark it with: python benchmarks/http_bench.py run --serve {db_path}")
+
+
+if __name__ == "__main__":
+    main()
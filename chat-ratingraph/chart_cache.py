@@ -0,0 +1,95 @@
+"""
+Content-addressed store for rendered series charts.
+
+A chart's key is a SHA-256 over exactly what ends up in the image: the
+series title and years, each episode's season and rating, and the
+rendering parameters (renderer version, size, DPI, format, matplotlib
+version). Vote counts or episode titles changing does not change the
+key, so after a data refresh only series whose chart would actually
+look different are re-rendered.
+
+Layout:
+    <root>/manifest.json          {key: {tconst, title, format, bytes, created_at}}
+    <root>/ab/abcdef....png       one file per key
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+import matplotlib
+
+from series_chart import CHART_RENDER_VERSION, CHART_FIGSIZE, CHART_DPI
+
+
+def chart_key(series_info, graph, fmt="png"):
+    """Hash of everything that determines a chart's pixels."""
+    payload = {
+        "renderer": [CHART_RENDER_VERSION, list(CHART_FIGSIZE), CHART_DPI, fmt, matplotlib.__version__],
+        "series": [series_info['title'], series_info['startYear'], series_info['endYear']],
+        "episodes": [[episode['season'], episode['rating']] for episode in graph['episodes']]
+    }
+    encoded = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def publish_chart(source, destination):
+    """Expose a stored chart under a friendly name (hard link, or copy across filesystems)."""
+    destination = Path(destination)
+    if destination.exists():
+        if os.path.samefile(source, destination):
+            return
+        destination.unlink()
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+class ChartCache:
+    """Rendered charts stored under their content hash, plus a JSON manifest."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.manifest_path = self.root / "manifest.json"
+        self.manifest = {}
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, key, fmt="png"):
+        return self.root / key[:2] / f"{key}.{fmt}"
+
+    def lookup(self, key, fmt="png"):
+        """Path of the stored chart for a key, or None."""
+        path = self.path_for(key, fmt)
+        if path.exists():
+            self.hits += 1
+            return path
+        self.misses += 1
+        return None
+
+    def record(self, key, series_info, fmt="png"):
+        """Add a freshly stored chart to the manifest (call save() to persist)."""
+        path = self.path_for(key, fmt)
+        self.manifest[key] = {
+            "tconst": series_info['tconst'],
+            "title": series_info['title'],
+            "format": fmt,
+            "bytes": path.stat().st_size,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    def save(self):
+        """Write the manifest atomically."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        tmp_path.replace(self.manifest_path)
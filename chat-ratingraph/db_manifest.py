@@ -0,0 +1,247 @@
+"""
+Build-time manifest of the bundled database, and the cold-start path using it.
+
+The Docker image ships imdb.duckdb with imdb.duckdb.manifest.json next to
+it, written at build time by ``python db_manifest.py imdb.duckdb``:
+
+    {"format": 1, "dataset_version": "20250101T...", "size": 1234567,
+     "sha256": "...", "created_at": "..."}
+
+At startup prepare_database() picks the file to open without reading the
+database itself:
+
+    - the volume copy has the image's manifest next to it and the size it
+      records: open the volume copy directly
+    - otherwise: open the image copy (read-only) right away and copy it to
+      the volume in a background thread. The copy goes to a .partial file,
+      is checked against the manifest's size and checksum, fsynced and
+      renamed into place, and its manifest is written last, so an
+      interrupted copy is never taken for a complete one. The next start
+      opens the volume copy.
+
+Volumes filled before manifests existed are adopted without a copy when
+their size and stamped dataset version match the image's.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+
+import duckdb
+
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_FORMAT = 1
+
+# Fields two manifests must agree on to describe the same file
+MANIFEST_FIELDS = ("dataset_version", "size", "sha256")
+
+COPY_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def manifest_path(db_path):
+    return Path(f"{db_path}{MANIFEST_SUFFIX}")
+
+
+def stamped_version(db_path):
+    """The dataset version stamped into a .duckdb file, or None."""
+    con = duckdb.connect(str(db_path), read_only=True)
+    try:
+        row = con.execute("SELECT value FROM dataset_info WHERE key = 'dataset_version'").fetchone()
+        return row[0] if row else None
+    except duckdb.CatalogException:
+        return None
+    finally:
+        con.close()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(COPY_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(db_path):
+    """Describe a .duckdb file: its dataset version, size and SHA-256."""
+    return {
+        "format": MANIFEST_FORMAT,
+        "dataset_version": stamped_version(db_path),
+        "size": Path(db_path).stat().st_size,
+        "sha256": file_sha256(db_path),
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def write_manifest(db_path, manifest):
+    """Write a manifest next to db_path, replacing any previous one atomically."""
+    path = manifest_path(db_path)
+    staging = path.with_name(path.name + ".tmp")
+    with open(staging, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(staging, path)
+
+
+def read_manifest(db_path):
+    """The manifest next to db_path, or None when it is missing or unreadable."""
+    try:
+        with open(manifest_path(db_path)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT:
+        return None
+    return manifest
+
+
+def same_file(manifest, other):
+    return all(manifest.get(field) == other.get(field) for field in MANIFEST_FIELDS)
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class VolumeCopy(threading.Thread):
+    """
+    Background copy of the image's database to the volume.
+
+    on_done(copy) is called from the copy thread when it finishes; ``error``
+    is set if it failed.
+    """
+
+    def __init__(self, source, target, manifest, on_done=None):
+        super().__init__(name="volume-copy", daemon=True)
+        self.source = Path(source)
+        self.target = Path(target)
+        self.manifest = manifest
+        self.on_done = on_done
+        self.copied_bytes = 0
+        self.seconds = None
+        self.error = None
+
+    @property
+    def state(self):
+        if self.seconds is None:
+            return "copying"
+        return "failed" if self.error else "done"
+
+    def status(self):
+        return {
+            "state": self.state,
+            "target": str(self.target),
+            "copied_bytes": self.copied_bytes,
+            "total_bytes": self.manifest["size"],
+            "error": str(self.error) if self.error else None
+        }
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self._copy()
+        except Exception as e:
+            self.error = e
+        self.seconds = time.perf_counter() - start
+        if self.on_done:
+            self.on_done(self)
+
+    def _copy(self):
+        partial = self.target.with_name(self.target.name + ".partial")
+        # The old manifest must not vouch for the file about to be replaced
+        manifest_path(self.target).unlink(missing_ok=True)
+        digest = hashlib.sha256()
+        with open(self.source, "rb") as src, open(partial, "wb") as dst:
+            while chunk := src.read(COPY_CHUNK_BYTES):
+                dst.write(chunk)
+                digest.update(chunk)
+                self.copied_bytes += len(chunk)
+            dst.flush()
+            os.fsync(dst.fileno())
+            # Keep the copy from evicting the pages the server is reading
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(dst.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        if self.copied_bytes != self.manifest["size"] or digest.hexdigest() != self.manifest["sha256"]:
+            partial.unlink(missing_ok=True)
+            raise RuntimeError(f"{self.source} does not match its manifest (size or checksum differs)")
+        os.replace(partial, self.target)
+        _fsync_dir(self.target.parent)
+        write_manifest(self.target, self.manifest)
+
+
+def prepare_database(image_path, volume_path, on_copied=None):
+    """
+    Choose the database file to open at startup.
+
+    Only stats files and reads manifests, except to adopt a volume copy
+    without a manifest. Returns (path to open, reason, VolumeCopy or None);
+    a returned VolumeCopy is already running and calls on_copied when done.
+    """
+    manifest = read_manifest(image_path)
+    if manifest is None:
+        raise RuntimeError(f"{manifest_path(image_path)} is missing; create it with: python db_manifest.py {image_path}")
+    size = Path(image_path).stat().st_size
+    if size != manifest["size"]:
+        raise RuntimeError(f"{image_path} is {size:,} bytes but its manifest records {manifest['size']:,}")
+
+    volume = Path(volume_path)
+    if volume.is_file() and volume.stat().st_size == manifest["size"]:
+        volume_manifest = read_manifest(volume)
+        if volume_manifest is not None and same_file(volume_manifest, manifest):
+            return str(volume), f"volume copy matches dataset {manifest['dataset_version']}", None
+        if volume_manifest is None and manifest["dataset_version"] is not None:
+            try:
+                version = stamped_version(volume)
+            except duckdb.Error:
+                version = None
+            if version == manifest["dataset_version"]:
+                try:
+                    write_manifest(volume, manifest)
+                except OSError:
+                    pass
+                return str(volume), f"adopted volume copy of dataset {version}", None
+        reason = "volume copy is from another build"
+    elif volume.is_file():
+        reason = "volume copy is incomplete or from another build"
+    else:
+        reason = "no volume copy yet"
+
+    copy = VolumeCopy(image_path, volume, manifest, on_done=on_copied)
+    copy.start()
+    return str(image_path), f"{reason}; copying to {volume} in the background", copy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write or check the manifest of a .duckdb file")
+    parser.add_argument("db_path", help="Database file")
+    parser.add_argument("--verify", action="store_true",
+                        help="Check the file against its existing manifest instead of writing one")
+    args = parser.parse_args()
+
+    manifest = build_manifest(args.db_path)
+    if args.verify:
+        expected = read_manifest(args.db_path)
+        if expected is None or not same_file(expected, manifest):
+            print(f"❌ {args.db_path} does not match {manifest_path(args.db_path)}")
+            sys.exit(1)
+        print(f"✅ {args.db_path} matches its manifest (dataset {manifest['dataset_version']})")
+        return
+    write_manifest(args.db_path, manifest)
+    print(f"✅ Wrote {manifest_path(args.db_path)}: dataset {manifest['dataset_version']}, "
+          f"{manifest['size']:,} bytes, sha256 {manifest['sha256'][:12]}")
+
+
+if __name__ == "__main__":
+    main()
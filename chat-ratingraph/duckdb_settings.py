@@ -0,0 +1,244 @@
+"""
+DuckDB memory, thread and spill settings derived from the machine's limits.
+
+DuckDB defaults to 80% of physical RAM and one thread per core. On the
+1 GB production VM that leaves no room for the Python process around it,
+so a large aggregation can grow until the OOM killer ends the server. The
+server and the builder therefore open DuckDB with:
+
+    memory_limit     a share of the memory available to the process (the
+                     cgroup limit, else physical RAM): 50% for the server,
+                     75% for the builder; beyond it, operators spill to disk
+    threads          the cgroup CPU quota, else the CPUs this process may use
+    temp_directory   where spilled data goes
+
+Configuration (environment):
+    DUCKDB_MEMORY_LIMIT      - "60%" of available memory or an absolute size ("512MB")
+    DUCKDB_THREADS           - thread count
+    DUCKDB_TEMP_DIR          - spill directory
+    DUCKDB_MAX_TEMP_SIZE     - cap on spilled data ("4GB"; default: DuckDB's, 90% of free disk)
+    DUCKDB_ENDPOINT_MEMORY   - per-endpoint memory caps (server only, see MemoryBudget)
+
+DuckDB has no per-query memory limit, so endpoint caps are reservations
+against memory_limit: a capped endpoint waits until its cap fits next to
+the ones already running, which keeps concurrent heavy aggregations from
+sharing (and spilling) one limit.
+"""
+
+import os
+import re
+import math
+import asyncio
+import tempfile
+import contextlib
+from pathlib import Path
+
+
+# Share of available memory given to DuckDB when DUCKDB_MEMORY_LIMIT is unset
+DEFAULT_MEMORY_SHARE = {"server": 0.5, "builder": 0.75}
+
+# Above half the limit, so these aggregations run one at a time
+DEFAULT_ENDPOINT_MEMORY = "genre_analysis=60%,decade_analysis=60%"
+
+_SIZE_RE = re.compile(r"^\s*([\d.]+)\s*([kmgt]?i?b?)\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "b": 1, "k": 1000, "m": 1000 ** 2, "g": 1000 ** 3, "t": 1000 ** 4,
+               "ki": 1024, "mi": 1024 ** 2, "gi": 1024 ** 3, "ti": 1024 ** 4}
+
+# Cgroup v1 reports "no limit" as a huge page-aligned number
+_UNLIMITED_BYTES = 1 << 60
+
+
+def _read(path):
+    try:
+        return Path(path).read_text().strip()
+    except OSError:
+        return None
+
+
+def parse_size(text):
+    """Bytes in a size like "512MB", "1.5GiB" or "1000000"."""
+    match = _SIZE_RE.match(text)
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    unit = match.group(2).lower().rstrip("b")
+    return int(float(match.group(1)) * _SIZE_UNITS[unit])
+
+
+def format_size(nbytes):
+    return f"{nbytes / 1024 ** 2:,.0f} MB" if nbytes < 1024 ** 3 else f"{nbytes / 1024 ** 3:,.2f} GB"
+
+
+def cgroup_memory_limit():
+    """The cgroup (v2, else v1) memory limit in bytes, or None when unlimited."""
+    value = _read("/sys/fs/cgroup/memory.max") or _read("/sys/fs/cgroup/memory/memory.limit_in_bytes")
+    if not value or value == "max" or int(value) >= _UNLIMITED_BYTES:
+        return None
+    return int(value)
+
+
+def cgroup_cpu_limit():
+    """CPUs allowed by the cgroup (v2, else v1) CPU quota, rounded up, or None."""
+    value = _read("/sys/fs/cgroup/cpu.max")
+    if value:
+        quota, period = value.split()
+        if quota == "max":
+            return None
+        return max(1, math.ceil(int(quota) / int(period)))
+    quota, period = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us"), _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if quota and period and int(quota) > 0:
+        return max(1, math.ceil(int(quota) / int(period)))
+    return None
+
+
+def available_memory():
+    """(bytes, source) of the memory this process may use."""
+    limit = cgroup_memory_limit()
+    if limit is not None:
+        return limit, "cgroup limit"
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES"), "physical RAM"
+
+
+def available_cpus():
+    """(count, source) of the CPUs this process may use."""
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        return limit, "cgroup CPU quota"
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)), "CPU affinity"
+    return os.cpu_count() or 1, "CPU count"
+
+
+def resolve_memory(value, total):
+    """Bytes for "60%" (of total) or an absolute size."""
+    value = value.strip()
+    if value.endswith("%"):
+        return int(total * float(value[:-1]) / 100)
+    return parse_size(value)
+
+
+class DuckDBSettings:
+    """Effective DuckDB settings for a role ("server" or "builder") and where each came from."""
+
+    def __init__(self, role, db_path=None, memory_limit=None, threads=None, temp_directory=None, max_temp_size=None):
+        total, total_source = available_memory()
+        self.available_memory = total
+        memory_limit = memory_limit or os.getenv("DUCKDB_MEMORY_LIMIT")
+        if memory_limit:
+            self.memory_limit = resolve_memory(memory_limit, total)
+            memory_source = f"configured {memory_limit.strip()}"
+            if memory_limit.strip().endswith("%"):
+                memory_source += f" of {format_size(total)} {total_source}"
+        else:
+            share = DEFAULT_MEMORY_SHARE[role]
+            self.memory_limit = int(total * share)
+            memory_source = f"{share:.0%} of {format_size(total)} {total_source}"
+
+        threads = threads or os.getenv("DUCKDB_THREADS")
+        if threads:
+            self.threads = int(threads)
+            threads_source = "configured"
+        else:
+            self.threads, threads_source = available_cpus()
+
+        self.temp_directory = temp_directory or os.getenv("DUCKDB_TEMP_DIR") or self.default_temp_directory(role, db_path)
+        self.max_temp_size = max_temp_size or os.getenv("DUCKDB_MAX_TEMP_SIZE") or None
+        self.sources = {"memory_limit": memory_source, "threads": threads_source}
+
+    @staticmethod
+    def default_temp_directory(role, db_path):
+        # The server's database may sit on a read-only mount; the builder spills next to its output
+        if role == "server" or db_path is None:
+            return str(Path(tempfile.gettempdir()) / "duckdb_spill")
+        return f"{db_path}.tmp"
+
+    def config(self):
+        """Config dict for duckdb.connect()."""
+        config = {
+            "memory_limit": f"{self.memory_limit // (1024 * 1024)}MiB",
+            "threads": self.threads,
+            "temp_directory": self.temp_directory
+        }
+        if self.max_temp_size:
+            config["max_temp_directory_size"] = self.max_temp_size
+        return config
+
+    def describe(self):
+        """One line summary for startup logs."""
+        return (f"memory_limit {format_size(self.memory_limit)} ({self.sources['memory_limit']}), "
+                f"threads {self.threads} ({self.sources['threads']}), temp_directory {self.temp_directory}")
+
+
+def read_effective_settings(con):
+    """The settings as DuckDB reports them, e.g. {"memory_limit": "488.0 MiB"}."""
+    cursor = con.cursor()
+    try:
+        rows = cursor.execute("""
+            SELECT name, value
+            FROM duckdb_settings()
+            WHERE name IN ('memory_limit', 'threads', 'temp_directory', 'max_temp_directory_size')
+        """).fetchall()
+        usage = cursor.execute("""
+            SELECT SUM(memory_usage_bytes), SUM(temporary_storage_bytes)
+            FROM duckdb_memory()
+        """).fetchone()
+    finally:
+        cursor.close()
+    return {"settings": dict(rows), "memory_usage_bytes": int(usage[0] or 0),
+            "temporary_storage_bytes": int(usage[1] or 0)}
+
+
+def parse_endpoint_memory(value, memory_limit):
+    """Parse DUCKDB_ENDPOINT_MEMORY ("genre_analysis=60%,browse_movies=128MB") into {endpoint: bytes}."""
+    caps = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, size = item.partition("=")
+        if not size:
+            raise ValueError(f"Invalid endpoint memory cap {item!r}; expected endpoint=size")
+        caps[name.strip().lstrip("/")] = min(resolve_memory(size, memory_limit), memory_limit)
+    return caps
+
+
+class MemoryBudget:
+    """
+    Reservations of per-endpoint memory caps against DuckDB's memory_limit.
+
+    reserve(endpoint) waits until the endpoint's cap fits next to the
+    reservations already held; endpoints without a cap never wait.
+    """
+
+    def __init__(self, total_bytes, caps):
+        self.total_bytes = total_bytes
+        self.caps = caps
+        self.reserved = 0
+        self.waiting = 0
+        self._condition = None
+
+    @contextlib.asynccontextmanager
+    async def reserve(self, endpoint, timeout):
+        """Hold the endpoint's cap for the block; raises TimeoutError after ``timeout`` seconds."""
+        nbytes = self.caps.get(endpoint, 0)
+        if not nbytes:
+            yield
+            return
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self.reserved + nbytes <= self.total_bytes), timeout
+                )
+            finally:
+                self.waiting -= 1
+            self.reserved += nbytes
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.reserved -= nbytes
+                self._condition.notify_all()
+
+    def stats(self):
+        return {"caps_bytes": self.caps, "reserved_bytes": self.reserved, "waiting": self.waiting}
@@ -0,0 +1,362 @@
+"""
+Request and query instrumentation exposed in Prometheus text format.
+
+Each request's wall time is split into:
+    queue      - waiting for a query pool worker
+    db         - inside DuckDB execute()/fetch*() calls
+    handler    - the rest of the handler (Python post-processing)
+    serialize  - encoding the response body
+
+DB time is measured by TimedConnection, a thin proxy that get_connection()
+hands out while timed_call() is running a handler on the calling thread.
+Other modules can observe each timed statement via add_query_listener().
+
+The registry also notes when the first request is answered, measured from
+process start (see process_uptime()), to track cold-start latency.
+"""
+
+import os
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-request timing breakdown, set by MetricsMiddleware
+_request_timing = contextvars.ContextVar("request_timing", default=None)
+
+# Per-thread DB timer, active while a handler runs (see timed_call)
+_local = threading.local()
+
+# Observers of timed statements (see add_query_listener)
+_query_listeners = []
+
+# Fallback start time where /proc is unavailable
+_imported_at = time.time()
+
+
+def process_uptime():
+    """Seconds since this process started (since this module was imported without /proc)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (starttime, in clock ticks since boot) follows the parenthesised command
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            boot_seconds = float(f.read().split()[0])
+        return boot_seconds - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.time() - _imported_at
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    labels = list(labels)
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, kind="counter"):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {kind}"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(zip(self.label_names, labels))} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def render(self):
+        return super().render(kind="gauge")
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._values.items())
+        for labels, series in items:
+            base = list(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(base + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(base)} {series[-1]!r}")
+            lines.append(f"{self.name}_count{_format_labels(base)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """The API's request metrics plus gauges sampled at scrape time."""
+
+    def __init__(self):
+        self.requests = Counter("api_requests_total", "Requests by route, method and status code", ("route", "method", "status"))
+        self.errors = Counter("api_request_errors_total", "Requests that failed with a 5xx status or an exception", ("route",))
+        self.in_flight = Gauge("api_requests_in_flight", "Requests currently being processed", ("route",))
+        self.duration = Histogram("api_request_duration_seconds", "Total request latency", ("route",))
+        self.phases = Histogram(
+            "api_request_phase_seconds",
+            "Request time by phase: queue (waiting for a query worker), db (DuckDB execute/fetch), "
+            "handler (Python processing outside DuckDB), serialize (response encoding)",
+            ("route", "phase")
+        )
+        self.queries = Counter("api_db_queries_total", "DuckDB statements executed", ("route",))
+        # (route, seconds since process start) of the first answered request
+        self.first_request = None
+        self._first_request_listeners = []
+        self._samplers = []
+
+    def add_sampler(self, sampler):
+        """Register a callable returning [(name, help, type, [(labels, value)])] at scrape time."""
+        self._samplers.append(sampler)
+
+    def add_first_request_listener(self, listener):
+        """Call listener(route, seconds since process start) once the first request is answered."""
+        self._first_request_listeners.append(listener)
+
+    def record_request(self, route, method, status, seconds, timing):
+        if self.first_request is None:
+            self.first_request = (route, process_uptime())
+            for listener in self._first_request_listeners:
+                listener(*self.first_request)
+        self.requests.inc(route, method, str(status))
+        if status >= 500:
+            self.errors.inc(route)
+        self.duration.observe(seconds, route)
+        for phase in ("queue", "db", "handler", "serialize"):
+            if phase in timing:
+                self.phases.observe(timing[phase], route, phase)
+        if timing.get("queries"):
+            self.queries.inc(route, amount=timing["queries"])
+
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.errors, self.in_flight, self.duration, self.phases, self.queries):
+            lines.extend(metric.render())
+        if self.first_request is not None:
+            lines.append("# HELP api_time_to_first_request_seconds Seconds from process start until the first request was answered")
+            lines.append("# TYPE api_time_to_first_request_seconds gauge")
+            lines.append(f"api_time_to_first_request_seconds {_format_value(self.first_request[1])}")
+        for sampler in self._samplers:
+            for name, help_text, kind, samples in sampler():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording count, status, latency and in-flight requests per route.
+
+    Only paths of registered routes get their own label; anything else is
+    counted as "unmatched" so scanners cannot blow up label cardinality.
+    """
+
+    def __init__(self, app, registry, route_paths):
+        self.app = app
+        self.registry = registry
+        self.route_paths = route_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        route = path if path in self.route_paths() else "unmatched"
+        status = 500
+        timing = {"route": route}
+        token = _request_timing.set(timing)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.in_flight.inc(route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            seconds = time.perf_counter() - start
+            self.registry.in_flight.dec(route)
+            self.registry.record_request(route, scope["method"], status, seconds, timing)
+            _request_timing.reset(token)
+
+
+def current_timing():
+    """The active request's timing dict, or None outside a request."""
+    return _request_timing.get()
+
+
+def add_time(phase, seconds):
+    """Charge time to a phase of the active request (no-op outside a request)."""
+    timing = _request_timing.get()
+    if timing is not None:
+        timing[phase] = timing.get(phase, 0.0) + seconds
+
+
+class _DbTimer:
+    __slots__ = ("seconds", "queries", "route")
+
+    def __init__(self, route=None):
+        self.seconds = 0.0
+        self.queries = 0
+        self.route = route
+
+
+def add_query_listener(listener):
+    """Call listener(sql, params, rows, seconds, route) after each timed statement is fetched."""
+    _query_listeners.append(listener)
+
+
+def active_db_timer():
+    """The calling thread's DB timer while timed_call() runs, else None."""
+    return getattr(_local, "db_timer", None)
+
+
+def timed_call(fn, timing, submitted, args, kwargs):
+    """
+    Run fn(*args, **kwargs) with DB timing active on this thread.
+
+    Adds queue (since ``submitted``), db and handler seconds and the query
+    count to ``timing``, even when fn raises.
+    """
+    started = time.perf_counter()
+    timer = _local.db_timer = _DbTimer(timing.get("route") if timing is not None else None)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _local.db_timer = None
+        elapsed = time.perf_counter() - started
+        if timing is not None:
+            timing["queue"] = timing.get("queue", 0.0) + started - submitted
+            timing["db"] = timing.get("db", 0.0) + timer.seconds
+            timing["handler"] = timing.get("handler", 0.0) + max(0.0, elapsed - timer.seconds)
+            timing["queries"] = timing.get("queries", 0) + timer.queries
+
+
+class TimedConnection:
+    """
+    DuckDB connection/cursor proxy charging execute and fetch time to a DB timer.
+
+    Each statement is reported to the query listeners once its result is
+    fetched, with its row count and combined execute + fetch time.
+    """
+
+    __slots__ = ("_con", "_timer", "_sql", "_params", "_seconds")
+
+    def __init__(self, con, timer):
+        self._con = con
+        self._timer = timer
+        self._sql = None
+        self._params = None
+        self._seconds = 0.0
+
+    def execute(self, sql, parameters=None):
+        self._report(None)
+        start = time.perf_counter()
+        try:
+            if parameters is None:
+                self._con.execute(sql)
+            else:
+                self._con.execute(sql, parameters)
+        finally:
+            self._seconds = time.perf_counter() - start
+            self._timer.seconds += self._seconds
+            self._timer.queries += 1
+        self._sql, self._params = sql, parameters
+        return self
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return getattr(self._con, method)(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._timer.seconds += elapsed
+            self._seconds += elapsed
+
+    def fetchone(self):
+        row = self._fetch("fetchone")
+        self._report(0 if row is None else 1)
+        return row
+
+    def fetchall(self):
+        rows = self._fetch("fetchall")
+        self._report(len(rows))
+        return rows
+
+    def fetchmany(self, size=1):
+        return self._fetch("fetchmany", size)
+
+    def fetchnumpy(self):
+        columns = self._fetch("fetchnumpy")
+        self._report(len(next(iter(columns.values()), ())))
+        return columns
+
+    def fetch_arrow_table(self):
+        table = self._fetch("fetch_arrow_table")
+        self._report(table.num_rows)
+        return table
+
+    def to_arrow_table(self):
+        table = self._fetch("to_arrow_table")
+        self._report(table.num_rows)
+        return table
+
+    def _report(self, rows):
+        if self._sql is None or not _query_listeners:
+            return
+        sql, params = self._sql, self._params
+        self._sql = self._params = None
+        for listener in _query_listeners:
+            listener(sql, params, rows, self._seconds, self._timer.route)
+
+    def __getattr__(self, name):
+        return getattr(self._con, name)
@@ -0,0 +1,142 @@
+"""
+Parquet export of the IMDb database and views for serving from it.
+
+The builder can write every table the API reads to a directory of
+zstd-compressed Parquet files:
+
+    <dir>/manifest.json
+    <dir>/title_basics/titleType=movie/data_0.parquet
+    <dir>/title_basics/titleType=tvSeries/data_0.parquet
+    <dir>/title_ratings/data_0.parquet
+    ...
+
+Tables with a titleType column are hive-partitioned by it, and rows are
+written sorted by the table's lookup key (tconst, or series for the
+episode tables) so each row group's min/max statistics cover a narrow
+key range. Pointing DB_PATH at such a directory makes open_database()
+return an in-memory connection with one view per table over the files,
+so the API and chart script run unchanged.
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import duckdb
+
+
+MANIFEST_NAME = "manifest.json"
+
+# Sort order and hive partitioning of each exported table
+PARQUET_LAYOUT = {
+    "title_basics": {"order_by": "tconst", "partition_by": ["titleType"]},
+    "title_ratings": {"order_by": "tconst", "partition_by": []},
+    "title_episode": {"order_by": "parentTconst, seasonNumber, episodeNumber", "partition_by": []},
+    "title_genre": {"order_by": "genre, tconst", "partition_by": ["titleType"]},
+    "genre_dim": {"order_by": "bit", "partition_by": []},
+    "episode_panel": {"order_by": "series_tconst, seasonNumber, episodeNumber", "partition_by": []},
+    "series_stats": {"order_by": "rank_score DESC NULLS LAST, tconst", "partition_by": []},
+    "dataset_info": {"order_by": "key", "partition_by": []}
+}
+
+DEFAULT_ROW_GROUP_SIZE = 122880
+
+
+def is_parquet_store(path):
+    """Whether a path is a Parquet export directory (has a manifest)."""
+    return (Path(path) / MANIFEST_NAME).is_file()
+
+
+def read_manifest(path):
+    with open(Path(path) / MANIFEST_NAME) as f:
+        return json.load(f)
+
+
+def export_parquet(con, out_dir, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    """
+    Write every table in PARQUET_LAYOUT to out_dir and a manifest describing them.
+
+    Each table is written to a staging directory and moved into place once
+    complete, and the manifest is replaced last, so a failed export never
+    leaves a half-written table behind. Returns the manifest.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    version = con.execute("SELECT value FROM dataset_info WHERE key = 'dataset_version'").fetchone()[0]
+
+    tables = {}
+    for table, layout in PARQUET_LAYOUT.items():
+        columns = [row[0] for row in con.execute(f"DESCRIBE {table}").fetchall()]
+        staging = out_dir / f".{table}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+
+        # One sorted COPY per partition: a PARTITION_BY write does not keep
+        # the ORDER BY within each file, which would defeat min/max pruning
+        partition_by = layout["partition_by"]
+        if partition_by:
+            partitions = con.execute(f"SELECT DISTINCT {', '.join(partition_by)} FROM {table}").fetchall()
+        else:
+            partitions = [()]
+        for values in partitions:
+            target = staging.joinpath(*(f"{col}={value}" for col, value in zip(partition_by, values)))
+            target.mkdir(parents=True, exist_ok=True)
+            where = " AND ".join(f"{col} IS NOT DISTINCT FROM ?" for col in partition_by) or "TRUE"
+            select = f"* EXCLUDE ({', '.join(partition_by)})" if partition_by else "*"
+            con.execute(f"""
+                COPY (SELECT {select} FROM {table} WHERE {where} ORDER BY {layout['order_by']})
+                TO '{target / "data_0.parquet"}'
+                (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {row_group_size})
+            """, list(values))
+
+        final = out_dir / table
+        shutil.rmtree(final, ignore_errors=True)
+        staging.rename(final)
+
+        files = sorted(final.rglob("*.parquet"))
+        tables[table] = {
+            "columns": columns,
+            "partition_by": layout["partition_by"],
+            "files": len(files),
+            "bytes": sum(f.stat().st_size for f in files),
+            "rows": con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        }
+
+    manifest = {"dataset_version": version, "compression": "zstd", "tables": tables}
+    tmp_manifest = out_dir / f".{MANIFEST_NAME}.tmp"
+    with open(tmp_manifest, "w") as f:
+        json.dump(manifest, f, indent=2)
+    tmp_manifest.replace(out_dir / MANIFEST_NAME)
+    return manifest
+
+
+def attach_parquet_views(con, path):
+    """Create one view per manifest table over its Parquet files; returns the manifest."""
+    path = Path(path).resolve()
+    manifest = read_manifest(path)
+    for table, info in manifest["tables"].items():
+        pattern = path / table / "**" / "*.parquet"
+        hive = "true" if info["partition_by"] else "false"
+        # Explicit column list: hive partition columns come back last otherwise
+        columns = ", ".join(info["columns"])
+        con.execute(f"""
+            CREATE OR REPLACE VIEW {table} AS
+            SELECT {columns}
+            FROM read_parquet('{pattern}', hive_partitioning={hive})
+        """)
+    return manifest
+
+
+def open_database(path, config=None):
+    """
+    Open a read-only connection to a .duckdb file or a Parquet export directory.
+
+    config is passed to duckdb.connect() (e.g. memory_limit, threads).
+    """
+    if Path(path).is_dir():
+        if not is_parquet_store(path):
+            raise RuntimeError(f"{path} is a directory without {MANIFEST_NAME}")
+        con = duckdb.connect(config=config or {})
+        attach_parquet_views(con, path)
+        return con
+    return duckdb.connect(str(path), read_only=True, config=config or {})
@@ -0,0 +1,115 @@
+"""
+Bounded thread pool for running DuckDB queries off the event loop.
+
+Each worker thread lazily opens its own cursor (``con.cursor()``) on the
+shared read-only connection, so independent requests can execute
+concurrently instead of serializing on one connection.
+
+Configuration (environment):
+    DB_POOL_SIZE   - worker threads (default: max(2, CPU count))
+    DB_POOL_QUEUE  - calls allowed to wait for a worker before new ones
+                     are rejected (default: 64)
+"""
+
+import os
+import asyncio
+import functools
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def default_pool_size():
+    """Default worker count: one per CPU, but never fewer than two."""
+    return max(2, os.cpu_count() or 1)
+
+
+class QueryPoolFull(RuntimeError):
+    """Raised when the pool and its wait queue are both saturated."""
+
+
+class QueryPool:
+    """Run blocking query functions on worker threads with per-thread cursors."""
+
+    def __init__(self, con, size=None, queue_depth=None):
+        self.size = size or int(os.getenv("DB_POOL_SIZE", "0")) or default_pool_size()
+        self.queue_depth = queue_depth if queue_depth is not None else int(os.getenv("DB_POOL_QUEUE", "64"))
+        self._con = con
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cursors = []
+        self._pending = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.size,
+            thread_name_prefix="duckdb-query",
+            initializer=self._init_worker
+        )
+
+    def _init_worker(self):
+        self._local.is_worker = True
+
+    def is_worker_thread(self):
+        """Whether the calling thread belongs to this pool."""
+        return getattr(self._local, "is_worker", False)
+
+    def cursor(self):
+        """The calling worker thread's own cursor (created on first use)."""
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._con.cursor()
+            self._local.cursor = cursor
+            with self._lock:
+                self._cursors.append(cursor)
+        return cursor
+
+    @property
+    def pending(self):
+        """Calls currently running or waiting for a worker."""
+        return self._pending
+
+    def _call(self, fn, args, kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` on a worker thread and await its result.
+
+        The call sees the caller's context variables, like asyncio.to_thread.
+        """
+        with self._lock:
+            if self._pending >= self.size + self.queue_depth:
+                raise QueryPoolFull(
+                    f"Query pool saturated ({self._pending} queries in flight)"
+                )
+            self._pending += 1
+        # The worker decrements the pending count when the call finishes, so a
+        # cancelled request keeps its slot until its query actually completes
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        try:
+            future = loop.run_in_executor(
+                self._executor, functools.partial(context.run, self._call, fn, args, kwargs)
+            )
+        except BaseException:
+            # Never submitted (e.g. the pool is closed), so no worker will release the slot
+            with self._lock:
+                self._pending -= 1
+            raise
+        return await future
+
+    def close(self):
+        """Stop the workers and close their cursors."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            # Running calls have finished and released their slots; cancelled ones never will
+            self._pending = 0
+            for cursor in self._cursors:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            self._cursors.clear()
@@ -0,0 +1,108 @@
+"""
+In-process LRU cache for encoded API responses.
+
+Entries are keyed by dataset version, endpoint and normalized query
+parameters, and hold the already-encoded JSON body so a hit costs one
+dictionary lookup and no re-serialization. Eviction is bounded by the
+total size of the cached bodies rather than by entry count.
+
+Configuration (environment):
+    RESPONSE_CACHE_MB - total cache size in MB (default: 32, 0 disables)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+def make_cache_key(dataset_version, endpoint, params):
+    """
+    Build a cache key from an endpoint and its parsed query parameters.
+
+    Parameters arrive already typed and with defaults filled in, so sorting
+    them is enough for `?limit=20` and an omitted `limit` to share a key.
+    """
+    return (dataset_version, endpoint, tuple(sorted(params.items())))
+
+
+class ResponseCache:
+    """Thread-safe LRU of encoded bodies bounded by total byte size."""
+
+    def __init__(self, max_bytes=None, max_entry_fraction=0.25):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("RESPONSE_CACHE_MB", "32")) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        # A single huge response should not flush the whole cache
+        self.max_entry_bytes = int(max_bytes * max_entry_fraction)
+        self.dataset_version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def set_dataset_version(self, version):
+        """Switch to a new dataset version, dropping entries from the old one."""
+        if version != self.dataset_version:
+            self.clear()
+            self.dataset_version = version
+
+    def key(self, endpoint, params):
+        return make_cache_key(self.dataset_version, endpoint, params)
+
+    def get(self, key):
+        """Return the cached body for a key, or None."""
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        """Store an encoded body, evicting least recently used entries as needed."""
+        size = len(body)
+        if not self.enabled or size > self.max_entry_bytes:
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+            self._entries[key] = body
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "dataset_version": self.dataset_version,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None
+            }
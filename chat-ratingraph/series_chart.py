@@ -0,0 +1,125 @@
+"""
+Ratingraph-style episode rating chart rendering.
+
+Draws compute_series_graph() output with matplotlib's object API onto a
+caller-supplied Figure, so batch workers can keep one Figure per process
+and clear it between charts instead of creating (and leaking) a new one
+for every series.
+"""
+
+import matplotlib
+matplotlib.use("Agg")
+# Fixed salt for SVG element ids, so identical charts are identical bytes
+matplotlib.rcParams["svg.hashsalt"] = "ratingraph"
+
+from pathlib import Path
+
+import matplotlib.patches as mpatches
+from matplotlib.figure import Figure
+
+
+# Bump when draw_series_chart() output changes, so cached renders are redone
+CHART_RENDER_VERSION = 1
+CHART_FIGSIZE = (14, 7)
+CHART_DPI = 150
+
+# One reusable figure per batch worker process (see init_render_worker)
+_worker_figure = None
+
+
+def chart_filename(series_info):
+    """Default chart file name for a series."""
+    safe_name = series_info['title'].replace('/', '_').replace(' ', '_')
+    return f"series_ratings_{safe_name}.png"
+
+
+def new_figure():
+    return Figure(figsize=CHART_FIGSIZE)
+
+
+def draw_series_chart(fig, series_info, graph):
+    """Clear a figure and draw a series' episode ratings on it."""
+    fig.clear()
+    ax = fig.subplots()
+
+    episodes = graph['episodes']
+
+    # Color palette for seasons
+    colors = matplotlib.colormaps['tab20'].colors
+
+    # Plot each season (episodes of a season occupy a contiguous index range)
+    legend_handles = []
+
+    for season in graph['seasons']:
+        season_num = season['season']
+        color = colors[season_num % len(colors)]
+
+        x_positions = list(range(season['start_index'], season['end_index'] + 1))
+        ratings = [episodes[i]['rating'] for i in x_positions]
+
+        ax.plot(x_positions, ratings, 'o-', color=color,
+                linewidth=2, markersize=8, alpha=0.8)
+
+        legend_handles.append(mpatches.Patch(color=color, label=f'Season {season_num}'))
+
+    # Styling
+    year_range = f"{series_info['startYear']}"
+    if series_info['endYear']:
+        year_range += f"-{series_info['endYear']}"
+
+    ax.set_title(f"{series_info['title']} ({year_range}) - Episode Ratings",
+                 fontsize=16, fontweight='bold', pad=20)
+    ax.set_xlabel('Episode (Sequential)', fontsize=12)
+    ax.set_ylabel('IMDb Rating', fontsize=12)
+    ax.set_ylim(0, 10)
+    ax.grid(True, alpha=0.3, linestyle='--')
+    ax.legend(handles=legend_handles, loc='best', ncol=3, fontsize=9)
+
+    # Add average line
+    avg_rating = graph['average_rating']
+    ax.axhline(y=avg_rating, color='red', linestyle='--',
+               alpha=0.5, linewidth=1.5, label=f'Average: {avg_rating:.2f}')
+
+    fig.tight_layout()
+
+
+def save_series_chart(series_info, graph, output, fmt="png", fig=None):
+    """
+    Render a series chart to a path or binary file object.
+
+    Pass a figure to reuse it; otherwise a new one is created and dropped.
+    Paths are written through a temporary file, so readers never see a
+    partially written chart.
+    """
+    fig = fig or new_figure()
+    draw_series_chart(fig, series_info, graph)
+    # No creation date in SVG output (see svg.hashsalt above)
+    options = {"metadata": {"Date": None}} if fmt == "svg" else {}
+    if not isinstance(output, (str, Path)):
+        fig.savefig(output, format=fmt, dpi=CHART_DPI, bbox_inches='tight', **options)
+        return
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output.with_name(output.name + ".tmp")
+    fig.savefig(tmp_path, format=fmt, dpi=CHART_DPI, bbox_inches='tight', **options)
+    tmp_path.replace(output)
+
+
+def init_render_worker():
+    """Process pool initializer: create the worker's reusable figure."""
+    global _worker_figure
+    _worker_figure = new_figure()
+
+
+def render_job(job):
+    """
+    Render one (series_info, graph, output_path) job in a batch worker.
+
+    Returns (output_path, error message or None).
+    """
+    series_info, graph, output_path = job
+    try:
+        save_series_chart(series_info, graph, output_path, fig=_worker_figure)
+        return output_path, None
+    except Exception as e:
+        return output_path, str(e)
@@ -0,0 +1,219 @@
+"""
+Episode rating graph computation shared by the API and the chart script.
+
+One query over episode_panel returns every episode of a series in graph
+order (season, then episode) with its episode_index, fetched as numpy
+columns with fetchnumpy(). The per-season statistics and linear fits
+(y = slope * episode_index + intercept), the overall fit and the rating
+range are computed on the rating column with numpy, for all seasons at
+once. Sums are cumulative sums, which add left to right like the original
+per-episode loop did (np.sum adds pairwise), so every value is
+bit-identical to the original computation.
+SERIES_GRAPHS_QUERY returns the same columns for many series at once.
+"""
+
+import numpy as np
+
+
+# _run_sums() sums runs of a width shared by fewer than width / RUN_SLICE_RATIO
+# runs one slice at a time instead of as padded rows
+RUN_SLICE_RATIO = 16
+
+SERIES_GRAPH_QUERY = """
+    SELECT
+        seasonNumber,
+        episodeNumber,
+        episode_title,
+        averageRating,
+        numVotes,
+        episode_tconst,
+        CAST(ROW_NUMBER() OVER (ORDER BY seasonNumber, episodeNumber, episode_tconst) - 1 AS INTEGER) as episode_index
+    FROM episode_panel
+    WHERE series_tconst = ?
+    ORDER BY episode_index
+"""
+
+# Same columns as SERIES_GRAPH_QUERY, prefixed by series_tconst
+SERIES_GRAPHS_QUERY = """
+    SELECT
+        series_tconst,
+        seasonNumber,
+        episodeNumber,
+        episode_title,
+        averageRating,
+        numVotes,
+        episode_tconst,
+        CAST(ROW_NUMBER() OVER (
+            PARTITION BY series_tconst ORDER BY seasonNumber, episodeNumber, episode_tconst
+        ) - 1 AS INTEGER) as episode_index
+    FROM episode_panel
+    WHERE series_tconst IN (SELECT UNNEST(?::VARCHAR[]))
+    ORDER BY series_tconst, episode_index
+"""
+
+
+def _fetch_columns(con, sql, params):
+    """The result's columns as numpy arrays."""
+    return list(con.execute(sql, params).fetchnumpy().values())
+
+
+def fetch_graph_columns(con, series_tconst):
+    """SERIES_GRAPH_QUERY columns for a series (empty arrays when it has no rated episodes)."""
+    return _fetch_columns(con, SERIES_GRAPH_QUERY, [series_tconst])
+
+
+def graph_rows(columns):
+    """SERIES_GRAPH_QUERY rows, as tuples of Python values, from its columns."""
+    return list(zip(*(column.tolist() for column in columns)))
+
+
+def _run_sums(values, starts, counts):
+    """
+    Sum of each run values[start:start + count], bit-identical to Python's
+    sum() over it.
+
+    np.sum adds pairwise, a cumulative sum adds left to right like sum().
+    Runs are laid out as rows padded to the next power of two (so at most
+    twice the values are touched) and each row's cumulative sum is read at
+    its last value. Adding 0.0 turns a -0.0 sum into 0.0, as sum() does.
+    """
+    sums = np.empty(len(starts))
+    widths = 2 ** np.ceil(np.log2(counts)).astype(np.int64)
+    for width in np.unique(widths).tolist():
+        rows = np.flatnonzero(widths == width)
+        if len(rows) * RUN_SLICE_RATIO < width:
+            # A few long runs: summing slices one by one skips the padding
+            for row in rows.tolist():
+                start = starts[row]
+                sums[row] = np.cumsum(values[start:start + counts[row]])[-1]
+            continue
+        index = np.minimum(starts[rows, None] + np.arange(width), len(values) - 1)
+        sums[rows] = np.cumsum(values[index], axis=1)[np.arange(len(rows)), counts[rows] - 1]
+    return sums + 0.0
+
+
+def _fits(ratings, starts, counts):
+    """
+    Rating sum and least-squares fit of ratings over episode_index for each
+    run of episodes, with the original graph code's formulas.
+
+    Returns a list of (total, slope, intercept) per run. A single episode,
+    or no spread in episode_index, gets a flat line at the mean.
+    """
+    totals = _run_sums(ratings, starts, counts)
+    mean_x = (2 * starts + counts - 1) * counts // 2 / counts
+    mean_y = totals / counts
+    run = np.repeat(np.arange(len(starts)), counts)
+    dx = np.arange(len(ratings)) - mean_x[run]
+    numerators = _run_sums(dx * (ratings - mean_y[run]), starts, counts)
+    denominators = _run_sums(dx ** 2, starts, counts)
+
+    fits = []
+    for start, count, total, x, y, numerator, denominator in zip(
+        starts.tolist(), counts.tolist(), totals.tolist(), mean_x.tolist(), mean_y.tolist(),
+        numerators.tolist(), denominators.tolist()
+    ):
+        if count == 1:
+            fits.append((total, 0, ratings[start].item()))
+        elif denominator == 0:
+            fits.append((total, 0, y))
+        else:
+            slope = numerator / denominator
+            fits.append((total, slope, y - slope * x))
+    return fits
+
+
+def _trendline(slope, intercept):
+    return {"slope": round(slope, 4), "intercept": round(intercept, 2)}
+
+
+def graph_stats(season_numbers, ratings):
+    """
+    Season entries and series-wide fields from the season and rating
+    columns of a series' episodes in episode_index order.
+
+    Returns (seasons, overview); overview holds ``overall_trendline``,
+    ``rating_range`` and ``average_rating``.
+    """
+    season_numbers = np.asarray(season_numbers)
+    ratings = np.asarray(ratings, dtype=np.float64)
+    n = len(ratings)
+
+    # Each season is a contiguous run of episode_index
+    starts = np.flatnonzero(np.r_[True, season_numbers[1:] != season_numbers[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    seasons = []
+    for season, start, count, (total, slope, intercept) in zip(
+        season_numbers[starts].tolist(), starts.tolist(), counts.tolist(), _fits(ratings, starts, counts)
+    ):
+        seasons.append({
+            "season": season,
+            "episode_count": count,
+            "avg_rating": round(total / count, 2),
+            "start_index": start,
+            "end_index": start + count - 1,
+            "trendline": _trendline(slope, intercept)
+        })
+
+    [(total, slope, intercept)] = _fits(ratings, np.array([0]), np.array([n]))
+    overview = {
+        "overall_trendline": _trendline(slope, intercept),
+        "rating_range": {
+            "min": round(ratings.min().item(), 1),
+            "max": round(ratings.max().item(), 1)
+        },
+        "average_rating": total / n
+    }
+    return seasons, overview
+
+
+def compute_series_graph(con, series_tconst):
+    """
+    Episodes, per-season stats and trendlines for a series.
+
+    Returns None when the series has no rated episodes, otherwise a dict with
+    ``episodes``, ``seasons``, ``overall_trendline``, ``rating_range`` (the
+    /series_episode_graph payload) and ``average_rating``.
+    """
+    columns = fetch_graph_columns(con, series_tconst)
+    if not len(columns[0]):
+        return None
+    return _shape_graph(columns)
+
+
+def compute_series_graphs(con, series_tconsts):
+    """
+    compute_series_graph() for many series with one query.
+
+    Returns {tconst: graph}; series without rated episodes are absent.
+    """
+    if not series_tconsts:
+        return {}
+    tconsts, *columns = _fetch_columns(con, SERIES_GRAPHS_QUERY, [list(series_tconsts)])
+    if not len(tconsts):
+        return {}
+    bounds = [0, *(np.flatnonzero(tconsts[1:] != tconsts[:-1]) + 1).tolist(), len(tconsts)]
+    return {
+        tconsts[start]: _shape_graph([column[start:end] for column in columns])
+        for start, end in zip(bounds, bounds[1:])
+    }
+
+
+def graph_episode(row):
+    """An episode entry of the graph payload from a SERIES_GRAPH_QUERY row."""
+    return {
+        "season": row[0],
+        "episode": row[1],
+        "title": row[2],
+        "rating": row[3],
+        "votes": row[4],
+        "tconst": row[5],
+        "episode_index": row[6]
+    }
+
+
+def _shape_graph(columns):
+    """The graph payload from SERIES_GRAPH_QUERY columns."""
+    seasons, overview = graph_stats(columns[0], columns[3])
+    episodes = [graph_episode(row) for row in graph_rows(columns)]
+    return {"episodes": episodes, "seasons": seasons, **overview}
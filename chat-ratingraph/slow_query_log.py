@@ -0,0 +1,210 @@
+"""
+Slow-query log with sampled EXPLAIN ANALYZE profiles.
+
+Statements slower than a threshold are recorded in a bounded in-memory
+ring (and optionally appended to a JSONL file) with their fingerprint,
+bound parameters, row count and duration. Entries are grouped by
+fingerprint -- the SQL with literals and IN lists collapsed -- so the
+many filter combinations of /browse_tv and friends show up as distinct
+plan shapes with their own counts.
+
+For a sample of slow statements the query is re-run under EXPLAIN ANALYZE
+on a background thread with its own cursor, and the resulting profile is
+attached to the entry; the request that hit the slow query is not delayed.
+
+Configuration (environment):
+    SLOW_QUERY_MS               - threshold in milliseconds (default: 250, 0 disables)
+    SLOW_QUERY_RING             - entries kept in memory (default: 200)
+    SLOW_QUERY_LOG              - JSONL file to append entries to (default: none)
+    SLOW_QUERY_PROFILE_RATE     - fraction of slow queries to profile (default: 1.0)
+    SLOW_QUERY_PROFILE_INTERVAL - seconds before the same fingerprint is profiled
+                                  again (default: 300)
+"""
+
+import os
+import re
+import json
+import queue
+import random
+import hashlib
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """SQL with literals replaced by ? and runs of placeholders collapsed."""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("?...", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def fingerprint(sql):
+    """Short stable id of a statement's shape."""
+    return hashlib.sha1(normalize_sql(sql).encode("utf-8")).hexdigest()[:12]
+
+
+class SlowQueryLog:
+    """Ring of slow statements with per-fingerprint aggregates."""
+
+    def __init__(self, threshold_ms=None, capacity=None, path=None,
+                 profile_rate=None, profile_interval=None):
+        self.threshold_ms = float(os.getenv("SLOW_QUERY_MS", "250")) if threshold_ms is None else threshold_ms
+        self.capacity = int(os.getenv("SLOW_QUERY_RING", "200")) if capacity is None else capacity
+        self.path = os.getenv("SLOW_QUERY_LOG") if path is None else path
+        self.profile_rate = float(os.getenv("SLOW_QUERY_PROFILE_RATE", "1.0")) if profile_rate is None else profile_rate
+        self.profile_interval = (
+            float(os.getenv("SLOW_QUERY_PROFILE_INTERVAL", "300")) if profile_interval is None else profile_interval
+        )
+        self._entries = deque(maxlen=self.capacity)
+        self._by_fingerprint = {}
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._profile_queue = queue.Queue(maxsize=16)
+        self._profiler = None
+        self._con = None
+
+    @property
+    def enabled(self):
+        return self.threshold_ms > 0
+
+    def start_profiler(self, con):
+        """Start the background EXPLAIN ANALYZE worker on its own cursor of con."""
+        if self._profiler is not None or self.profile_rate <= 0:
+            return
+        self._con = con.cursor()
+        self._profiler = threading.Thread(target=self._profile_loop, name="slow-query-profiler", daemon=True)
+        self._profiler.start()
+
+    def stop_profiler(self):
+        if self._profiler is None:
+            return
+        self._profile_queue.put(None)
+        self._profiler.join(timeout=5)
+        self._profiler = None
+        try:
+            self._con.close()
+        except Exception:
+            pass
+
+    def observe(self, sql, params, rows, seconds, route=None):
+        """Query listener: record the statement if it exceeded the threshold."""
+        duration_ms = seconds * 1000
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return
+        fp = fingerprint(sql)
+        entry = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "route": route,
+            "fingerprint": fp,
+            "duration_ms": round(duration_ms, 2),
+            "rows": rows,
+            "params": list(params) if params is not None else [],
+            "sql": _WHITESPACE.sub(" ", sql).strip(),
+            "profile": None
+        }
+        now = datetime.now(timezone.utc).timestamp()
+        with self._lock:
+            self._entries.append(entry)
+            stats = self._by_fingerprint.get(fp)
+            if stats is None:
+                stats = self._by_fingerprint[fp] = {
+                    "fingerprint": fp,
+                    "normalized_sql": normalize_sql(sql),
+                    "routes": set(),
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "worst": None,
+                    "profile": None,
+                    "profiled_at": None
+                }
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            if route:
+                stats["routes"].add(route)
+            if duration_ms >= stats["max_ms"]:
+                stats["max_ms"] = duration_ms
+                stats["worst"] = entry
+            want_profile = (
+                self._profiler is not None
+                and (stats["profiled_at"] is None or now - stats["profiled_at"] >= self.profile_interval)
+                and random.random() < self.profile_rate
+            )
+            if want_profile:
+                stats["profiled_at"] = now
+        if want_profile:
+            try:
+                self._profile_queue.put_nowait((entry, sql, params))
+            except queue.Full:
+                pass
+        if self.path:
+            self._append(entry)
+
+    def _append(self, entry):
+        line = json.dumps(entry, default=str, ensure_ascii=False)
+        with self._file_lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+    def _profile_loop(self):
+        while True:
+            job = self._profile_queue.get()
+            if job is None:
+                return
+            entry, sql, params = job
+            try:
+                if params is None:
+                    rows = self._con.execute(f"EXPLAIN ANALYZE {sql}").fetchall()
+                else:
+                    rows = self._con.execute(f"EXPLAIN ANALYZE {sql}", params).fetchall()
+                profile = "\n".join(row[-1] for row in rows)
+            except Exception as e:
+                profile = f"profiling failed: {e}"
+            with self._lock:
+                entry["profile"] = profile
+                stats = self._by_fingerprint.get(entry["fingerprint"])
+                if stats is not None:
+                    stats["profile"] = profile
+            if self.path:
+                self._append({"profile_for": entry["fingerprint"], "time": entry["time"], "profile": profile})
+
+    def worst(self, limit=20, order_by="total_ms"):
+        """Fingerprints ordered by total, max or average time, or by count."""
+        with self._lock:
+            groups = [dict(stats, routes=sorted(stats["routes"])) for stats in self._by_fingerprint.values()]
+        for group in groups:
+            group["avg_ms"] = round(group["total_ms"] / group["count"], 2)
+            group["total_ms"] = round(group["total_ms"], 2)
+            group["max_ms"] = round(group["max_ms"], 2)
+            group.pop("profiled_at")
+        groups.sort(key=lambda group: group[order_by], reverse=True)
+        return groups[:limit]
+
+    def recent(self, limit=20):
+        with self._lock:
+            return list(self._entries)[-limit:][::-1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "threshold_ms": self.threshold_ms,
+                "entries": len(self._entries),
+                "capacity": self.capacity,
+                "fingerprints": len(self._by_fingerprint),
+                "log_file": self.path,
+                "profiling": self._profiler is not None
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_fingerprint.clear()
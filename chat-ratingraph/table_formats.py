@@ -0,0 +1,87 @@
+"""
+Columnar response formats for the list endpoints.
+
+The default JSON format builds one Python dict per row. With
+``format=columns`` an endpoint returns one JSON array per column instead,
+fetched with DuckDB's fetchnumpy() rather than as row tuples. With
+``format=arrow`` it returns an Apache Arrow IPC stream of the table DuckDB
+builds itself, without a Python object per row or value; the rest of the
+response (filters, counts) travels as JSON in the schema metadata under
+"response".
+
+format=arrow needs pyarrow, which is only imported on first use.
+"""
+
+import importlib.util
+import duckdb
+
+
+FORMATS = ("json", "columns", "arrow")
+FORMAT_HELP = "Response format: json (an object per row), columns (an array per column) or arrow (Arrow IPC stream)"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Newer DuckDB releases deprecate fetch_arrow_table() in favour of to_arrow_table()
+_ARROW_FETCH = "to_arrow_table" if hasattr(duckdb.DuckDBPyConnection, "to_arrow_table") else "fetch_arrow_table"
+
+
+class ColumnTable:
+    """
+    A query result held by column.
+
+    ``data`` is a pyarrow Table for format=arrow, else {name: [values]}.
+    """
+
+    def __init__(self, format, data, num_rows):
+        self.format = format
+        self.data = data
+        self.num_rows = num_rows
+
+    def value(self, name, index=0):
+        """A column's value in row ``index`` (negative counts from the end); None when there are no rows."""
+        if not self.num_rows:
+            return None
+        if self.format == "arrow":
+            return self.data.column(name)[index % self.num_rows].as_py()
+        return self.data[name][index]
+
+    def pop(self, name, index=0):
+        """Remove a column and return its value in row ``index`` (see value())."""
+        value = self.value(name, index)
+        if self.format == "arrow":
+            self.data = self.data.remove_column(self.data.schema.get_field_index(name))
+        else:
+            del self.data[name]
+        return value
+
+    def to_arrow_ipc(self, metadata):
+        """The table as an Arrow IPC stream, with metadata (JSON bytes) under "response"."""
+        import pyarrow
+        table = self.data.replace_schema_metadata({"response": metadata})
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+def fetch_columns(result, format, rank_start=None):
+    """
+    Fetch an executed query's result as a ColumnTable.
+
+    Column names are the query's column aliases. rank_start prepends a
+    "rank" column numbering the rows from it, like the row format's rank.
+    """
+    if format == "arrow":
+        import pyarrow
+        table = getattr(result, _ARROW_FETCH)()
+        if rank_start is not None:
+            ranks = pyarrow.array(range(rank_start, rank_start + table.num_rows), pyarrow.int64())
+            table = table.add_column(0, "rank", ranks)
+        return ColumnTable(format, table, table.num_rows)
+
+    # Masked arrays (columns with NULLs) turn into lists with None
+    data = {name: values.tolist() for name, values in result.fetchnumpy().items()}
+    num_rows = len(next(iter(data.values()), ()))
+    if rank_start is not None:
+        data = {"rank": list(range(rank_start, rank_start + num_rows)), **data}
+    return ColumnTable(format, data, num_rows)
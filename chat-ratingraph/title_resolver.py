@@ -0,0 +1,185 @@
+"""
+In-memory title name resolver.
+
+Maps a normalized title (case-folded, accent-stripped, leading article and
+punctuation collapsed) to its candidate tconsts, most-voted first, so that
+name lookups never have to scan title_basics.
+
+Usage:
+    resolver = TitleResolver()
+    resolver.load(con)
+    match = resolver.resolve("tvSeries", "breaking bad")
+"""
+
+import re
+import sys
+import time
+import unicodedata
+from collections import namedtuple
+
+
+# Title types indexed at startup
+RESOLVER_TITLE_TYPES = ("tvSeries", "movie")
+
+LEADING_ARTICLES = ("the", "a", "an")
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+TitleMatch = namedtuple(
+    "TitleMatch",
+    ["tconst", "title", "start_year", "end_year", "genres", "num_votes"]
+)
+
+
+def normalize_title(name):
+    """
+    Normalize a title for lookups.
+
+    "The Office", "office" and "Office!" all map to "office";
+    "Élite" maps to "elite".
+    """
+    text = unicodedata.normalize("NFKD", name.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    words = _NON_WORD_RE.sub(" ", text).split()
+    if len(words) > 1 and words[0] in LEADING_ARTICLES:
+        words = words[1:]
+    return " ".join(words)
+
+
+class TitleResolver:
+    """
+    Normalized title -> candidates index for a set of title types.
+
+    Entries are kept in parallel lists (ordered by numVotes DESC, tconst)
+    instead of one object per title to keep the footprint small on the
+    1 GB production VM. The per-key value is a single row index, or a tuple
+    of row indices when several titles share a normalized name.
+    """
+
+    def __init__(self, title_types=RESOLVER_TITLE_TYPES):
+        self.title_types = tuple(title_types)
+        self._index = {}
+        self._keys = {}
+        self._tconst = []
+        self._title = []
+        self._start_year = []
+        self._end_year = []
+        self._genres = []
+        self._votes = []
+        self.loaded = False
+        self.load_seconds = None
+
+    def __len__(self):
+        return len(self._tconst)
+
+    def load(self, con, batch_size=50000):
+        """
+        Build the index from rated titles of the configured types.
+
+        Unrated titles are not indexed; callers fall back to SQL for them.
+        """
+        started = time.perf_counter()
+        index = {kind: {} for kind in self.title_types}
+        keys = {kind: [] for kind in self.title_types}
+        tconsts, titles, start_years, end_years, genres, votes = [], [], [], [], [], []
+
+        placeholders = ", ".join("?" for _ in self.title_types)
+        cursor = con.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT tb.titleType, tb.tconst, tb.primaryTitle, tb.startYear, tb.endYear, tb.genres, tr.numVotes
+                FROM title_basics tb
+                JOIN title_ratings tr ON tb.tconst = tr.tconst
+                WHERE tb.titleType IN ({placeholders})
+                    AND tb.primaryTitle IS NOT NULL
+                ORDER BY tr.numVotes DESC, tb.tconst
+            """, list(self.title_types))
+
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for kind, tconst, title, start_year, end_year, genre_str, num_votes in rows:
+                    key = normalize_title(title)
+                    if not key:
+                        continue
+                    row_id = len(tconsts)
+                    tconsts.append(tconst)
+                    titles.append(title)
+                    start_years.append(start_year)
+                    end_years.append(end_year)
+                    # Only a few thousand distinct genre combinations exist
+                    genres.append(sys.intern(genre_str) if genre_str else None)
+                    votes.append(num_votes)
+
+                    kind_index = index[kind]
+                    existing = kind_index.get(key)
+                    if existing is None:
+                        kind_index[key] = row_id
+                        keys[kind].append(key)
+                    elif isinstance(existing, int):
+                        kind_index[key] = (existing, row_id)
+                    else:
+                        kind_index[key] = existing + (row_id,)
+        finally:
+            cursor.close()
+
+        # The server loads while already answering lookups: publish the rows
+        # before the index pointing into them, and the keys last (see search)
+        self._tconst = tconsts
+        self._title = titles
+        self._start_year = start_years
+        self._end_year = end_years
+        self._genres = genres
+        self._votes = votes
+        self._index = index
+        self._keys = keys
+        self.loaded = True
+        self.load_seconds = time.perf_counter() - started
+        return self
+
+    def _match(self, row_id):
+        return TitleMatch(
+            self._tconst[row_id],
+            self._title[row_id],
+            self._start_year[row_id],
+            self._end_year[row_id],
+            self._genres[row_id],
+            self._votes[row_id]
+        )
+
+    def resolve(self, title_type, name):
+        """Most-voted title of a type matching the normalized name, or None."""
+        kind_index = self._index.get(title_type)
+        if not kind_index or not name:
+            return None
+        row_ids = kind_index.get(normalize_title(name))
+        if row_ids is None:
+            return None
+        return self._match(row_ids if isinstance(row_ids, int) else row_ids[0])
+
+    def search(self, title_type, text):
+        """
+        Most-voted title whose normalized name contains the normalized text.
+
+        Keys are scanned in popularity order, so common queries stop early.
+        """
+        needle = normalize_title(text) if text else ""
+        if not needle:
+            return None
+        keys = self._keys.get(title_type, ())
+        kind_index = self._index.get(title_type, {})
+        for key in keys:
+            if needle in key:
+                row_ids = kind_index[key]
+                return self._match(row_ids if isinstance(row_ids, int) else row_ids[0])
+        return None
+
+    def stats(self):
+        """Summary of the loaded index."""
+        return {
+            "loaded": self.loaded,
+            "titles": len(self._tconst),
+            "keys": {kind: len(keys) for kind, keys in self._keys.items()},
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None
+        }
@@ -0,0 +1,122 @@
+"""
+Startup warm-up and the readiness state behind /readyz.
+
+After a cold start the first queries pay for reading DuckDB blocks from
+disk. The API therefore warms up in the background once it is serving:
+
+    resolver   build the in-memory title resolver (always runs first)
+    tables     read every column of the hot tables (WARMUP_TABLES)
+    queries    run the most common requests (WARMUP_QUERIES, plus
+               /episodes and /series_episode_graph for the WARMUP_SERIES
+               top-ranked series) through their handlers, which also
+               fills the response cache
+
+WARMUP picks the optional steps ("tables,queries" by default, "off" for
+none). /readyz reports ready once the warm-up has finished, whether or not
+every step succeeded; /livez only says the process is serving.
+"""
+
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+
+WARMUP_STEPS = ("tables", "queries")
+
+DEFAULT_WARMUP_TABLES = "series_stats,title_ratings,title_basics,episode_panel"
+
+# Requests the chat app and the browse pages make with their default parameters
+DEFAULT_WARMUP_QUERIES = (
+    "/ranked_tv?limit=20,/ranked_movies?limit=20,/browse_tv,/browse_movies,"
+    "/top_movies,/genre_analysis,/decade_analysis"
+)
+
+
+def parse_warmup_steps(value):
+    """The optional steps named by WARMUP, in run order."""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    if names in ([], ["off"]):
+        return ()
+    unknown = [name for name in names if name not in WARMUP_STEPS]
+    if unknown:
+        raise ValueError(f"Unknown warm-up step(s) {', '.join(unknown)}; choose from {', '.join(WARMUP_STEPS)} or off")
+    return tuple(step for step in WARMUP_STEPS if step in names)
+
+
+def parse_warmup_queries(value):
+    """
+    Parse WARMUP_QUERIES: comma-separated request paths with query strings.
+
+    Returns [(endpoint, {param: value})]. Values cannot contain commas.
+    """
+    queries = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        url = urlsplit(item)
+        queries.append((url.path.strip("/"), dict(parse_qsl(url.query))))
+    return queries
+
+
+def touch_tables(con, tables):
+    """
+    Read every column of each table once so its blocks are cached.
+
+    Runs on its own cursor. Returns the tables' total row count.
+    """
+    rows = 0
+    cursor = con.cursor()
+    try:
+        for table in tables:
+            columns = [row[0] for row in cursor.execute(f'DESCRIBE "{table}"').fetchall()]
+            aggregates = ", ".join(f'MIN("{column}")' for column in columns)
+            cursor.execute(f'SELECT COUNT(*), {aggregates} FROM "{table}"')
+            rows += cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    return rows
+
+
+class Warmup:
+    """Progress of the warm-up steps, as reported by /readyz."""
+
+    def __init__(self, steps):
+        self.steps = ("resolver",) + tuple(steps)
+        self.state = "pending"
+        self.results = {}
+        self.seconds = None
+
+    @property
+    def ready(self):
+        return self.state == "done"
+
+    async def run(self, runners):
+        """
+        Run each step's coroutine function from ``runners`` in order.
+
+        A step returns a dict of details for status(); a failing step is
+        recorded with its error and the remaining steps still run.
+        """
+        self.state = "running"
+        started = time.perf_counter()
+        for step in self.steps:
+            step_started = time.perf_counter()
+            try:
+                result = dict(await runners[step]())
+            except Exception as e:
+                result = {"error": str(e)}
+            result["seconds"] = round(time.perf_counter() - step_started, 3)
+            self.results[step] = result
+        self.seconds = time.perf_counter() - started
+        self.state = "done"
+
+    def errors(self):
+        return {step: result["error"] for step, result in self.results.items() if "error" in result}
+
+    def status(self):
+        return {
+            "state": self.state,
+            "steps": list(self.steps),
+            "results": self.results,
+            "seconds": round(self.seconds, 3) if self.seconds is not None else None
+        }